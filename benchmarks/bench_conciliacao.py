@@ -0,0 +1,157 @@
+# bench_conciliacao.py
+# Compara a conciliação exata linha a linha (dict de listas em Python puro, o jeito
+# "óbvio" sem comparar par a par) com conciliacao.conciliar (códigos inteiros + hash join),
+# e mede conciliar_com_tolerancia com liquidações em D+1/D+2 e centavos de diferença,
+# um caso só de empates (milhares de valores iguais), uma escada de empates (cada linha
+# empata com a do lado e com a anterior) e conciliar_agrupado
+# (depósitos da adquirente que pagam várias vendas de uma vez);
+# por fim, grava o relatório .xlsx de uma conciliação com tolerância (gerar_relatorio)
+
+import sys
+import os
+import time
+import tempfile
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.models.transaction_batch import TransactionBatch
+from conciliador.services.conciliacao import conciliar, conciliar_com_tolerancia, conciliar_agrupado
+from conciliador.services.relatorio_conciliacao import gerar_relatorio
+
+
+def gerar_lados(n_linhas, seed=42):
+    '''
+    Extrato e ERP com as mesmas transações em outra ordem; 5% do ERP com um centavo
+    de diferença (ficam sem par).
+    '''
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range("2025-01-01", periods=365).strftime("%d/%m/%Y").to_numpy(dtype=object)
+    tipos = np.array(["PIX", "CRÉDITO", "DÉBITO", "DINHEIRO"], dtype=object)
+    extrato = TransactionBatch(rng.choice(datas, n_linhas), rng.choice(tipos, n_linhas),
+                               np.round(rng.uniform(1, 5000, n_linhas), 2))
+    ordem = rng.permutation(n_linhas)
+    valores = extrato.valor[ordem] + (rng.random(n_linhas) < 0.05) * 0.01
+    erp = TransactionBatch(extrato.data[ordem], extrato.tipo_pagamento[ordem], valores)
+    return extrato, erp
+
+
+def deslocar(erp, seed=7):
+    '''
+    Extrato com as transações do ERP liquidadas em D+1 ou D+2 e até 4 centavos a menos.
+    '''
+    rng = np.random.default_rng(seed)
+    dias = pd.to_datetime(pd.Series(erp.data), format="%d/%m/%Y") + pd.to_timedelta(rng.integers(1, 3, len(erp)), unit="D")
+    return TransactionBatch(dias.dt.strftime("%d/%m/%Y").to_numpy(dtype=object), erp.tipo_pagamento,
+                            erp.valor - rng.integers(0, 5, len(erp)) / 100)
+
+
+def gerar_depositos(vendas, n_divididos=200, seed=11):
+    '''
+    Um depósito por (data, tipo) com a soma das vendas, mais n_divididos grupos pequenos
+    (20 vendas CONVENIADO) pagos em dois depósitos cada: só fecham pela busca de subconjunto.
+    '''
+    rng = np.random.default_rng(seed)
+    somas = pd.DataFrame({"data": vendas.data, "tipo": vendas.tipo_pagamento, "valor": vendas.valor}) \
+        .groupby(["data", "tipo"], as_index=False)["valor"].sum()
+    datas = pd.date_range("2025-01-01", periods=n_divididos).strftime("%d/%m/%Y").to_numpy(dtype=object)
+
+    valores = np.round(rng.uniform(1, 500, (n_divididos, 20)), 2)
+    metade = rng.random((n_divididos, 20)) < 0.5
+    parte_a = np.round(np.where(metade, valores, 0).sum(axis=1), 2)
+    parte_b = np.round(np.where(metade, 0, valores).sum(axis=1), 2)
+
+    vendas = TransactionBatch(np.concatenate([vendas.data, np.repeat(datas, 20)]),
+                              np.concatenate([vendas.tipo_pagamento, np.full(valores.size, "CONVENIADO", dtype=object)]),
+                              np.concatenate([vendas.valor, valores.ravel()]))
+    depositos = TransactionBatch(np.concatenate([somas["data"], datas, datas]),
+                                 np.concatenate([somas["tipo"], np.full(2 * n_divididos, "CONVENIADO", dtype=object)]),
+                                 np.concatenate([somas["valor"].round(2), parte_a, parte_b]))
+    return vendas, depositos
+
+
+def conciliar_em_python(extrato, erp):
+    '''
+    Versão linha a linha: fila de linhas do ERP por chave, consumida pelo extrato.
+    '''
+    fila = defaultdict(list)
+    for linha, chave in enumerate(zip(erp.data.tolist(), erp.tipo_pagamento.tolist(), np.rint(erp.valor * 100).tolist())):
+        fila[chave].append(linha)
+    for linhas in fila.values():
+        linhas.reverse()
+
+    pares = []
+    for linha, chave in enumerate(zip(extrato.data.tolist(), extrato.tipo_pagamento.tolist(),
+                                      np.rint(extrato.valor * 100).tolist())):
+        linhas = fila.get(chave)
+        if linhas:
+            pares.append((linha, linhas.pop()))
+    return pares
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+if __name__ == "__main__":
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("=" * 80)
+    print(f"BENCHMARK conciliar - {n_linhas} x {n_linhas} linhas")
+    print("=" * 80)
+
+    extrato, erp = gerar_lados(n_linhas)
+    t_python, pares_python = medir(conciliar_em_python, extrato, erp)
+    print(f"dict em Python (linha a linha): {t_python:8.3f} s")
+
+    t_hash, resultado = medir(conciliar, extrato, erp)
+    print(f"conciliar (hash join):          {t_hash:8.3f} s  speedup: {t_python / t_hash:.1f}x")
+    print(f"pares: {len(resultado['pares'])} | sem par: {len(resultado['sem_par_esquerda'])} / "
+          f"{len(resultado['sem_par_direita'])} | chaves duplicadas: {len(resultado['duplicados'])}")
+    print(f"mesmos pares: {len(pares_python) == len(resultado['pares'])}")
+
+    extrato_liquidado = deslocar(extrato)
+    t_tolerancia, resultado = medir(conciliar_com_tolerancia, extrato, extrato_liquidado, 2, 0.05)
+    exatos = (resultado["pares"]["criterio"] == "exata").sum()
+    print(f"conciliar_com_tolerancia (±2 dias, ±0,05): {t_tolerancia:8.3f} s | pares: {len(resultado['pares'])} "
+          f"({exatos} exatos) | sem par: {len(resultado['sem_par_esquerda'])}")
+
+    # Caso com muitos empates: valores iguais liquidados em D+1 (todos candidatos de todos)
+    n_empates = min(n_linhas, 20_000)
+    iguais = TransactionBatch(["06/10/2025"] * n_empates, ["PIX"] * n_empates, [10.0] * n_empates)
+    liquidados = TransactionBatch(["07/10/2025"] * n_empates, ["PIX"] * n_empates, [10.0] * n_empates)
+    t_empates, resultado = medir(conciliar_com_tolerancia, iguais, liquidados, 2)
+    print(f"conciliar_com_tolerancia com empates ({n_empates} x {n_empates} valores iguais): {t_empates:8.3f} s | "
+          f"pares: {len(resultado['pares'])}")
+
+    # Escada: valores 10,00 + 0,02·i de um lado e 0,01 a mais do outro, tolerância de 0,01
+    n_escada = min(n_linhas, 200_000)
+    degraus = np.round(10 + 0.02 * np.arange(n_escada), 2)
+    esquerda = TransactionBatch(["06/10/2025"] * n_escada, ["PIX"] * n_escada, degraus)
+    direita = TransactionBatch(["06/10/2025"] * n_escada, ["PIX"] * n_escada, np.round(degraus + 0.01, 2))
+    t_escada, resultado = medir(conciliar_com_tolerancia, esquerda, direita, 0, 0.01)
+    print(f"conciliar_com_tolerancia em escada de empates ({n_escada} x {n_escada}): {t_escada:8.3f} s | "
+          f"pares: {len(resultado['pares'])}")
+
+    vendas, depositos = gerar_depositos(extrato)
+    t_agrupado, resultado = medir(conciliar_agrupado, vendas, depositos)
+    criterios = resultado["composicao"]["criterio"].value_counts().to_dict()
+    print(f"conciliar_agrupado ({len(vendas)} vendas x {len(depositos)} depósitos): {t_agrupado:8.3f} s | {criterios} | "
+          f"vendas sem depósito: {len(resultado['sem_par_vendas'])}")
+
+    # O .xlsx tem limite de linhas por aba: o relatório usa no máximo 500 mil linhas de cada lado
+    n_relatorio = min(n_linhas, 500_000)
+    extrato, _ = gerar_lados(n_relatorio)
+    extrato_liquidado = deslocar(extrato)
+    resultado = conciliar_com_tolerancia(extrato, extrato_liquidado, 2, 0.05)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "relatorio.xlsx")
+        t_relatorio, resumo = medir(gerar_relatorio, resultado, extrato, extrato_liquidado, caminho)
+        tamanho = os.path.getsize(caminho) / 1024 / 1024
+    print(f"gerar_relatorio ({n_relatorio} x {n_relatorio}): {t_relatorio:8.3f} s | {tamanho:.1f} MB | "
+          f"conciliados: {resumo['conciliados']} | divergências: {resumo['divergencias']}")
@@ -0,0 +1,57 @@
+# bench_data_mapper.py
+# Compara o tempo de extract_transactions nos modos "linha" (iterrows) e "colunar"
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.services.data_mapper import extract_transactions
+
+
+def gerar_extrato(n_linhas, seed=42):
+    '''
+    Gera um DataFrame limpo parecido com um extrato de adquirente.
+    Cerca de 1% das linhas é inválida para exercitar a lista de erros.
+    '''
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range("2025-01-01", periods=365).strftime("%d/%m/%Y").to_numpy()
+    tipos = np.array(["pix", "crédito", "Débito", "dinheiro", "convenio", "boleto"])
+    tipos_p = [0.3, 0.3, 0.3, 0.05, 0.04, 0.01]
+
+    df = pd.DataFrame({
+        "Data Lançamento": rng.choice(datas, n_linhas),
+        "Forma Pagamento": rng.choice(tipos, n_linhas, p=tipos_p),
+        "Valor Total": np.round(rng.uniform(1, 5000, n_linhas), 2),
+        "NSU": rng.integers(10**8, 10**9, n_linhas),
+        "Cliente": rng.choice(["João", "Maria", "Pedro", None], n_linhas),
+    })
+    df.loc[rng.random(n_linhas) < 0.005, "Valor Total"] = -10.0
+    return df
+
+
+def medir(df, modo):
+    inicio = time.perf_counter()
+    sucessos, erros = extract_transactions(df, modo=modo)
+    return time.perf_counter() - inicio, sucessos, erros
+
+
+if __name__ == "__main__":
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = gerar_extrato(n_linhas)
+
+    print("=" * 80)
+    print(f"BENCHMARK extract_transactions - {n_linhas} linhas")
+    print("=" * 80)
+
+    t_linha, s_linha, e_linha = medir(df, "linha")
+    t_colunar, s_colunar, e_colunar = medir(df, "colunar")
+
+    print(f"linha   (iterrows): {t_linha:8.3f} s  ({len(s_linha)} sucessos, {len(e_linha)} erros)")
+    print(f"colunar (vetorial): {t_colunar:8.3f} s  ({len(s_colunar)} sucessos, {len(e_colunar)} erros)")
+    print(f"speedup: {t_linha / t_colunar:.1f}x")
+    print(f"mesma lista de erros: {e_linha == e_colunar}")
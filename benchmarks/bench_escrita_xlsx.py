@@ -0,0 +1,97 @@
+# bench_escrita_xlsx.py
+# Compara a escrita da planilha de saída: df.to_excel (write_file), openpyxl write_only
+# (escritor em blocos anterior) e write_file_chunks (zipfile + XML por coluna).
+# Mede tempo e pico de memória (tracemalloc) para o mesmo conteúdo.
+
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.services.file_handler import write_file, write_file_chunks
+
+TAMANHO_BLOCO = 10_000
+
+
+def gerar_blocos(n_linhas, seed=42):
+    '''
+    Blocos parecidos com a saída do pipeline: data e tipo como texto, valor float, NSU inteiro,
+    cliente com alguns vazios e campos extras de texto.
+    '''
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range("2025-01-01", periods=365).strftime("%d/%m/%Y").to_numpy(dtype=object)
+    tipos = np.array(["PIX", "CRÉDITO", "DÉBITO", "DINHEIRO"], dtype=object)
+    for inicio in range(0, n_linhas, TAMANHO_BLOCO):
+        n = min(TAMANHO_BLOCO, n_linhas - inicio)
+        bloco = pd.DataFrame({
+            "Data": rng.choice(datas, n),
+            "Tipo": rng.choice(tipos, n),
+            "Valor": np.round(rng.uniform(1, 5000, n), 2),
+            "NSU": rng.integers(10**8, 10**9, n),
+            "Cliente": rng.choice(np.array(["João", "Maria", "Pedro", None], dtype=object), n),
+        })
+        for j in range(5):
+            bloco[f"Extra {j}"] = rng.choice(np.array([f"Loja {k}" for k in range(50)], dtype=object), n)
+        yield bloco
+
+
+def escrever_openpyxl_write_only(blocos, caminho):
+    '''
+    Escritor em blocos anterior (openpyxl write_only, uma célula por vez), sem índice.
+    '''
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    cabecalho_escrito = False
+    for df in blocos:
+        if not cabecalho_escrito:
+            sheet.append([str(coluna) for coluna in df.columns])
+            cabecalho_escrito = True
+        df = df.astype(object).where(df.notna(), None)
+        for linha in df.itertuples(index=False, name=None):
+            sheet.append(linha)
+    workbook.save(caminho)
+
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / 1e6
+
+
+if __name__ == "__main__":
+    tamanhos = [int(n) for n in sys.argv[1:]] or [50_000, 200_000]
+    formatos = {"Valor": "#,##0.00"}
+
+    print("=" * 80)
+    print("BENCHMARK escrita de XLSX - tempo e pico de memória (tracemalloc)")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_linhas in tamanhos:
+            caminho = os.path.join(pasta, "saida.xlsx")
+
+            t_to_excel, pico_to_excel = medir(
+                lambda: write_file(pd.concat(gerar_blocos(n_linhas), ignore_index=True), caminho))
+            t_openpyxl, pico_openpyxl = medir(lambda: escrever_openpyxl_write_only(gerar_blocos(n_linhas), caminho))
+            t_blocos, pico_blocos = medir(
+                lambda: write_file_chunks(gerar_blocos(n_linhas), caminho, indice=False, formatos=formatos))
+
+            print(f"{n_linhas:>8} linhas x 10 colunas")
+            print(f"   to_excel (write_file):        {t_to_excel:7.2f} s  {pico_to_excel:8.1f} MB")
+            print(f"   openpyxl write_only:          {t_openpyxl:7.2f} s  {pico_openpyxl:8.1f} MB")
+            print(f"   write_file_chunks:            {t_blocos:7.2f} s  {pico_blocos:8.1f} MB"
+                  f"  ({t_to_excel / t_blocos:.1f}x to_excel, {t_openpyxl / t_blocos:.1f}x write_only)")
+            print(f"   {os.path.getsize(caminho) / 1e6:.1f} MB em disco; leitura confere: "
+                  f"{len(pd.read_excel(caminho, usecols=[0])) == n_linhas}")
@@ -0,0 +1,58 @@
+# bench_file_handler.py
+# Compara o pico de memória de read_file (pd.read_excel) e read_file_chunks (openpyxl read_only)
+
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+import openpyxl
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.services.file_handler import read_file, read_file_chunks
+
+
+def gerar_xlsx(caminho, n_linhas):
+    '''
+    Escreve um extrato sintético com openpyxl em modo write_only.
+    '''
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Data Lançamento", "Forma Pagamento", "Valor Total", "NSU", "Cliente"])
+    for i in range(n_linhas):
+        sheet.append([f"{i % 28 + 1:02d}/10/2025", "pix", round(i * 0.37 % 5000, 2), 10**8 + i, f"Cliente {i % 500}"])
+    workbook.save(caminho)
+
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    linhas = funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return linhas, tempo, pico / 1e6
+
+
+if __name__ == "__main__":
+    tamanhos = [int(n) for n in sys.argv[1:]] or [10_000, 40_000]
+
+    print("=" * 80)
+    print("BENCHMARK leitura de XLSX - pico de memória (tracemalloc)")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_linhas in tamanhos:
+            caminho = os.path.join(pasta, f"extrato_{n_linhas}.xlsx")
+            gerar_xlsx(caminho, n_linhas)
+
+            linhas, t_inteiro, pico_inteiro = medir(lambda: len(read_file(caminho)))
+            linhas_blocos, t_blocos, pico_blocos = medir(
+                lambda: sum(len(bloco) for bloco in read_file_chunks(caminho, chunk_size=5000))
+            )
+
+            print(f"{n_linhas:>8} linhas | read_file: {pico_inteiro:8.1f} MB {t_inteiro:6.2f} s"
+                  f" | read_file_chunks: {pico_blocos:8.1f} MB {t_blocos:6.2f} s"
+                  f" | linhas iguais: {linhas == linhas_blocos}")
@@ -0,0 +1,42 @@
+# bench_importacao_lote.py
+# Compara o tempo de parede da importação em paralelo com a soma dos tempos por arquivo (em série)
+
+import sys
+import os
+import tempfile
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_file_handler import gerar_xlsx
+from conciliador.models.template import Template
+from conciliador.services.importacao_lote import importar_arquivos, listar_planilhas
+
+
+if __name__ == "__main__":
+    n_arquivos = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    template = Template(
+        nome="Bench",
+        colunas=["Data", "Tipo", "Valor", "Cliente"],
+        mapeamento={"Data": "data", "Tipo": "tipo_pagamento", "Valor": "valor", "Cliente": "Cliente"}
+    )
+
+    print("=" * 80)
+    print(f"BENCHMARK importação em lote - {n_arquivos} arquivos x {n_linhas} linhas - {os.cpu_count()} CPUs")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for i in range(n_arquivos):
+            gerar_xlsx(os.path.join(pasta, f"filial_{i:02d}.xlsx"), n_linhas)
+        saida = os.path.join(pasta, "saida")
+
+        for consolidar in (False, True):
+            resultado = importar_arquivos(listar_planilhas(pasta), template, saida, consolidar=consolidar)
+            ok = sum(1 for arquivo in resultado["arquivos"] if arquivo["status"] == "ok")
+            print(f"consolidar={consolidar!s:5} | {ok}/{n_arquivos} ok"
+                  f" | paralelo: {resultado['tempo_total']:6.2f} s"
+                  f" | sequencial (soma): {resultado['tempo_sequencial']:6.2f} s"
+                  f" | speedup: {resultado['tempo_sequencial'] / resultado['tempo_total']:.1f}x")
@@ -0,0 +1,90 @@
+# bench_output_generator.py
+# Compara a montagem do DataFrame de saída célula a célula (get_valor_mapeado + dict por linha)
+# com as colunas compiladas do template, para list[Transaction] e TransactionBatch
+
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.models.template import Template
+from conciliador.models.transaction import Transaction
+from conciliador.models.transaction_batch import TransactionBatch
+from conciliador.services.output_generator import montar_dataframe
+
+N_EXTRAS = 14
+N_CONSTANTES = 3
+
+
+def gerar_transactions(n_linhas, seed=42):
+    '''
+    Gera transações já validadas com N_EXTRAS campos extras
+    (um deles ausente em parte das linhas).
+    '''
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range("2025-01-01", periods=365).strftime("%d/%m/%Y").to_numpy(dtype=object)
+    tipos = np.array(["PIX", "CRÉDITO", "DÉBITO", "DINHEIRO"], dtype=object)
+
+    data = rng.choice(datas, n_linhas).tolist()
+    tipo = rng.choice(tipos, n_linhas).tolist()
+    valor = np.round(rng.uniform(1, 5000, n_linhas), 2).tolist()
+    extras = [rng.integers(0, 10**6, n_linhas).tolist() for _ in range(N_EXTRAS)]
+    presente = (rng.random(n_linhas) > 0.1).tolist()
+
+    transactions = []
+    for i in range(n_linhas):
+        campos = {f"extra_{j}": extras[j][i] for j in range(N_EXTRAS - 1)}
+        if presente[i]:
+            campos[f"extra_{N_EXTRAS - 1}"] = extras[N_EXTRAS - 1][i]
+        transactions.append(Transaction._sem_validacao(data[i], tipo[i], valor[i], campos))
+    return transactions
+
+
+def montar_por_celula(transactions, template):
+    '''
+    Montagem anterior: um dict por linha, get_valor_mapeado por célula.
+    '''
+    linhas = []
+    for transaction in transactions:
+        linha = {}
+        for coluna in template.colunas:
+            linha[coluna] = template.get_valor_mapeado(transaction, coluna)
+        linhas.append(linha)
+    return pd.DataFrame(linhas, columns=template.colunas)
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+if __name__ == "__main__":
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    mapeamento = {"Data": "data", "Tipo": "tipo_pagamento", "Valor": "valor"}
+    mapeamento.update({f"Extra {j}": f"extra_{j}" for j in range(N_EXTRAS)})
+    mapeamento.update({f"Em branco {j}": "" for j in range(N_CONSTANTES)})
+    template = Template(nome="Bench", colunas=list(mapeamento), mapeamento=mapeamento)
+
+    print("=" * 80)
+    print(f"BENCHMARK montar_dataframe - {n_linhas} linhas x {len(template.colunas)} colunas")
+    print("=" * 80)
+
+    transactions = gerar_transactions(n_linhas)
+    t_celula, df_celula = medir(montar_por_celula, transactions, template)
+    print(f"célula a célula (dict por linha): {t_celula:8.3f} s")
+    del df_celula
+
+    t_lista, df_lista = medir(montar_dataframe, transactions, template)
+    print(f"colunas compiladas (list):        {t_lista:8.3f} s  speedup: {t_celula / t_lista:.1f}x")
+
+    lote = TransactionBatch.from_transactions(transactions)
+    del transactions
+    t_lote, df_lote = medir(montar_dataframe, lote, template)
+    print(f"colunas compiladas (lote):        {t_lote:8.3f} s  speedup: {t_celula / t_lote:.1f}x")
+    print(f"mesmo conteúdo list x lote: {df_lista.astype(object).equals(df_lote.astype(object))}")
@@ -0,0 +1,63 @@
+# bench_sheet_processor.py
+# Compara o header_finder antigo (laço com df.iloc[i] por linha) com a busca vetorizada em janela
+
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.services.sheet_processor import header_finder
+
+
+def header_finder_laco(df):
+    '''
+    Implementação anterior, mantida como referência.
+    '''
+    if not any("Unnamed" in str(col) for col in df.columns):
+        return -1
+
+    for i in range(len(df)):
+        line = df.iloc[i]
+        filled_cells = line.notna().sum()
+        total_cells = len(line)
+        if filled_cells / total_cells >= 0.7:
+            return i
+
+    return 0
+
+
+def gerar_planilha(n_linhas, n_colunas=20):
+    '''
+    Planilha sem nenhuma linha 70% preenchida: o laço antigo percorre o arquivo inteiro.
+    '''
+    valores = np.full((n_linhas, n_colunas), np.nan, dtype=object)
+    valores[:, 0] = "06/10/2025"
+    valores[:, 1] = 10.0
+    return pd.DataFrame(valores, columns=[f"Unnamed: {i}" for i in range(n_colunas)])
+
+
+def medir(funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    return resultado, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    tamanhos = [int(n) for n in sys.argv[1:]] or [10_000, 100_000]
+
+    print("=" * 80)
+    print("BENCHMARK header_finder - planilha sem linha de cabeçalho")
+    print("=" * 80)
+
+    for n_linhas in tamanhos:
+        df = gerar_planilha(n_linhas)
+        resultado_laco, tempo_laco = medir(header_finder_laco, df)
+        resultado, tempo = medir(header_finder, df)
+        print(f"{n_linhas:>9} linhas | laço: {tempo_laco * 1000:9.1f} ms | "
+              f"janela vetorizada: {tempo * 1000:7.2f} ms | "
+              f"{tempo_laco / tempo:6.0f}x | resultado {resultado_laco} / {resultado}")
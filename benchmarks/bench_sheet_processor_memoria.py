@@ -0,0 +1,103 @@
+# bench_sheet_processor_memoria.py
+# Compara o pico de RSS do clean_sheet em uma passada com a sequência original de etapas
+# (header -> remove_empty -> unmerge_cells -> reset_index). Cada medição roda em um processo novo;
+# o pico (VmHWM) é zerado depois de gerar a planilha via /proc/self/clear_refs (Linux).
+
+import sys
+import os
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from conciliador.services.sheet_processor import clean_sheet, header_finder, remove_empty, unmerge_cells
+
+
+def clean_sheet_encadeado(df):
+    '''
+    Sequência original de etapas, mantida como referência.
+    '''
+    header_index = header_finder(df)
+    if header_index >= 0:
+        df.columns = df.iloc[header_index]
+        df.columns = df.columns.astype(str)
+        df = df[header_index + 1:]
+    df = remove_empty(df)
+    df = unmerge_cells(df)
+    return df.reset_index(drop=True)
+
+
+def gerar_planilha(n_linhas, seed=42):
+    '''
+    Planilha "bruta" como sai do read_excel: título, cabeçalho na 3ª linha,
+    colunas de objeto, células mescladas (vazias) e algumas linhas/colunas vazias.
+    '''
+    rng = np.random.default_rng(seed)
+    valores = {
+        "Unnamed: 0": rng.choice(np.array(["06/10/2025", "07/10/2025", None], dtype=object), n_linhas, p=[0.45, 0.45, 0.1]),
+        "Unnamed: 1": rng.choice(np.array(["pix", "crédito", "débito"], dtype=object), n_linhas),
+        "Unnamed: 2": np.round(rng.uniform(1, 5000, n_linhas), 2).astype(object),
+        "Unnamed: 3": np.full(n_linhas, None, dtype=object),
+        "Unnamed: 4": rng.choice(np.array(["Loja A", "Loja B", None], dtype=object), n_linhas),
+    }
+    for i in range(5, 12):
+        valores[f"Unnamed: {i}"] = rng.integers(0, 10**9, n_linhas).astype(object)
+    df = pd.DataFrame(valores)
+    df.iloc[0] = ["Extrato"] + [None] * (df.shape[1] - 1)
+    df.iloc[2] = ["Data", "Tipo", "Valor", None, "Loja"] + [f"Campo {i}" for i in range(5, 12)]
+    df.iloc[rng.random(n_linhas) < 0.02] = None
+    return df
+
+
+def memoria_mb(campo):
+    '''
+    Lê VmRSS (atual) ou VmHWM (pico) de /proc/self/status, em MB.
+    '''
+    with open("/proc/self/status") as status:
+        for linha in status:
+            if linha.startswith(campo + ":"):
+                return int(linha.split()[1]) / 1024
+    raise RuntimeError(f"{campo} indisponível (benchmark só roda no Linux).")
+
+
+def zerar_pico():
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+
+def medir(variante, n_linhas):
+    '''
+    Roda no processo filho: gera a planilha, limpa e imprime o pico de RSS acima da base.
+    '''
+    df = gerar_planilha(n_linhas)
+    tamanho_df = df.memory_usage(deep=True).sum() / 1e6
+    zerar_pico()
+    base = memoria_mb("VmRSS")
+    funcao = clean_sheet if variante == "fundido" else clean_sheet_encadeado
+    limpo = funcao(df)
+    print(f"{memoria_mb('VmHWM') - base:.1f} {tamanho_df:.1f} {len(limpo)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--medir":
+        medir(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+
+    tamanhos = [int(n) for n in sys.argv[1:]] or [200_000, 1_000_000]
+
+    print("=" * 80)
+    print("BENCHMARK clean_sheet - pico de RSS acima da planilha já carregada (processo novo por medição)")
+    print("=" * 80)
+
+    for n_linhas in tamanhos:
+        resultados = {}
+        for variante in ("encadeado", "fundido"):
+            saida = subprocess.run([sys.executable, __file__, "--medir", variante, str(n_linhas)],
+                                   capture_output=True, text=True, check=True).stdout.split()
+            resultados[variante] = float(saida[0])
+            tamanho_df = float(saida[1])
+        print(f"{n_linhas:>9} linhas ({tamanho_df:7.1f} MB) | encadeado: +{resultados['encadeado']:7.1f} MB | "
+              f"uma passada: +{resultados['fundido']:7.1f} MB")
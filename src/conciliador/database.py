@@ -0,0 +1,221 @@
+# Importações
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+#----------Camada de persistência (SQLite)-------------#
+'''
+Banco SQLite (sqlite3 da biblioteca padrão) com:
+- templates: cópia dos templates de data/templates (pasta, arquivo, nome, data de modificação
+  e o JSON completo), mantida pelo template_manager
+- importacoes: histórico de conciliações (data, template, arquivo de origem e seu hash,
+  arquivo gerado, status, linhas lidas, transações, quantidade de erros, duração)
+- erros_importacao: mensagens de erro de cada importação
+
+O banco roda em modo WAL (leituras da interface não bloqueiam a gravação feita pela
+thread de trabalho). Cada thread usa a sua própria conexão; as consultas usam sempre
+parâmetros (?), e o sqlite3 reaproveita os comandos já preparados de cada conexão.
+
+Os JSON de data/templates continuam sendo a fonte editável: save_template/delete_template
+gravam também no banco, e o registro do template_manager lê daqui os arquivos que não
+mudaram desde a última gravação (sem reabrir o JSON) e atualiza as linhas dos que mudaram.
+
+Funções:
+- salvar_template(pasta, arquivo, dados, mtime) / deletar_template(pasta, arquivo) -> bool
+- templates_da_pasta(pasta) -> {arquivo: {"mtime", "dados"}}
+- registrar_importacao(...) -> id
+- listar_importacoes(pagina, por_pagina, template=None) -> dict paginado
+- erros_da_importacao(id) -> list[str]
+- buscar_por_hash(hash_entrada) -> list[dict]
+'''
+
+DB_PATH = os.path.join("data", "conciliador.db")
+
+# Registros por página no painel "Últimas Conciliações"
+POR_PAGINA_PADRAO = 10
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    pasta TEXT NOT NULL,
+    arquivo TEXT NOT NULL,
+    nome TEXT,
+    mtime INTEGER NOT NULL,
+    dados TEXT NOT NULL,
+    atualizado_em TEXT NOT NULL,
+    PRIMARY KEY (pasta, arquivo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_templates_nome ON templates (pasta, nome);
+
+CREATE TABLE IF NOT EXISTS importacoes (
+    id INTEGER PRIMARY KEY,
+    iniciado_em TEXT NOT NULL,
+    template TEXT,
+    caminho_entrada TEXT NOT NULL,
+    hash_entrada TEXT,
+    caminho_saida TEXT,
+    status TEXT NOT NULL,
+    linhas_lidas INTEGER NOT NULL DEFAULT 0,
+    transacoes INTEGER NOT NULL DEFAULT 0,
+    n_erros INTEGER NOT NULL DEFAULT 0,
+    duracao REAL
+);
+CREATE INDEX IF NOT EXISTS idx_importacoes_data ON importacoes (iniciado_em DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_importacoes_template ON importacoes (template, iniciado_em DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_importacoes_hash ON importacoes (hash_entrada);
+
+CREATE TABLE IF NOT EXISTS erros_importacao (
+    importacao_id INTEGER NOT NULL REFERENCES importacoes (id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    mensagem TEXT NOT NULL,
+    PRIMARY KEY (importacao_id, posicao)
+) WITHOUT ROWID;
+"""
+
+_local = threading.local()
+
+
+def conectar():
+    '''
+    Retorna a conexão desta thread com o banco em DB_PATH (criada na primeira chamada,
+    já com WAL, chaves estrangeiras e o esquema). A chave inclui o pid: um processo do
+    pool criado por fork não reaproveita a conexão herdada do processo pai.
+    '''
+    conexoes = getattr(_local, "conexoes", None)
+    if conexoes is None:
+        conexoes = _local.conexoes = {}
+
+    chave = (os.getpid(), DB_PATH)
+    conexao = conexoes.get(chave)
+    if conexao is None:
+        pasta = os.path.dirname(DB_PATH)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        conexao = sqlite3.connect(DB_PATH, timeout=10, cached_statements=256)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.execute("PRAGMA foreign_keys=ON")
+        conexao.executescript(_ESQUEMA)
+        conexoes[chave] = conexao
+    return conexao
+
+
+def fechar():
+    '''
+    Fecha as conexões abertas por esta thread (as herdadas de outro processo são só esquecidas).
+    '''
+    for (pid, _), conexao in getattr(_local, "conexoes", {}).items():
+        if pid == os.getpid():
+            conexao.close()
+    _local.conexoes = {}
+
+
+def _agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+    ###Templates
+
+def salvar_template(pasta, arquivo, dados, mtime):
+    '''
+    Insere ou atualiza a cópia de um template (dados = JSON do arquivo já lido,
+    mtime = data de modificação do arquivo em nanossegundos).
+    '''
+    if not isinstance(dados, dict):
+        raise ValueError("O template deve ser um dicionário.")
+    nome = dados.get("nome")
+    conexao = conectar()
+    with conexao:
+        conexao.execute(
+            "INSERT INTO templates (pasta, arquivo, nome, mtime, dados, atualizado_em) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (pasta, arquivo) DO UPDATE SET nome = excluded.nome, mtime = excluded.mtime, "
+            "dados = excluded.dados, atualizado_em = excluded.atualizado_em",
+            (pasta, arquivo, nome if isinstance(nome, str) else None, mtime,
+             json.dumps(dados, ensure_ascii=False), _agora()),
+        )
+
+
+def deletar_template(pasta, arquivo):
+    '''
+    Remove a cópia de um template. Retorna True se existia.
+    '''
+    conexao = conectar()
+    with conexao:
+        return conexao.execute("DELETE FROM templates WHERE pasta = ? AND arquivo = ?", (pasta, arquivo)).rowcount > 0
+
+
+def templates_da_pasta(pasta):
+    '''
+    Templates gravados de uma pasta, em ordem de nome: {arquivo: {"mtime", "dados"}}.
+    '''
+    return {linha["arquivo"]: {"mtime": linha["mtime"], "dados": json.loads(linha["dados"])}
+            for linha in conectar().execute(
+                "SELECT arquivo, mtime, dados FROM templates WHERE pasta = ? ORDER BY nome, arquivo", (pasta,))}
+
+
+    ###Histórico de importações
+
+def registrar_importacao(caminho_entrada, status, template=None, hash_entrada=None, caminho_saida=None,
+                         linhas_lidas=0, transacoes=0, erros=(), duracao=None, iniciado_em=None):
+    '''
+    Grava uma importação (e a sua lista de erros) no histórico. Retorna o id.
+    status: "ok", "erro" ou "cancelado".
+    '''
+    erros = list(erros)
+    conexao = conectar()
+    with conexao:
+        cursor = conexao.execute(
+            "INSERT INTO importacoes (iniciado_em, template, caminho_entrada, hash_entrada, caminho_saida, "
+            "status, linhas_lidas, transacoes, n_erros, duracao) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (iniciado_em or _agora(), template, caminho_entrada, hash_entrada, caminho_saida,
+             status, linhas_lidas, transacoes, len(erros), duracao),
+        )
+        importacao_id = cursor.lastrowid
+        conexao.executemany(
+            "INSERT INTO erros_importacao (importacao_id, posicao, mensagem) VALUES (?, ?, ?)",
+            ((importacao_id, posicao, str(mensagem)) for posicao, mensagem in enumerate(erros)),
+        )
+    return importacao_id
+
+
+def listar_importacoes(pagina=1, por_pagina=POR_PAGINA_PADRAO, template=None):
+    '''
+    Página do histórico, da importação mais recente para a mais antiga.
+    Retorna {"registros": list[dict], "pagina", "total_paginas", "total"}.
+    '''
+    if pagina < 1 or por_pagina < 1:
+        raise ValueError("A página e o tamanho da página devem ser maiores que zero.")
+
+    filtro, parametros = ("WHERE template = ?", (template,)) if template is not None else ("", ())
+    conexao = conectar()
+    total = conexao.execute(f"SELECT COUNT(*) FROM importacoes {filtro}", parametros).fetchone()[0]
+    linhas = conexao.execute(
+        f"SELECT * FROM importacoes {filtro} ORDER BY iniciado_em DESC, id DESC LIMIT ? OFFSET ?",
+        parametros + (por_pagina, (pagina - 1) * por_pagina),
+    ).fetchall()
+    return {
+        "registros": [dict(linha) for linha in linhas],
+        "pagina": pagina,
+        "total_paginas": max(1, -(-total // por_pagina)),
+        "total": total,
+    }
+
+
+def erros_da_importacao(importacao_id):
+    '''
+    Mensagens de erro de uma importação, na ordem em que foram geradas.
+    '''
+    return [linha["mensagem"] for linha in conectar().execute(
+        "SELECT mensagem FROM erros_importacao WHERE importacao_id = ? ORDER BY posicao", (importacao_id,)
+    )]
+
+
+def buscar_por_hash(hash_entrada):
+    '''
+    Importações anteriores do mesmo arquivo (mesmo conteúdo), da mais recente para a mais antiga.
+    '''
+    return [dict(linha) for linha in conectar().execute(
+        "SELECT * FROM importacoes WHERE hash_entrada = ? ORDER BY iniciado_em DESC, id DESC", (hash_entrada,)
+    )]
@@ -1,6 +1,14 @@
 
 # Definição da classe Template
 
+# Campos lidos como atributo da transação; os demais vêm de transaction.extras
+CAMPOS_TRANSACAO = ("data", "tipo_pagamento", "valor")
+
+# Formas de acesso de uma coluna compilada (ver Template.compilar)
+ACESSO_ATRIBUTO = "atributo"
+ACESSO_EXTRA = "extra"
+ACESSO_CONSTANTE = "constante"
+
 class Template:
     '''
     Classe que representa um template de saída para exportação de dados.
@@ -53,6 +61,10 @@ class Template:
         self.mapeamento = mapeamento
         self.formatacao = formatacao if formatacao is not None else {}
 
+        # Acessos compilados (refeitos se colunas ou mapeamento mudarem)
+        self._compilado = None
+        self._chave_compilado = None
+
     def to_dict(self):
         '''
         Converte o objeto Template em um dicionário.
@@ -66,6 +78,31 @@ class Template:
             "mapeamento": self.mapeamento,
             "formatacao": self.formatacao
         }
+    def compilar(self):
+        '''
+        Resolve uma única vez como cada coluna de saída é lida:
+        - (ACESSO_ATRIBUTO, campo): atributo da transação (data, tipo_pagamento, valor)
+        - (ACESSO_EXTRA, campo): transaction.extras[campo], ou "" se a transação não tiver o campo
+        - (ACESSO_CONSTANTE, ""): campo vazio no mapeamento, a coluna sai em branco
+
+        Retorna:
+        dict: coluna -> (acesso, campo), na ordem de colunas.
+        '''
+        chave = (tuple(self.colunas), tuple(self.mapeamento.items()))
+        if self._chave_compilado != chave:
+            compilado = {}
+            for coluna in self.colunas:
+                campo = self.mapeamento[coluna]
+                if campo in CAMPOS_TRANSACAO:
+                    compilado[coluna] = (ACESSO_ATRIBUTO, campo)
+                elif campo.strip():
+                    compilado[coluna] = (ACESSO_EXTRA, campo)
+                else:
+                    compilado[coluna] = (ACESSO_CONSTANTE, "")
+            self._compilado = compilado
+            self._chave_compilado = chave
+        return self._compilado
+
     def get_valor_mapeado(self, transaction, coluna):
         '''
         Retorna o valor mapeado para uma chave específica.
@@ -76,15 +113,12 @@ class Template:
         Retorna:
         str: Valor mapeado correspondente à chave.
         '''
-        # Pega o nome do campo mapeado
-        campo = self.mapeamento[coluna]
+        # Pega a forma de acesso já resolvida para a coluna
+        acesso, campo = self.compilar()[coluna]
 
-        if hasattr(transaction, campo):
+        if acesso == ACESSO_ATRIBUTO:
             return getattr(transaction, campo)
-        if campo in transaction.extras:
+        if acesso == ACESSO_EXTRA and campo in transaction.extras:
             return transaction.extras[campo]
-        
-        return ""
-    
 
-        
\ No newline at end of file
+        return ""
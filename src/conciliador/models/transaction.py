@@ -1,5 +1,8 @@
 # Importações
 import tkinter as tk
+import unicodedata
+
+import pandas as pd
 
 
 TIPOS_DE_TRANSACAO = [
@@ -28,12 +31,90 @@ TIPOS_DE_TRANSACAO = [
     ("CASH", "DINHEIRO"),
 ]
 
+
+def _chave_tipo(tipo):
+    '''
+    Normaliza um tipo de pagamento para busca: sem espaços nas pontas,
+    casefold e sem acentos ("  Crédito " -> "credito").
+    '''
+    tipo = unicodedata.normalize("NFKD", tipo.strip().casefold())
+    return "".join(c for c in tipo if not unicodedata.combining(c))
+
+
+# Tabela de busca sinônimo normalizado -> tipo canônico (montada uma vez)
+TIPOS_NORMALIZADOS = {}
+
+
+def registrar_tipos(tipos, tabela=None):
+    '''
+    Adiciona sinônimos de tipo de pagamento a uma tabela de busca (padrão: TIPOS_NORMALIZADOS,
+    a tabela base do processo). Aceita um dicionário {sinonimo: tipo_canonico} ou uma lista
+    de pares (mesmo formato de TIPOS_DE_TRANSACAO), vindos de configuração.
+    Sinônimos de um template vão numa tabela própria da importação (ver tabela_de_tipos).
+    '''
+    if tabela is None:
+        tabela = TIPOS_NORMALIZADOS
+    pares = tipos.items() if isinstance(tipos, dict) else tipos
+    for sinonimo, canonico in pares:
+        if not isinstance(sinonimo, str) or not isinstance(canonico, str):
+            raise TypeError("Os tipos de pagamento devem ser strings.")
+        if not sinonimo.strip() or not canonico.strip():
+            raise ValueError("Os tipos de pagamento não podem ser vazios.")
+        tabela[_chave_tipo(sinonimo)] = canonico.strip()
+
+
+registrar_tipos(TIPOS_DE_TRANSACAO)
+
+
+def tabela_de_tipos(tipos=None):
+    '''
+    Tabela de busca de uma importação: cópia de TIPOS_NORMALIZADOS com os sinônimos
+    de tipos (ex: "tipos_pagamento" de um template salvo). A tabela base não é alterada,
+    então os sinônimos de um template não valem para as importações com outro template.
+    '''
+    tabela = dict(TIPOS_NORMALIZADOS)
+    if tipos:
+        registrar_tipos(tipos, tabela)
+    return tabela
+
+
+def normalizar_tipo(tipo, tabela=None):
+    '''
+    Retorna o tipo canônico de um tipo de pagamento, ou None se for desconhecido.
+    tabela: tabela de busca da importação (padrão: TIPOS_NORMALIZADOS).
+    '''
+    if not isinstance(tipo, str):
+        return None
+    return (TIPOS_NORMALIZADOS if tabela is None else tabela).get(_chave_tipo(tipo))
+
+
+def normalize_tipos(tipos, tabela=None):
+    '''
+    Normaliza uma coluna inteira de tipos de pagamento de uma vez.
+    Cada valor distinto é consultado uma única vez na tabela de busca
+    (tabela da importação, ou TIPOS_NORMALIZADOS se tabela for None).
+
+    Retorna (normalizados, desconhecidos):
+    - normalizados: np.ndarray de objetos com o tipo canônico ou None
+    - desconhecidos: lista dos valores originais distintos que não foram reconhecidos
+    '''
+    codigos, unicos = pd.factorize(pd.Series(tipos, dtype=object), use_na_sentinel=False)
+    canonicos = [normalizar_tipo(tipo, tabela) for tipo in unicos]
+    desconhecidos = [tipo for tipo, canonico in zip(unicos, canonicos) if canonico is None]
+
+    tabela = pd.Series(canonicos, dtype=object).to_numpy()
+    return tabela[codigos], desconhecidos
+
+
 # Classe Transaction
 class Transaction:
     '''
     Classe que representa uma transação financeira.
     '''
 
+    # __slots__ evita um __dict__ por objeto (importações grandes guardam milhões deles)
+    __slots__ = ("data", "tipo_pagamento", "valor", "extras")
+
     def __init__(self, data, tipo_pagamento , valor, **extras):
         '''
         Construtor da classe Transaction.
@@ -50,7 +131,30 @@ class Transaction:
 
         pass
 
-    def _validate(self, data, tipo_pagamento , valor):
+    @classmethod
+    def _sem_validacao(cls, data, tipo_pagamento, valor, extras):
+        '''
+        Cria uma Transaction a partir de valores já validados em lote
+        (usado pela extração colunar do data_mapper). Não chama _validate.
+        '''
+        transaction = cls.__new__(cls)
+        transaction.data = data
+        transaction.tipo_pagamento = tipo_pagamento
+        transaction.valor = valor
+        transaction.extras = extras
+        return transaction
+
+    @classmethod
+    def _com_tabela(cls, data, tipo_pagamento, valor, extras, tabela):
+        '''
+        Como o construtor, mas o tipo de pagamento é validado na tabela de busca
+        da importação (ver tabela_de_tipos) em vez de TIPOS_NORMALIZADOS.
+        '''
+        transaction = cls._sem_validacao(data, tipo_pagamento, valor, extras)
+        transaction._validate(data, tipo_pagamento, valor, tabela)
+        return transaction
+
+    def _validate(self, data, tipo_pagamento , valor, tabela=None):
         '''
         Função que valida os atributos da classe Transaction.
         '''
@@ -67,16 +171,10 @@ class Transaction:
         # Validação do tipo de pagamento
         if not isinstance(tipo_pagamento, str):
             raise TypeError("O tipo de pagamento deve ser uma string.")
-        tipo_pagamento = tipo_pagamento.strip().lower()
-        tipos_validos = [tipo[0] for tipo in TIPOS_DE_TRANSACAO]
-        if tipo_pagamento not in tipos_validos:
-            raise ValueError(f"O tipo de pagamento '{tipo_pagamento}' é inválido. Tipos válidos: {', '.join(tipos_validos)}.")
-        
-        # Normaliza o tipo de pagamento
-        for tipo in TIPOS_DE_TRANSACAO:
-            if tipo_pagamento == tipo[0]:
-                tipo_pagamento = tipo[1]
-                break
+        # Normaliza o tipo de pagamento (consulta direta na tabela pré-calculada)
+        if normalizar_tipo(tipo_pagamento, tabela) is None:
+            tipos_validos = sorted(set((TIPOS_NORMALIZADOS if tabela is None else tabela).values()))
+            raise ValueError(f"O tipo de pagamento '{tipo_pagamento.strip().lower()}' é inválido. Tipos válidos: {', '.join(tipos_validos)}.")
         
         # Validação do valor
         if not isinstance(valor, (int, float)):
@@ -0,0 +1,207 @@
+# Importações
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+
+# Classe TransactionBatch
+class TransactionBatch:
+    '''
+    Lote de transações guardado em colunas (struct-of-arrays).
+
+    data e tipo_pagamento ficam como códigos + categorias (poucos valores distintos),
+    valor como um array float64 e os campos extras numa tabela de colunas
+    compartilhada por todas as linhas. Iterar pelo lote devolve TransactionView,
+    que se comporta como Transaction sem copiar nenhum dado.
+    '''
+
+    def __init__(self, data, tipo_pagamento, valor, extras=None):
+        '''
+        Construtor da classe TransactionBatch.
+        Os valores devem estar já validados (ver data_mapper.extract_transaction_batch).
+
+        Parâmetros:
+        data (array-like): Datas no formato 'DD/MM/AAAA'.
+        tipo_pagamento (array-like): Tipos de pagamento.
+        valor (array-like): Valores numéricos.
+        extras (dict, opcional): Dicionário coluna -> array-like com os campos extras.
+        '''
+        datas = pd.Categorical(np.asarray(data, dtype=object))
+        tipos = pd.Categorical(np.asarray(tipo_pagamento, dtype=object))
+        valores = np.asarray(valor, dtype=np.float64)
+
+        tamanho = len(valores)
+        if len(datas) != tamanho or len(tipos) != tamanho:
+            raise ValueError("As colunas data, tipo_pagamento e valor devem ter o mesmo tamanho.")
+
+        colunas_extras = {}
+        for coluna, valores_coluna in (extras or {}).items():
+            valores_coluna = np.asarray(valores_coluna)
+            if len(valores_coluna) != tamanho:
+                raise ValueError(f"A coluna extra '{coluna}' deve ter {tamanho} linhas.")
+            colunas_extras[coluna] = valores_coluna
+
+        # Atributos
+        self._data_codigos = datas.codes
+        self._data_categorias = np.asarray(datas.categories, dtype=object)
+        self._tipo_codigos = tipos.codes
+        self._tipo_categorias = np.asarray(tipos.categories, dtype=object)
+        self.valor = valores # Tipo: np.ndarray[float64]
+        self.extras = colunas_extras # Tipo: dict[str, np.ndarray]
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        '''
+        Cria um lote a partir de uma lista de objetos Transaction.
+        '''
+        colunas_extras = {}
+        for transaction in transactions:
+            for chave in transaction.extras:
+                colunas_extras.setdefault(chave, None)
+
+        extras = {
+            chave: np.array([t.extras.get(chave, "") for t in transactions], dtype=object)
+            for chave in colunas_extras
+        }
+        return cls(
+            [t.data for t in transactions],
+            [t.tipo_pagamento for t in transactions],
+            [t.valor for t in transactions],
+            extras,
+        )
+
+    @classmethod
+    def concatenar(cls, lotes):
+        '''
+        Junta vários lotes em um só, na ordem recebida.
+        Campos extras que faltam em algum lote ficam como string vazia
+        (mesma regra de Template.get_valor_mapeado para campos ausentes).
+        '''
+        lotes = list(lotes)
+        colunas_extras = {}
+        for lote in lotes:
+            for chave in lote.extras:
+                colunas_extras.setdefault(chave, None)
+
+        def coluna_extra(lote, chave):
+            if chave in lote.extras:
+                return lote.extras[chave].astype(object)
+            return np.full(len(lote), "", dtype=object)
+
+        extras = {
+            chave: np.concatenate([coluna_extra(lote, chave) for lote in lotes]) if lotes else np.array([], dtype=object)
+            for chave in colunas_extras
+        }
+        return cls(
+            np.concatenate([lote.data for lote in lotes]) if lotes else [],
+            np.concatenate([lote.tipo_pagamento for lote in lotes]) if lotes else [],
+            np.concatenate([lote.valor for lote in lotes]) if lotes else [],
+            extras,
+        )
+
+    def __len__(self):
+        return len(self.valor)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Índice fora do lote.")
+        return TransactionView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield TransactionView(self, i)
+
+    @property
+    def data(self):
+        '''Coluna de datas (np.ndarray de str).'''
+        return self._data_categorias[self._data_codigos]
+
+    @property
+    def tipo_pagamento(self):
+        '''Coluna de tipos de pagamento (np.ndarray de str).'''
+        return self._tipo_categorias[self._tipo_codigos]
+
+    def coluna(self, campo):
+        '''
+        Retorna a coluna inteira de um campo, com a mesma regra de Template.get_valor_mapeado:
+        atributo da transação, depois campo extra, senão string vazia.
+        '''
+        if campo in ("data", "tipo_pagamento", "valor"):
+            return getattr(self, campo)
+        if campo in self.extras:
+            return self.extras[campo]
+        return np.full(len(self), "", dtype=object)
+
+    def to_dataframe(self):
+        '''
+        Converte o lote em um DataFrame (uma coluna por campo).
+        '''
+        colunas = {
+            "data": self.data,
+            "tipo_pagamento": self.tipo_pagamento,
+            "valor": self.valor,
+        }
+        colunas.update(self.extras)
+        return pd.DataFrame(colunas)
+
+
+# Classe TransactionView
+class TransactionView:
+    '''
+    Visão de uma linha de TransactionBatch com a mesma interface de Transaction
+    (data, tipo_pagamento, valor, extras). Não copia os dados do lote.
+    '''
+
+    __slots__ = ("_lote", "_i")
+
+    def __init__(self, lote, i):
+        self._lote = lote
+        self._i = i
+
+    @property
+    def data(self):
+        lote = self._lote
+        return lote._data_categorias[lote._data_codigos[self._i]]
+
+    @property
+    def tipo_pagamento(self):
+        lote = self._lote
+        return lote._tipo_categorias[lote._tipo_codigos[self._i]]
+
+    @property
+    def valor(self):
+        return float(self._lote.valor[self._i])
+
+    @property
+    def extras(self):
+        return _ExtrasView(self._lote.extras, self._i)
+
+    def __repr__(self):
+        return f"TransactionView(data={self.data!r}, tipo_pagamento={self.tipo_pagamento!r}, valor={self.valor!r})"
+
+
+class _ExtrasView(Mapping):
+    '''
+    Dicionário somente leitura com os campos extras de uma linha do lote.
+    '''
+
+    __slots__ = ("_colunas", "_i")
+
+    def __init__(self, colunas, i):
+        self._colunas = colunas
+        self._i = i
+
+    def __getitem__(self, chave):
+        return self._colunas[chave][self._i]
+
+    def __contains__(self, chave):
+        return chave in self._colunas
+
+    def __iter__(self):
+        return iter(self._colunas)
+
+    def __len__(self):
+        return len(self._colunas)
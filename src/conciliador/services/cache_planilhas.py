@@ -0,0 +1,186 @@
+# Importações
+import os
+import glob
+import pickle
+import hashlib
+
+from . import file_handler
+from . import sheet_processor
+
+#----------Cache em disco das planilhas já lidas e limpas-------------#
+'''
+Guarda o resultado de leitura + limpeza (read_file/clean_sheet ou a versão em blocos)
+para que reimportar a mesma planilha (ex: depois de trocar de template) só precise
+refazer o mapeamento e a saída.
+
+- Chave: SHA-256 de VERSAO_PIPELINE + variante da leitura + hash do conteúdo do arquivo
+  (o nome/caminho do arquivo não importa; editar o arquivo muda a chave). O hash do
+  conteúdo é o de hash_arquivo: quem já o calculou passa o valor e o arquivo não é relido
+- Formato: uma sequência de registros pickle (protocolo 5) por arquivo de cache,
+  gravada em um .tmp e renomeada só no final (nunca fica um cache pela metade)
+- Limite de tamanho com descarte LRU (data de modificação, atualizada a cada acerto)
+
+Funções:
+- hash_arquivo(caminho) -> str
+- chave_cache(caminho, variante, hash_conteudo=None) -> str
+- ler_registros(chave) -> gerador ou None
+- gravar_registros(chave, registros) -> gerador (repassa os registros enquanto grava)
+- carregar_planilha_limpa(caminho, hash_conteudo=None) -> DataFrame (read_file + clean_sheet com cache)
+- podar_cache(limite_bytes) / limpar_cache()
+'''
+
+CACHE_DIR = os.path.join("data", "cache")
+
+# Incrementar sempre que file_handler/sheet_processor mudarem o resultado da limpeza:
+# as entradas de versões anteriores deixam de ser encontradas e são removidas na poda
+VERSAO_PIPELINE = 3
+
+# Tamanho máximo do diretório de cache (bytes)
+TAMANHO_MAXIMO_CACHE = 512 * 1024 * 1024
+
+EXTENSAO = ".pkl"
+_BLOCO_HASH = 1024 * 1024
+
+
+def hash_arquivo(caminho):
+    '''
+    SHA-256 do conteúdo de um arquivo (identifica o mesmo extrato importado de novo).
+    '''
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"O arquivo {caminho} não foi encontrado.")
+
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(_BLOCO_HASH), b""):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def chave_cache(caminho, variante="", hash_conteudo=None):
+    '''
+    Calcula a chave de cache de uma planilha a partir do seu conteúdo.
+    variante distingue leituras diferentes do mesmo arquivo (ex: inteira x em blocos).
+    hash_conteudo: hash_arquivo(caminho), se já calculado (o arquivo não é relido).
+    '''
+    if hash_conteudo is None:
+        hash_conteudo = hash_arquivo(caminho)
+    chave = hashlib.sha256(f"{VERSAO_PIPELINE}|{variante}|{hash_conteudo}".encode()).hexdigest()
+    return f"{chave}.v{VERSAO_PIPELINE}"
+
+
+def _caminho_cache(chave):
+    return os.path.join(CACHE_DIR, chave + EXTENSAO)
+
+
+def ler_registros(chave):
+    '''
+    Retorna um gerador com os registros gravados para a chave, ou None se não houver cache.
+    Um acerto atualiza a data de modificação do arquivo (usada pelo descarte LRU).
+    '''
+    caminho = _caminho_cache(chave)
+    try:
+        os.utime(caminho)
+    except FileNotFoundError:
+        return None
+
+    def registros():
+        with open(caminho, "rb") as arquivo:
+            while True:
+                try:
+                    registro = pickle.load(arquivo)
+                except EOFError:
+                    return
+                except Exception:
+                    # Cache ilegível (ex: gravado por outra versão do pandas): descarta
+                    arquivo.close()
+                    os.remove(caminho)
+                    raise
+                yield registro
+
+    return registros()
+
+
+def gravar_registros(chave, registros):
+    '''
+    Repassa os registros recebidos e grava cada um no cache à medida que passa.
+    O arquivo só é publicado (renomeado de .tmp) se o iterável for consumido até o fim;
+    se o consumo for interrompido (erro ou cancelamento), o .tmp é apagado.
+    '''
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    caminho = _caminho_cache(chave)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+
+    arquivo = open(temporario, "wb")
+    try:
+        for registro in registros:
+            pickle.dump(registro, arquivo, protocol=5)
+            yield registro
+        arquivo.close()
+        os.replace(temporario, caminho)
+    finally:
+        if not arquivo.closed:
+            arquivo.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    podar_cache()
+
+
+def carregar_planilha_limpa(caminho, hash_conteudo=None):
+    '''
+    Equivalente a clean_sheet(read_file(caminho)), usando o cache quando possível.
+    hash_conteudo: como em chave_cache.
+    '''
+    chave = chave_cache(caminho, "inteira", hash_conteudo)
+    registros = ler_registros(chave)
+    if registros is not None:
+        try:
+            return next(registros)
+        except Exception:
+            pass # Entrada ilegível já foi descartada: refaz a leitura
+
+    df = sheet_processor.clean_sheet(file_handler.read_file(caminho))
+    for _ in gravar_registros(chave, [df]):
+        pass
+    return df
+
+
+def podar_cache(limite_bytes=None):
+    '''
+    Remove entradas de outras versões do pipeline e, se o cache passar do limite,
+    as menos usadas recentemente até caber.
+    '''
+    if limite_bytes is None:
+        limite_bytes = TAMANHO_MAXIMO_CACHE
+
+    entradas = []
+    for caminho in glob.glob(os.path.join(CACHE_DIR, "*" + EXTENSAO)):
+        try:
+            if not caminho.endswith(f".v{VERSAO_PIPELINE}{EXTENSAO}"):
+                os.remove(caminho)
+                continue
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            continue # Removido por outro processo
+        entradas.append((estado.st_mtime, estado.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+
+def limpar_cache():
+    '''
+    Apaga todas as entradas do cache.
+    '''
+    for caminho in glob.glob(os.path.join(CACHE_DIR, "*" + EXTENSAO)):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,672 @@
+# Importações
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..models.transaction import normalizar_tipo
+from ..models.transaction_batch import TransactionBatch
+
+#----------Conciliação entre duas fontes de transações-------------#
+'''
+Casa as transações de duas fontes (ex: extrato do banco/adquirente x razão do ERP).
+
+Conciliação exata (conciliar): chave (data, tipo_pagamento normalizado, valor em centavos).
+- Cada lado vira um código inteiro por linha (hash da chave, O(n + m)), sem comparar
+  as linhas duas a duas; os pares saem por endereçamento direto nesses códigos
+- Chaves repetidas casam na ordem: a 1ª ocorrência da esquerda com a 1ª da direita,
+  a 2ª com a 2ª... O que sobrar fica sem par e o grupo é listado em "duplicados"
+
+Conciliação com tolerância (conciliar_com_tolerancia): a exata primeiro; nas linhas que
+sobraram, casa o mesmo tipo com ±dias na data e ±valor (absoluto ou percentual).
+- Os candidatos saem de buscas binárias (np.searchsorted) num array ordenado por
+  (tipo, centavos) e são filtrados pela data: O((n + m) log m + candidatos), sem laços aninhados
+- Linhas com o mesmo (tipo, centavos, dia) têm os mesmos candidatos: os candidatos são
+  gerados entre essas classes, e cada par de classes aceito casa as linhas pela ordem de
+  ocorrência, como as chaves repetidas de conciliar (muitos valores iguais não viram K² candidatos)
+- Atribuição gulosa (menor diferença de valor, depois de data), feita em rodadas
+  vetorizadas: cada rodada aceita os candidatos que são a melhor opção livre das duas classes.
+  Quando as rodadas quase não avançam (cadeias de empates), o resto é um percurso único em ordem
+
+Conciliação agrupada (conciliar_agrupado): depósitos da adquirente que pagam várias
+vendas de uma vez (ex: todo o CRÉDITO do dia num único crédito em conta).
+- As vendas são somadas por (data, tipo) com agregação vetorizada e as somas casam com
+  os depósitos como na conciliação com tolerância
+- Nos grupos que não fecharam, procura quais vendas somam cada depósito candidato
+  (meet-in-the-middle, limitado a LIMITE_VENDAS_SUBCONJUNTO vendas e ORCAMENTO_GRUPO_S por grupo);
+  as tabelas de somas do grupo servem para todos os depósitos e só mudam depois de um acerto
+
+As linhas são sempre identificadas pela posição no lote de origem (0 a n-1), para que
+o relatório busque as colunas que precisar sem que o resultado copie os dados.
+'''
+
+
+# Valores da coluna "criterio" dos pares
+CRITERIO_EXATA = "exata"
+CRITERIO_TOLERANCIA = "tolerancia"
+# ... e da composição dos depósitos
+CRITERIO_AGRUPADA = "agrupada"
+CRITERIO_SUBCONJUNTO = "subconjunto"
+
+# Busca de subconjunto: vendas por grupo (2^(n/2) somas de cada metade) e tempo por grupo
+LIMITE_VENDAS_SUBCONJUNTO = 36
+ORCAMENTO_GRUPO_S = 0.05
+
+# Pares candidatos examinados por vez na conciliação com tolerância (limita a memória)
+CANDIDATOS_POR_BLOCO = 4_000_000
+
+# Atribuição gulosa: depois de RODADAS_MINIMAS rodadas vetorizadas, uma rodada que aceita
+# menos que FRACAO_MINIMA_RODADA dos candidatos restantes passa para um percurso único
+# (cadeias de empates aceitam um candidato por rodada)
+RODADAS_MINIMAS = 4
+FRACAO_MINIMA_RODADA = 0.01
+
+# Data inválida (não entra na conciliação com tolerância)
+SEM_DATA = np.iinfo(np.int64).min
+
+# Deslocamento dos centavos na chave ordenável (tipo, centavos) da tolerância:
+# cabem valores de até ±5 bilhões de reais sem invadir o tipo vizinho
+_DESLOCAMENTO_CENTAVOS = 2 ** 39
+
+
+def como_lote(transactions):
+    '''
+    Aceita um TransactionBatch ou uma lista de Transaction e devolve um lote.
+    '''
+    if isinstance(transactions, TransactionBatch):
+        return transactions
+    if isinstance(transactions, (list, tuple)):
+        return TransactionBatch.from_transactions(list(transactions))
+    raise ValueError("As transações devem ser um TransactionBatch ou uma lista de Transaction.")
+
+
+def centavos(valores):
+    '''
+    Valores em reais -> centavos (int64), arredondando (0.1 + 0.2 casa com 0.3).
+    '''
+    return np.rint(np.asarray(valores, dtype=np.float64) * 100).astype(np.int64)
+
+
+def tipos_canonicos(categorias):
+    '''
+    Tipo canônico de cada categoria de tipo_pagamento ("pix" e "PIX" viram "PIX");
+    tipos desconhecidos ficam como estão.
+    '''
+    return np.array([normalizar_tipo(tipo) or tipo for tipo in categorias], dtype=object)
+
+
+def _codigos_compartilhados(codigos_esquerda, categorias_esquerda, codigos_direita, categorias_direita):
+    '''
+    Traduz os códigos de categoria dos dois lotes para um mesmo dicionário de valores.
+    Categorias repetidas (ex: "crédito" e "CRÉDITO" já canônicos) viram um só código.
+    '''
+    uniao = pd.Index(categorias_esquerda).unique().union(pd.Index(categorias_direita).unique())
+    return (uniao.get_indexer(categorias_esquerda)[codigos_esquerda],
+            uniao.get_indexer(categorias_direita)[codigos_direita],
+            uniao)
+
+
+def tipos_compartilhados(esquerda, direita):
+    '''
+    Código do tipo canônico de cada linha dos dois lados (mesmo dicionário).
+    Retorna (codigos_esquerda, codigos_direita, tipos) com tipos[codigo] = tipo canônico.
+    '''
+    return _codigos_compartilhados(esquerda._tipo_codigos, tipos_canonicos(esquerda._tipo_categorias),
+                                   direita._tipo_codigos, tipos_canonicos(direita._tipo_categorias))
+
+
+def _chaves(esquerda, direita):
+    '''
+    Código denso (0 a k-1) da chave (data, tipo_pagamento, centavos) de cada linha dos dois lados.
+    Retorna (chaves_esquerda, chaves_direita, k).
+    '''
+    data_e, data_d, datas = _codigos_compartilhados(esquerda._data_codigos, esquerda._data_categorias,
+                                                    direita._data_codigos, direita._data_categorias)
+    tipo_e, tipo_d, tipos = tipos_compartilhados(esquerda, direita)
+    # Os valores viram códigos densos antes de combinar os três campos num int64 (sem estouro)
+    valores, _ = pd.factorize(np.concatenate([centavos(esquerda.valor), centavos(direita.valor)]))
+    n_valores = max(int(valores.max()) + 1, 1) if len(valores) else 1
+
+    data_tipo = np.concatenate([data_e, data_d]).astype(np.int64) * len(tipos) + np.concatenate([tipo_e, tipo_d])
+    chaves, unicas = pd.factorize(data_tipo * n_valores + valores)
+    return chaves[:len(esquerda)], chaves[len(esquerda):], len(unicas)
+
+
+def _ordem_na_chave(chaves):
+    '''
+    Ocorrência (0, 1, 2...) de cada linha dentro da sua chave, na ordem original.
+    '''
+    return pd.Series(chaves).groupby(chaves, sort=False).cumcount().to_numpy()
+
+
+def conciliar(esquerda, direita):
+    '''
+    Conciliação exata por (data, tipo_pagamento, valor) em O(n + m).
+
+    Parâmetros:
+    - esquerda / direita: TransactionBatch ou list[Transaction] (ex: extrato x ERP)
+
+    Retorna:
+    - dict: {
+        "pares": DataFrame (linha_esquerda, linha_direita, criterio), uma linha por par casado,
+        "sem_par_esquerda" / "sem_par_direita": np.ndarray com as linhas que ficaram sem par,
+        "duplicados": DataFrame (data, tipo_pagamento, valor, qtd_esquerda, qtd_direita) com as
+                      chaves que aparecem mais de uma vez em algum dos lados
+      }
+    '''
+    esquerda, direita = como_lote(esquerda), como_lote(direita)
+    chaves_e, chaves_d, n_chaves = _chaves(esquerda, direita)
+
+    qtd_e = np.bincount(chaves_e, minlength=n_chaves)
+    qtd_d = np.bincount(chaves_d, minlength=n_chaves)
+    ordem_e = _ordem_na_chave(chaves_e)
+    ordem_d = _ordem_na_chave(chaves_d)
+
+    # A k-ésima ocorrência de uma chave na esquerda casa com a k-ésima na direita.
+    # As linhas da direita são agrupadas por chave (counting sort, O(m)) e a do par
+    # sai por endereçamento direto: início do grupo + ocorrência
+    inicio_d = np.cumsum(qtd_d) - qtd_d
+    direita_por_chave = np.empty(len(direita), dtype=np.int64)
+    direita_por_chave[inicio_d[chaves_d] + ordem_d] = np.arange(len(direita))
+
+    casada_e = ordem_e < qtd_d[chaves_e]
+    pares = _pares(np.flatnonzero(casada_e), direita_por_chave[inicio_d[chaves_e[casada_e]] + ordem_e[casada_e]],
+                   CRITERIO_EXATA)
+
+    repetidas = np.flatnonzero((qtd_e > 1) | (qtd_d > 1))
+
+    # Uma linha representante de cada chave repetida, do lado em que ela aparece
+    primeira_e = np.full(n_chaves, -1, dtype=np.int64)
+    primeira_e[chaves_e[::-1]] = np.arange(len(esquerda))[::-1]
+    primeira_d = np.full(n_chaves, -1, dtype=np.int64)
+    primeira_d[chaves_d[::-1]] = np.arange(len(direita))[::-1]
+    do_lado_esquerdo = primeira_e[repetidas] >= 0
+    linhas_e = primeira_e[repetidas][do_lado_esquerdo]
+    linhas_d = primeira_d[repetidas][~do_lado_esquerdo]
+    duplicados = pd.DataFrame({
+        "data": np.concatenate([esquerda.data[linhas_e], direita.data[linhas_d]]),
+        "tipo_pagamento": np.concatenate([esquerda.tipo_pagamento[linhas_e], direita.tipo_pagamento[linhas_d]]),
+        "valor": np.concatenate([esquerda.valor[linhas_e], direita.valor[linhas_d]]),
+        "qtd_esquerda": np.concatenate([qtd_e[repetidas][do_lado_esquerdo], qtd_e[repetidas][~do_lado_esquerdo]]),
+        "qtd_direita": np.concatenate([qtd_d[repetidas][do_lado_esquerdo], qtd_d[repetidas][~do_lado_esquerdo]]),
+    })
+
+    return {
+        "pares": pares,
+        "sem_par_esquerda": np.flatnonzero(~casada_e),
+        "sem_par_direita": np.flatnonzero(ordem_d >= qtd_e[chaves_d]),
+        "duplicados": duplicados,
+    }
+
+
+#----------Conciliação com tolerância-------------#
+
+def _pares(linhas_esquerda, linhas_direita, criterio):
+    return pd.DataFrame({
+        "linha_esquerda": np.asarray(linhas_esquerda, dtype=np.int64),
+        "linha_direita": np.asarray(linhas_direita, dtype=np.int64),
+        "criterio": np.full(len(linhas_esquerda), criterio, dtype=object),
+    })
+
+
+def _sem_par(livres, casadas, n_linhas):
+    '''
+    Linhas de livres (em ordem) que não estão em casadas, com uma máscara de n_linhas.
+    '''
+    casada = np.zeros(n_linhas, dtype=bool)
+    casada[casadas] = True
+    return livres[~casada[livres]]
+
+
+def numeros_de_dia(lote):
+    '''
+    Data de cada linha como número de dias (int64), SEM_DATA se não for uma data 'DD/MM/AAAA'.
+    Só as categorias (datas distintas) são convertidas.
+    '''
+    datas = pd.to_datetime(pd.Index(lote._data_categorias, dtype=object), format="%d/%m/%Y", errors="coerce")
+    numeros = np.where(datas.isna(), SEM_DATA, datas.to_numpy(dtype="datetime64[D]").astype(np.int64))
+    return numeros[lote._data_codigos] if len(numeros) else np.full(len(lote), SEM_DATA, dtype=np.int64)
+
+
+def _primeiras_ocorrencias(linhas, n_linhas):
+    '''
+    Máscara das posições em que cada valor de linhas aparece pela primeira vez (O(len + n_linhas)).
+    '''
+    primeira = np.empty(n_linhas, dtype=np.int64)
+    posicoes = np.arange(len(linhas))
+    primeira[linhas[::-1]] = posicoes[::-1] # A última escrita (a primeira ocorrência) vence
+    return primeira[linhas] == posicoes
+
+
+def atribuir_gulosa(linhas_esquerda, linhas_direita, prioridade, n_esquerda, n_direita):
+    '''
+    Escolhe pares um para um entre candidatos (linha_esquerda, linha_direita), em ordem de prioridade
+    (menor primeiro): o mesmo resultado de percorrer os candidatos ordenados e aceitar
+    cada um cujas duas linhas ainda estejam livres.
+
+    Retorna (linhas_esquerda, linhas_direita) dos pares escolhidos.
+    '''
+    esquerda, direita, _ = _atribuir_com_capacidade(
+        linhas_esquerda, linhas_direita, prioridade,
+        np.ones(n_esquerda, dtype=np.int64), np.ones(n_direita, dtype=np.int64))
+    return esquerda, direita
+
+
+def _atribuir_com_capacidade(classes_esquerda, classes_direita, prioridade, capacidade_esquerda, capacidade_direita):
+    '''
+    Atribuição gulosa entre classes de linhas (capacidade = linhas livres de cada classe):
+    percorre os candidatos (classe_esquerda, classe_direita) em ordem de prioridade e cada um
+    casa min(capacidade que sobrou nas duas classes) linhas.
+
+    Em vez de um laço por candidato, trabalha em rodadas: um candidato que é o primeiro
+    com capacidade nas suas duas classes recebe a mesma quantidade que no percurso em ordem,
+    então todos os desse tipo são aceitos juntos; depois saem os candidatos de classes esgotadas.
+    Uma cadeia de empates (cada candidato divide uma classe com o seguinte) só libera um
+    candidato por rodada: depois de RODADAS_MINIMAS rodadas, se uma rodada aceita menos que
+    FRACAO_MINIMA_RODADA dos restantes, os restantes são percorridos uma vez em ordem, com a
+    capacidade que sobrou (o mesmo resultado, em O(candidatos)).
+    Com capacidades 1 é a atribuição um para um de atribuir_gulosa.
+
+    Retorna (classes_esquerda, classes_direita, quantidades) dos candidatos aceitos, na ordem do percurso.
+    '''
+    ordem = np.lexsort((classes_direita, classes_esquerda) + tuple(reversed(prioridade)))
+    esquerda = np.asarray(classes_esquerda, dtype=np.int64)[ordem]
+    direita = np.asarray(classes_direita, dtype=np.int64)[ordem]
+    posicoes = np.arange(len(ordem))
+
+    restante_e = np.array(capacidade_esquerda, dtype=np.int64)
+    restante_d = np.array(capacidade_direita, dtype=np.int64)
+    aceitos_pos, aceitos_q = [], []
+    rodada = 0
+    while len(esquerda):
+        aceitos = _primeiras_ocorrencias(esquerda, len(restante_e)) & _primeiras_ocorrencias(direita, len(restante_d))
+        quantidades = np.minimum(restante_e[esquerda[aceitos]], restante_d[direita[aceitos]])
+        # Cada classe aparece no máximo uma vez entre os aceitos da rodada
+        restante_e[esquerda[aceitos]] -= quantidades
+        restante_d[direita[aceitos]] -= quantidades
+        aceitos_pos.append(posicoes[aceitos])
+        aceitos_q.append(quantidades)
+        restantes = (restante_e[esquerda] > 0) & (restante_d[direita] > 0)
+        rodada += 1
+        lentos = rodada >= RODADAS_MINIMAS and len(quantidades) < FRACAO_MINIMA_RODADA * len(esquerda)
+        esquerda, direita, posicoes = esquerda[restantes], direita[restantes], posicoes[restantes]
+        if lentos and len(esquerda):
+            # Os restantes ainda estão na ordem do percurso e nenhum aceito vem depois deles
+            # nas mesmas classes: percorrê-los em ordem completa o percurso
+            sobras_e, sobras_d = restante_e.tolist(), restante_d.tolist()
+            percorridos_pos, percorridos_q = [], []
+            for classe_e, classe_d, posicao in zip(esquerda.tolist(), direita.tolist(), posicoes.tolist()):
+                quantidade = min(sobras_e[classe_e], sobras_d[classe_d])
+                if quantidade > 0:
+                    sobras_e[classe_e] -= quantidade
+                    sobras_d[classe_d] -= quantidade
+                    percorridos_pos.append(posicao)
+                    percorridos_q.append(quantidade)
+            aceitos_pos.append(np.array(percorridos_pos, dtype=np.int64))
+            aceitos_q.append(np.array(percorridos_q, dtype=np.int64))
+            break
+
+    if not aceitos_pos:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio, vazio
+    posicoes = np.concatenate(aceitos_pos)
+    quantidades = np.concatenate(aceitos_q)
+    percurso = np.argsort(posicoes)
+    ordenados = ordem[posicoes[percurso]]
+    return (np.asarray(classes_esquerda, dtype=np.int64)[ordenados],
+            np.asarray(classes_direita, dtype=np.int64)[ordenados],
+            quantidades[percurso])
+
+
+def _classes_de_linhas(tipos, centavos_linhas, dias, livres):
+    '''
+    Agrupa as linhas livres por (tipo, centavos, dia), a chave que decide os candidatos da
+    conciliação com tolerância e as suas prioridades.
+    Retorna (representantes, linhas, inicio, contagem): a primeira linha de cada classe,
+    as linhas livres agrupadas por classe (em ordem dentro da classe), e o início e o
+    tamanho de cada classe nesse array.
+    '''
+    classe = pd.DataFrame({"tipo": tipos[livres], "centavos": centavos_linhas[livres], "dia": dias[livres]}) \
+        .groupby(["tipo", "centavos", "dia"], sort=False).ngroup().to_numpy()
+    contagem = np.bincount(classe, minlength=int(classe.max()) + 1 if len(classe) else 0)
+    linhas = livres[np.argsort(classe, kind="stable")]
+    inicio = np.cumsum(contagem) - contagem
+    return linhas[inicio], linhas, inicio, contagem
+
+
+def _deslocamento_na_classe(classes, quantidades):
+    '''
+    Quantas linhas de cada classe os candidatos anteriores (na ordem recebida) já usaram.
+    '''
+    ordem = np.argsort(classes, kind="stable")
+    quantidades_ordem = quantidades[ordem]
+    anteriores = np.cumsum(quantidades_ordem) - quantidades_ordem
+    primeira = np.ones(len(ordem), dtype=bool)
+    primeira[1:] = classes[ordem][1:] != classes[ordem][:-1]
+    deslocamento = np.empty(len(ordem), dtype=np.int64)
+    deslocamento[ordem] = anteriores - np.maximum.accumulate(np.where(primeira, anteriores, 0))
+    return deslocamento
+
+
+def _linhas_dos_pares(classes, quantidades, linhas, inicio):
+    '''
+    Linhas de cada candidato aceito: as próximas `quantidade` linhas livres da sua classe.
+    '''
+    candidato = np.repeat(np.arange(len(classes)), quantidades)
+    dentro = np.arange(len(candidato)) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    primeira = inicio[classes] + _deslocamento_na_classe(classes, quantidades)
+    return linhas[primeira[candidato] + dentro]
+
+
+def _candidatos(esquerda, direita, livres_e, livres_d, dias_tolerancia, valor, percentual):
+    '''
+    Pares candidatos entre as linhas livres: mesmo tipo, valor dentro da tolerância e
+    data a no máximo dias_tolerancia dias. Retorna (linhas_e, linhas_d, diferenca_centavos, diferenca_dias).
+    '''
+    tipo_e, tipo_d, _ = tipos_compartilhados(esquerda, direita)
+    dia_e, dia_d = numeros_de_dia(esquerda), numeros_de_dia(direita)
+    livres_e = livres_e[dia_e[livres_e] != SEM_DATA]
+    livres_d = livres_d[dia_d[livres_d] != SEM_DATA]
+
+    centavos_e = centavos(esquerda.valor)
+    centavos_d = centavos(direita.valor)
+    # Chave ordenável (tipo, centavos): a janela de valor nunca atravessa para outro tipo
+    chave_d = tipo_d[livres_d].astype(np.int64) * (2 * _DESLOCAMENTO_CENTAVOS) + centavos_d[livres_d] + _DESLOCAMENTO_CENTAVOS
+    ordem_d = np.argsort(chave_d, kind="stable")
+    chave_d = chave_d[ordem_d]
+    livres_d = livres_d[ordem_d]
+
+    chave_e = tipo_e[livres_e].astype(np.int64) * (2 * _DESLOCAMENTO_CENTAVOS) + centavos_e[livres_e] + _DESLOCAMENTO_CENTAVOS
+    tolerancia = np.maximum(round(valor * 100), np.floor(np.abs(centavos_e[livres_e]) * percentual / 100)).astype(np.int64)
+    inicio = np.searchsorted(chave_d, chave_e - tolerancia, side="left")
+    quantidade = np.searchsorted(chave_d, chave_e + tolerancia, side="right") - inicio
+    acumulado = np.cumsum(quantidade)
+
+    resultado = [], [], [], []
+    primeira = 0
+    while primeira < len(livres_e):
+        # Bloco de linhas da esquerda com até CANDIDATOS_POR_BLOCO candidatos (pelo menos uma linha)
+        antes = acumulado[primeira - 1] if primeira else 0
+        ultima = max(int(np.searchsorted(acumulado, antes + CANDIDATOS_POR_BLOCO, side="right")), primeira + 1)
+        qtd = quantidade[primeira:ultima]
+        posicao_e = np.repeat(np.arange(primeira, ultima), qtd)
+        deslocamento = np.arange(len(posicao_e)) - np.repeat(np.cumsum(qtd) - qtd, qtd)
+        posicao_d = inicio[posicao_e] + deslocamento
+
+        linhas_e, linhas_d = livres_e[posicao_e], livres_d[posicao_d]
+        diferenca_dias = np.abs(dia_e[linhas_e] - dia_d[linhas_d])
+        dentro = diferenca_dias <= dias_tolerancia
+        resultado[0].append(linhas_e[dentro])
+        resultado[1].append(linhas_d[dentro])
+        resultado[2].append(np.abs(centavos_e[linhas_e[dentro]] - centavos_d[linhas_d[dentro]]))
+        resultado[3].append(diferenca_dias[dentro])
+        primeira = ultima
+
+    if not resultado[0]:
+        return tuple(np.array([], dtype=np.int64) for _ in range(4))
+    return tuple(np.concatenate(partes) for partes in resultado)
+
+
+def conciliar_com_tolerancia(esquerda, direita, dias_tolerancia=2, valor=0.0, percentual=0.0):
+    '''
+    Conciliação exata seguida de uma rodada com tolerância nas linhas que sobraram
+    (liquidações em D+1/D+2, diferenças de centavos em tarifas).
+
+    Parâmetros:
+    - esquerda / direita: TransactionBatch ou list[Transaction]
+    - dias_tolerancia: int - Diferença máxima de data, em dias, para qualquer lado
+    - valor: float - Diferença máxima de valor em reais
+    - percentual: float - Diferença máxima de valor em % do valor da esquerda
+      (vale a maior entre valor e percentual)
+
+    Retorna:
+    - dict no formato de conciliar; os pares da segunda rodada têm criterio "tolerancia"
+    '''
+    if dias_tolerancia < 0 or valor < 0 or percentual < 0:
+        raise ValueError("As tolerâncias não podem ser negativas.")
+
+    esquerda, direita = como_lote(esquerda), como_lote(direita)
+    exata = conciliar(esquerda, direita)
+
+    # Candidatos entre classes (tipo, centavos, dia), representadas pela primeira linha livre
+    tipo_e, tipo_d, _ = tipos_compartilhados(esquerda, direita)
+    representantes_e, linhas_e, inicio_e, contagem_e = _classes_de_linhas(
+        tipo_e, centavos(esquerda.valor), numeros_de_dia(esquerda), exata["sem_par_esquerda"])
+    representantes_d, linhas_d, inicio_d, contagem_d = _classes_de_linhas(
+        tipo_d, centavos(direita.valor), numeros_de_dia(direita), exata["sem_par_direita"])
+    classe_e = np.empty(len(esquerda), dtype=np.int64)
+    classe_e[representantes_e] = np.arange(len(representantes_e))
+    classe_d = np.empty(len(direita), dtype=np.int64)
+    classe_d[representantes_d] = np.arange(len(representantes_d))
+
+    candidatos_e, candidatos_d, diferenca_valor, diferenca_dias = _candidatos(
+        esquerda, direita, representantes_e, representantes_d, dias_tolerancia, valor, percentual)
+    aceitas_e, aceitas_d, quantidades = _atribuir_com_capacidade(
+        classe_e[candidatos_e], classe_d[candidatos_d], (diferenca_valor, diferenca_dias), contagem_e, contagem_d)
+    escolhidas_e = _linhas_dos_pares(aceitas_e, quantidades, linhas_e, inicio_e)
+    escolhidas_d = _linhas_dos_pares(aceitas_d, quantidades, linhas_d, inicio_d)
+
+    pares = pd.concat([exata["pares"], _pares(escolhidas_e, escolhidas_d, CRITERIO_TOLERANCIA)], ignore_index=True)
+    return {
+        "pares": pares.sort_values("linha_esquerda", ignore_index=True),
+        "sem_par_esquerda": _sem_par(exata["sem_par_esquerda"], escolhidas_e, len(esquerda)),
+        "sem_par_direita": _sem_par(exata["sem_par_direita"], escolhidas_d, len(direita)),
+        "duplicados": exata["duplicados"],
+    }
+
+
+#----------Conciliação agrupada (um depósito para várias vendas)-------------#
+
+def _somas_dos_subconjuntos(valores):
+    '''
+    Soma de cada subconjunto de valores: a posição i tem a soma dos itens cujos bits estão em i.
+    '''
+    somas = np.zeros(1, dtype=np.int64)
+    for valor in valores:
+        somas = np.concatenate([somas, somas + valor])
+    return somas
+
+
+def tabelas_de_somas(valores):
+    '''
+    Tabelas do meet-in-the-middle de subconjunto_com_soma para valores (int, centavos): as somas
+    de todos os subconjuntos de cada metade, também ordenadas. Só dependem dos valores, então
+    buscas de alvos diferentes nas mesmas vendas reaproveitam as tabelas.
+    A primeira metade tem um item a menos: as buscas percorrem as somas dela, e as da segunda
+    só são ordenadas uma vez.
+    '''
+    valores = np.asarray(valores, dtype=np.int64)
+    metade = max(len(valores) - 1, 0) // 2
+    somas_a = _somas_dos_subconjuntos(valores[:metade])
+    ordem_a = np.argsort(somas_a)
+    somas_b = _somas_dos_subconjuntos(valores[metade:])
+    return {
+        "n": len(valores),
+        "metade": metade,
+        "somas_a": somas_a,
+        "ordem_a": ordem_a,
+        "ordenadas_a": somas_a[ordem_a],
+        "vazio_a": int(np.flatnonzero(ordem_a == 0)[0]),
+        "somas_b": somas_b,
+        "ordenadas_b": np.sort(somas_b),
+    }
+
+
+def subconjunto_com_soma(valores, alvo, tolerancia=0, tabelas=None):
+    '''
+    Procura um subconjunto não vazio de valores (int, centavos) cuja soma fique a no máximo
+    tolerancia de alvo. Meet-in-the-middle: as somas de cada metade são enumeradas
+    (cerca de 2^(n/2) cada) e, para cada soma da primeira, a segunda é buscada em ordem (searchsorted).
+    tabelas: tabelas_de_somas(valores), se já calculadas (várias buscas nos mesmos valores).
+
+    Retorna as posições (em valores) do subconjunto encontrado, ou None.
+    '''
+    if tabelas is None:
+        tabelas = tabelas_de_somas(valores)
+    ordenadas_a, ordenadas_b = tabelas["ordenadas_a"], tabelas["ordenadas_b"]
+
+    # As chaves vão em ordem crescente (alvo - a decresce com a): o searchsorted fica bem mais rápido
+    inicio = np.searchsorted(ordenadas_b, (alvo - tolerancia) - ordenadas_a[::-1], side="left")[::-1]
+    dentro = inicio < len(ordenadas_b)
+    dentro[dentro] = ordenadas_b[inicio[dentro]] <= alvo + tolerancia - ordenadas_a[dentro]
+    # O subconjunto vazio (0 + 0) não conta: com a primeira metade vazia, a soma 0 da segunda
+    # só vale se houver outra máscara da segunda dentro da tolerância
+    vazio = tabelas["vazio_a"]
+    if dentro[vazio] and ordenadas_b[inicio[vazio]] == 0:
+        seguinte = inicio[vazio] + 1
+        dentro[vazio] = seguinte < len(ordenadas_b) and ordenadas_b[seguinte] <= alvo + tolerancia
+    if not dentro.any():
+        return None
+
+    # A combinação de menor máscara na primeira metade e, com ela, a menor soma da segunda
+    mascara_a = int(tabelas["ordem_a"][dentro].min())
+    posicao_b = np.searchsorted(ordenadas_b, alvo - tolerancia - tabelas["somas_a"][mascara_a], side="left")
+    mascaras_b = np.flatnonzero(tabelas["somas_b"] == ordenadas_b[posicao_b])
+    if mascara_a == 0 and mascaras_b[0] == 0:
+        mascaras_b = mascaras_b[1:] if len(mascaras_b) > 1 else \
+            np.flatnonzero(tabelas["somas_b"] == ordenadas_b[posicao_b + 1])
+    mascara_b = int(mascaras_b[0])
+    metade = tabelas["metade"]
+    posicoes = [i for i in range(metade) if mascara_a >> i & 1]
+    posicoes += [metade + i for i in range(tabelas["n"] - metade) if mascara_b >> i & 1]
+    return np.array(posicoes, dtype=np.int64)
+
+
+def _agrupar_vendas(vendas):
+    '''
+    Grupo (data, tipo canônico) de cada venda e um lote com a soma de cada grupo.
+    Retorna (grupo_da_venda, lote_de_somas).
+    '''
+    tipos = tipos_canonicos(vendas._tipo_categorias)
+    tipo_canonico, tipos_unicos = pd.factorize(tipos)
+    chave = vendas._data_codigos.astype(np.int64) * max(len(tipos_unicos), 1) + tipo_canonico[vendas._tipo_codigos]
+    grupo, chaves = pd.factorize(chave)
+
+    somas = np.rint(np.bincount(grupo, weights=centavos(vendas.valor), minlength=len(chaves))).astype(np.int64)
+    primeira = np.full(len(chaves), -1, dtype=np.int64)
+    primeira[grupo[::-1]] = np.arange(len(vendas))[::-1]
+    lote = TransactionBatch(vendas.data[primeira], tipos[vendas._tipo_codigos[primeira]], somas / 100)
+    return grupo, lote
+
+
+def conciliar_agrupado(vendas, depositos, dias_tolerancia=0, valor=0.0,
+                       limite_vendas=LIMITE_VENDAS_SUBCONJUNTO, orcamento_grupo_s=ORCAMENTO_GRUPO_S):
+    '''
+    Conciliação de depósitos que pagam várias vendas do mesmo tipo e dia.
+
+    1. Soma as vendas por (data, tipo) e casa cada soma com um depósito
+       (conciliar_com_tolerancia: ±dias_tolerancia dias e ±valor reais)
+    2. Nos grupos que sobraram, procura para cada depósito livre do mesmo tipo e dentro da
+       janela de datas um subconjunto de vendas com a mesma soma (subconjunto_com_soma),
+       só em grupos de até limite_vendas vendas e por até orcamento_grupo_s segundos por grupo
+
+    Parâmetros:
+    - vendas / depositos: TransactionBatch ou list[Transaction]
+
+    Retorna:
+    - dict: {
+        "composicao": DataFrame (linha_deposito, linha_venda, criterio) com as vendas que compõem
+                      cada depósito; criterio "agrupada" (o grupo inteiro) ou "subconjunto",
+        "sem_par_vendas" / "sem_par_depositos": np.ndarray com as linhas que sobraram,
+        "pendentes": DataFrame (data, tipo_pagamento, qtd_vendas, total, motivo) dos grupos com
+                     vendas sem depósito; motivo "sem_combinacao", "muitas_vendas" ou "tempo"
+      }
+    '''
+    if dias_tolerancia < 0 or valor < 0:
+        raise ValueError("As tolerâncias não podem ser negativas.")
+
+    vendas, depositos = como_lote(vendas), como_lote(depositos)
+    grupo, somas = _agrupar_vendas(vendas)
+    n_grupos = len(somas)
+
+    # 1. Grupo inteiro = um depósito
+    casamento = conciliar_com_tolerancia(somas, depositos, dias_tolerancia, valor)
+    deposito_do_grupo = np.full(n_grupos, -1, dtype=np.int64)
+    deposito_do_grupo[casamento["pares"]["linha_esquerda"].to_numpy()] = casamento["pares"]["linha_direita"].to_numpy()
+    deposito_da_venda = deposito_do_grupo[grupo]
+    agrupadas = np.flatnonzero(deposito_da_venda >= 0)
+    composicao = [_composicao(deposito_da_venda[agrupadas], agrupadas, CRITERIO_AGRUPADA)]
+
+    # 2. Subconjuntos nos grupos que sobraram
+    vendas_por_grupo = np.argsort(grupo, kind="stable")
+    limites = np.concatenate([[0], np.cumsum(np.bincount(grupo, minlength=n_grupos))])
+    centavos_vendas = centavos(vendas.valor)
+    centavos_depositos = centavos(depositos.valor)
+    tolerancia = round(valor * 100)
+
+    deposito_livre = np.zeros(len(depositos), dtype=bool)
+    deposito_livre[casamento["sem_par_direita"]] = True
+
+    # Depósitos livres ordenados por (tipo, dia): os candidatos de um grupo são uma fatia contínua
+    tipo_soma, tipo_deposito, _ = tipos_compartilhados(somas, depositos)
+    chave_soma = _chave_tipo_dia(tipo_soma, numeros_de_dia(somas))
+    chave_deposito = _chave_tipo_dia(tipo_deposito, numeros_de_dia(depositos))
+    livres = casamento["sem_par_direita"]
+    livres = livres[chave_deposito[livres] != SEM_DATA]
+    livres = livres[np.argsort(chave_deposito[livres], kind="stable")]
+    chaves_livres = chave_deposito[livres]
+
+    pendentes = []
+    for g in casamento["sem_par_esquerda"]:
+        linhas = vendas_por_grupo[limites[g]:limites[g + 1]]
+        candidatos = livres[:0]
+        if chave_soma[g] != SEM_DATA:
+            inicio = np.searchsorted(chaves_livres, chave_soma[g] - dias_tolerancia, side="left")
+            fim = np.searchsorted(chaves_livres, chave_soma[g] + dias_tolerancia, side="right")
+            candidatos = livres[inicio:fim]
+            candidatos = candidatos[deposito_livre[candidatos]]
+        motivo = "sem_combinacao"
+        if len(linhas) > limite_vendas:
+            motivo = "muitas_vendas"
+            candidatos = candidatos[:0]
+
+        prazo = time.perf_counter() + orcamento_grupo_s
+        # As tabelas de somas das vendas do grupo servem para todos os depósitos candidatos;
+        # só são refeitas depois que um depósito leva algumas vendas
+        tabelas = None
+        # Depósitos maiores primeiro: consomem mais vendas e deixam menos combinações para os outros
+        for deposito in candidatos[np.argsort(-centavos_depositos[candidatos], kind="stable")]:
+            if not len(linhas):
+                break
+            if time.perf_counter() > prazo:
+                motivo = "tempo"
+                break
+            if tabelas is None:
+                tabelas = tabelas_de_somas(centavos_vendas[linhas])
+            escolhidas = subconjunto_com_soma(centavos_vendas[linhas], centavos_depositos[deposito], tolerancia, tabelas)
+            if escolhidas is None:
+                continue
+            composicao.append(_composicao(np.full(len(escolhidas), deposito), linhas[escolhidas], CRITERIO_SUBCONJUNTO))
+            deposito_livre[deposito] = False
+            linhas = np.delete(linhas, escolhidas)
+            tabelas = None
+
+        if len(linhas):
+            pendentes.append((somas.data[g], somas.tipo_pagamento[g], len(linhas),
+                              centavos_vendas[linhas].sum() / 100, motivo))
+
+    composicao = pd.concat(composicao, ignore_index=True).sort_values(["linha_deposito", "linha_venda"], ignore_index=True)
+    venda_usada = np.zeros(len(vendas), dtype=bool)
+    venda_usada[composicao["linha_venda"].to_numpy()] = True
+    return {
+        "composicao": composicao,
+        "sem_par_vendas": np.flatnonzero(~venda_usada),
+        "sem_par_depositos": np.flatnonzero(deposito_livre),
+        "pendentes": pd.DataFrame(pendentes, columns=["data", "tipo_pagamento", "qtd_vendas", "total", "motivo"]),
+    }
+
+
+def _chave_tipo_dia(tipos, dias):
+    '''
+    Chave ordenável (tipo, dia); SEM_DATA onde a data é inválida.
+    '''
+    chave = tipos.astype(np.int64) * 2 ** 32 + (dias + 2 ** 31)
+    return np.where(dias == SEM_DATA, SEM_DATA, chave)
+
+
+def _composicao(linhas_deposito, linhas_venda, criterio):
+    return pd.DataFrame({
+        "linha_deposito": np.asarray(linhas_deposito, dtype=np.int64),
+        "linha_venda": np.asarray(linhas_venda, dtype=np.int64),
+        "criterio": np.full(len(linhas_venda), criterio, dtype=object),
+    })
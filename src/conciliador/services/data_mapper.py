@@ -1,5 +1,11 @@
 # Importações 
-from ..models.transaction import Transaction
+import re
+import itertools
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from ..models.transaction import Transaction, normalize_tipos
+from ..models.transaction_batch import TransactionBatch
 
 # Lista de Sinônimos
 data_keywords = ["data", "dt", "date", "data da transação", "data lançamento", "data_movimento", "data_transacao"]
@@ -15,54 +21,202 @@ valor_keywords = ["valor", "valor da transação", "valor_transacao", "quantia",
 
     ###Função de identificação de colunas
 
+# Ordem de prioridade quando uma mesma coluna pontua igual para mais de um campo
+CAMPOS_OBRIGATORIOS = ("data", "tipo", "valor")
+
+
+@lru_cache(maxsize=8)
+def _compilar_sinonimos(sinonimos):
+    '''
+    Monta uma única regex com todos os sinônimos (os mais longos primeiro, para que
+    "data da transação" não seja lido como "data" + "transação") e o dicionário
+    sinônimo -> (campo, prioridade), onde prioridade é a posição do sinônimo na lista
+    do campo (0 = o mais representativo). sinonimos é uma tupla de (campo, tupla de palavras).
+    '''
+    campo_do_sinonimo = {}
+    for campo, palavras in sinonimos:
+        for prioridade, palavra in enumerate(palavras):
+            campo_do_sinonimo.setdefault(palavra.strip().lower(), (campo, prioridade))
+    alternativas = sorted(campo_do_sinonimo, key=len, reverse=True)
+    return re.compile("|".join(re.escape(palavra) for palavra in alternativas)), campo_do_sinonimo
+
+
+def _confianca(coluna, inicio, fim):
+    '''
+    Confiança (0 a 1) de um sinônimo encontrado em coluna[inicio:fim]:
+    - nome igual ao sinônimo: 1.0
+    - sinônimo como palavra inteira: 0.5 a 1.0, proporcional à parte do nome que ele cobre
+    - sinônimo dentro de outra palavra: 0.25 a 0.5, idem
+    '''
+    if inicio == 0 and fim == len(coluna):
+        return 1.0
+    cobertura = (fim - inicio) / len(coluna)
+    palavra_inteira = (inicio == 0 or not coluna[inicio - 1].isalnum()) and (fim == len(coluna) or not coluna[fim].isalnum())
+    if palavra_inteira:
+        return 0.5 + 0.5 * cobertura
+    return 0.25 + 0.25 * cobertura
+
+
+@lru_cache(maxsize=256)
+def _ranquear(colunas, sinonimos):
+    regex, campo_do_sinonimo = _compilar_sinonimos(sinonimos)
+    ranking = {campo: [] for campo in CAMPOS_OBRIGATORIOS}
+
+    for posicao, coluna in enumerate(colunas):
+        nome = str(coluna).strip().lower()   # Normaliza o nome da coluna para comparação
+        melhores = {}
+        for encontrado in regex.finditer(nome):
+            campo, prioridade = campo_do_sinonimo[encontrado.group()]
+            confianca = round(_confianca(nome, encontrado.start(), encontrado.end()), 3)
+            melhores[campo] = max((confianca, -prioridade), melhores.get(campo, (0.0, 0)))
+        for campo, (confianca, prioridade) in melhores.items():
+            ranking[campo].append((confianca, -prioridade, posicao, coluna))
+
+    # Maior confiança primeiro; empate -> sinônimo mais representativo (ex: "valor" antes
+    # de "total"), depois coluna mais à esquerda
+    return {
+        campo: tuple((coluna, confianca) for confianca, _, _, coluna in sorted(candidatos, key=lambda c: (-c[0], c[1], c[2])))
+        for campo, candidatos in ranking.items()
+    }
+
+
+def rank_columns(colunas):
+    '''
+    Pontua cada coluna contra os sinônimos de data, tipo e valor em uma única busca
+    com regex compilada. Retorna {campo: ((coluna, confianca), ...)} com as colunas
+    candidatas de cada campo, da maior para a menor confiança (empates: o sinônimo que
+    vem antes na lista do campo, depois a coluna mais à esquerda).
+
+    O resultado é memorizado pela tupla de nomes de colunas (mesmo layout importado de
+    novo não é recalculado) e pelas listas de sinônimos atuais (alterá-las invalida a memória).
+    '''
+    sinonimos = (("data", tuple(data_keywords)), ("tipo", tuple(tipo_keywords)), ("valor", tuple(valor_keywords)))
+    return _ranquear(tuple(colunas), sinonimos)
+
+
 def column_identifier(df):
     '''
     Identifica as colunas necessárias no DataFrame e retorna um dicionário com os nomes das colunas.
     As colunas obrigatórias são extraídas do modelo Transaction.
     (Data, Tipo, Valor)
-    '''
-    mapping = {
-        "data": None,
-        "tipo": None,
-        "valor": None
-    }
 
+    Uma coluna só é usada por um campo, e a atribuição é completa: entre as combinações
+    em que cada campo recebe uma coluna diferente, fica a de maior confiança total em
+    rank_columns (ver _atribuir_colunas).
+    '''
     # Mapeia as colunas obrigatórias
     try:
+        ranking = rank_columns(df.columns)
 
-        for coluna in df.columns:
-            coluna_lower = coluna.strip().lower()   # Normaliza o nome da coluna para comparação
-
-        # Verifica se a coluna corresponde a algum dos sinônimos
-            if any(keyword in coluna_lower for keyword in data_keywords):
-                mapping["data"] = coluna
-            elif any(keyword in coluna_lower for keyword in tipo_keywords):
-                mapping["tipo"] = coluna
-            elif any(keyword in coluna_lower for keyword in valor_keywords):
-                mapping["valor"] = coluna
-              
         # Verifica se todas as colunas obrigatórias foram encontradas
-        
-        if mapping["data"] is None:
+        if not ranking["data"]:
             raise ValueError("Coluna de data não encontrada.")
-        if mapping["tipo"] is None:
+        if not ranking["tipo"]:
             raise ValueError("Coluna de tipo de pagamento não encontrada.")
-        if mapping["valor"] is None:
+        if not ranking["valor"]:
             raise ValueError("Coluna de valor não encontrada.")
-                
+
+        mapping = _atribuir_colunas(ranking)
+        if mapping is None:
+            raise ValueError("Não há colunas diferentes para data, tipo e valor.")
         return mapping
-        
+
     except Exception as e:
         raise ValueError(f"Erro ao identificar colunas: {e}")
 
+
+def _atribuir_colunas(ranking):
+    '''
+    Atribuição completa por força bruta: testa as combinações de candidatos dos três campos
+    e fica com a de maior soma de confianças em que as colunas são todas diferentes.
+    Basta olhar os 3 melhores candidatos de cada campo (os outros dois campos ocupam no
+    máximo duas colunas), então são no máximo 27 combinações.
+
+    Empate na soma: vence a combinação com os candidatos mais bem colocados no ranking,
+    comparando campo a campo na ordem de CAMPOS_OBRIGATORIOS. Como o ranking já desempata
+    pelo sinônimo mais representativo, ['Data', 'Categoria', 'Total', 'Valor'] dá valor = 'Valor'.
+    Retorna {campo: coluna}, ou None se não houver combinação com colunas diferentes.
+    '''
+    candidatos = [ranking[campo][:len(CAMPOS_OBRIGATORIOS)] for campo in CAMPOS_OBRIGATORIOS]
+    melhor = None
+    for escolha in itertools.product(*(range(len(opcoes)) for opcoes in candidatos)):
+        colunas = [opcoes[i][0] for opcoes, i in zip(candidatos, escolha)]
+        if len(set(colunas)) < len(colunas):
+            continue
+        total = round(sum(opcoes[i][1] for opcoes, i in zip(candidatos, escolha)), 3)
+        chave = (-total, escolha)
+        if melhor is None or chave < melhor[0]:
+            melhor = (chave, colunas)
+    if melhor is None:
+        return None
+    return dict(zip(CAMPOS_OBRIGATORIOS, melhor[1]))
+
+
+def _mapear_colunas(df, mapping):
+    '''
+    Retorna o mapeamento campo -> coluna: o informado (ex: vindo de um template salvo)
+    ou, se mapping for None, o identificado por column_identifier.
+    '''
+    if mapping is None:
+        return column_identifier(df)
+
+    for campo in CAMPOS_OBRIGATORIOS:
+        if campo not in mapping:
+            raise ValueError(f"Erro ao identificar colunas: campo '{campo}' ausente no mapeamento.")
+        if mapping[campo] not in df.columns:
+            raise ValueError(f"Erro ao identificar colunas: coluna '{mapping[campo]}' não encontrada na planilha.")
+    return {campo: mapping[campo] for campo in CAMPOS_OBRIGATORIOS}
+
     ###Função de extração de transações
 
-def extract_transactions(df):
+def extract_transactions(df, modo="colunar", mapping=None, tipos=None):
     """
 Converte DataFrame em lista de Transactions.
 Retorna (lista_sucessos, lista_erros).
+
+mapping (opcional) fixa as colunas {"data", "tipo", "valor"}; sem ele as colunas
+são identificadas por column_identifier.
+tipos (opcional) é a tabela de tipos de pagamento da importação (transaction.tabela_de_tipos);
+sem ela vale a tabela base.
+
+modo="colunar" (padrão) normaliza data, tipo e valor coluna a coluna e só cai
+no caminho linha a linha para as linhas que não passam na validação vetorizada.
+modo="linha" mantém o laço original com iterrows (usado como referência).
     """
-    mapping = column_identifier(df)
+    if modo == "colunar":
+        return _extrair_colunar(df, mapping, tipos)
+    if modo == "linha":
+        return _extrair_por_linha(df, mapping, tipos)
+    raise ValueError(f"Modo de extração inválido: {modo}. Use 'colunar' ou 'linha'.")
+
+
+def _normalizar_data(data):
+    '''
+    Converte o valor bruto da coluna de data para string (mesma regra do caminho linha a linha).
+    '''
+    if hasattr(data, 'strftime'):  # Se é datetime
+        return data.strftime('%d/%m/%Y')
+    if not isinstance(data, str):  # Se não é string nem datetime
+        return str(data)
+    return data
+
+
+def _criar_transaction(data, tipo, valor, extras, tipos=None):
+    '''
+    Cria uma Transaction pelo construtor normal (com validação completa);
+    com tipos, o tipo de pagamento é validado na tabela da importação.
+    '''
+    data = _normalizar_data(data)
+    if tipos is not None:
+        return Transaction._com_tabela(data, tipo, valor, extras, tipos)
+    return Transaction(data=data, tipo_pagamento=tipo, valor=valor, **extras)
+
+
+def _extrair_por_linha(df, mapping=None, tipos=None):
+    '''
+    Caminho original: itera pelas linhas do DataFrame com iterrows.
+    '''
+    mapping = _mapear_colunas(df, mapping)
     success_list = []
     error_list = []
  
@@ -71,11 +225,6 @@ Retorna (lista_sucessos, lista_erros).
         try: 
             # Extrai os valores das colunas obrigatórias
             data = row[mapping["data"]]     
-            if hasattr(data, 'strftime'):  # Se é datetime
-                data = data.strftime('%d/%m/%Y')
-            elif not isinstance(data, str):  # Se não é string nem datetime
-                data = str(data)
-            
             tipo = row[mapping["tipo"]]
             valor = row[mapping["valor"]]
 
@@ -86,10 +235,147 @@ Retorna (lista_sucessos, lista_erros).
                     extras[col] = row[col]
 
             # Cria o objeto Transaction
-            transaction = Transaction(data=data, tipo_pagamento=tipo, valor=valor, **extras)
+            transaction = _criar_transaction(data, tipo, valor, extras, tipos)
             success_list.append(transaction)
 
         except Exception as e:
             error_list.append((f"Linha {index}: {e}"))
 
     return success_list, error_list
+
+
+# Datas já no formato 'DD/MM/AAAA' (subconjunto estrito do que Transaction aceita)
+_PADRAO_DATA = r"[0-9]{2}/[0-9]{2}/[0-9]{4}"
+
+
+def _mascara_data(serie):
+    '''
+    Retorna (datas_normalizadas, mascara) para a coluna de data inteira.
+    A máscara só marca como válidas as linhas que Transaction certamente aceita.
+    '''
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = serie.dt.strftime('%d/%m/%Y')
+        return datas, serie.notna().to_numpy()
+
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+        mascara = serie.str.fullmatch(_PADRAO_DATA)
+        mascara = mascara.astype(object).fillna(False).astype(bool).to_numpy()
+        return serie, mascara
+
+    return serie, np.zeros(len(serie), dtype=bool)
+
+
+def _mascara_tipo(serie, tipos=None):
+    '''
+    Marca as linhas cujo tipo de pagamento é reconhecido pela tabela de tipos.
+    '''
+    normalizados, _ = normalize_tipos(serie.to_numpy(dtype=object), tipos)
+    return pd.notna(normalizados)
+
+
+def _mascara_valor(serie):
+    '''
+    Marca as linhas cujo valor é int/float, não negativo e com no máximo duas casas decimais.
+    '''
+    if serie.dtype.kind in "iuf":
+        numeros = serie.to_numpy(dtype=float)
+        tipo_ok = np.ones(len(serie), dtype=bool)
+    elif serie.dtype == object:
+        tipo_ok = serie.map(type).isin((int, float)).to_numpy()
+        numeros = pd.to_numeric(serie.where(tipo_ok), errors="coerce").to_numpy(dtype=float)
+    else:
+        return np.zeros(len(serie), dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        return tipo_ok & (numeros >= 0) & (np.round(numeros, 2) == numeros)
+
+
+def _preparar_colunas(df, mapping=None, tipos=None):
+    '''
+    Identifica as colunas e roda a validação vetorizada das colunas obrigatórias.
+    Retorna um dicionário com as colunas (como arrays) e a máscara de linhas aprovadas.
+    '''
+    mapping = _mapear_colunas(df, mapping)
+    colunas_obrigatorias = list(mapping.values())
+    colunas_extras = [col for col in df.columns if col not in colunas_obrigatorias]
+
+    # Mesma matriz de objetos que o iterrows percorre (preserva os tipos das células)
+    valores = df.to_numpy()
+    posicoes = {col: i for i, col in enumerate(df.columns)}
+
+    # Normalização e validação vetorizadas
+    datas, mascara_data = _mascara_data(df[mapping["data"]])
+    mascara = mascara_data & _mascara_tipo(df[mapping["tipo"]], tipos) & _mascara_valor(df[mapping["valor"]])
+
+    return {
+        "extras": colunas_extras,
+        "data": valores[:, posicoes[mapping["data"]]],
+        "tipo": valores[:, posicoes[mapping["tipo"]]],
+        "valor": valores[:, posicoes[mapping["valor"]]],
+        "valores_extras": [valores[:, posicoes[col]] for col in colunas_extras],
+        "datas": datas.to_numpy(),
+        "mascara": mascara,
+    }
+
+
+def _extrair_colunar(df, mapping=None, tipos=None):
+    '''
+    Caminho colunar: valida as colunas obrigatórias de uma vez com pandas/NumPy.
+    Linhas aprovadas viram Transactions sem revalidação; as demais passam pelo
+    construtor normal, o que preserva exatamente as mensagens de erro.
+    '''
+    colunas = _preparar_colunas(df, mapping, tipos)
+    success_list = []
+    error_list = []
+
+    colunas_extras = colunas["extras"]
+    coluna_data, coluna_tipo, coluna_valor = colunas["data"], colunas["tipo"], colunas["valor"]
+    datas, mascara = colunas["datas"], colunas["mascara"]
+    linhas_extras = zip(*colunas["valores_extras"]) if colunas_extras else [()] * len(df)
+
+    for i, (index, extras_linha) in enumerate(zip(df.index, linhas_extras)):
+        extras = dict(zip(colunas_extras, extras_linha))
+        if mascara[i]:
+            success_list.append(Transaction._sem_validacao(datas[i], coluna_tipo[i], coluna_valor[i], extras))
+            continue
+        try:
+            success_list.append(_criar_transaction(coluna_data[i], coluna_tipo[i], coluna_valor[i], extras, tipos))
+        except Exception as e:
+            error_list.append((f"Linha {index}: {e}"))
+
+    return success_list, error_list
+
+
+    ###Função de extração em lote (TransactionBatch)
+
+def extract_transaction_batch(df, mapping=None, tipos=None):
+    """
+Converte DataFrame em um TransactionBatch (colunas compactas, sem um objeto por linha).
+Retorna (lote, lista_erros), com as mesmas mensagens de erro de extract_transactions.
+mapping e tipos (opcionais) como em extract_transactions.
+    """
+    colunas = _preparar_colunas(df, mapping, tipos)
+    error_list = []
+
+    datas, mascara = np.array(colunas["datas"], dtype=object), colunas["mascara"].copy()
+    coluna_data, coluna_tipo, coluna_valor = colunas["data"], colunas["tipo"], colunas["valor"]
+    colunas_extras, valores_extras = colunas["extras"], colunas["valores_extras"]
+
+    # Só as linhas reprovadas na validação vetorizada passam pelo construtor
+    for i in np.flatnonzero(~mascara):
+        extras = {col: valores_col[i] for col, valores_col in zip(colunas_extras, valores_extras)}
+        try:
+            transaction = _criar_transaction(coluna_data[i], coluna_tipo[i], coluna_valor[i], extras, tipos)
+        except Exception as e:
+            error_list.append((f"Linha {df.index[i]}: {e}"))
+            continue
+        datas[i] = transaction.data
+        mascara[i] = True
+
+    lote = TransactionBatch(
+        datas[mascara],
+        coluna_tipo[mascara],
+        coluna_valor[mascara],
+        {col: valores_col[mascara] for col, valores_col in zip(colunas_extras, valores_extras)},
+    )
+    return lote, error_list
@@ -1,6 +1,17 @@
 # Importações 
 import pandas as pd
+import numpy as np
+import openpyxl
 import os
+import re
+import shutil
+import datetime
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
 
 #----------Função para ler um arquivo Excel e retornar um DataFrame-------------
 
@@ -23,6 +34,101 @@ def read_file(file_path):
 
     return df
 
+#----------Função para ler um arquivo Excel em blocos (streaming)-------------
+
+TAMANHO_BLOCO_PADRAO = 10000
+
+def read_file_chunks(file_path, chunk_size=TAMANHO_BLOCO_PADRAO):
+    ''' 
+    Lê um arquivo Excel em blocos e devolve um gerador de DataFrames.
+    Cada bloco tem até chunk_size linhas, as mesmas colunas de read_file
+    (primeira linha como cabeçalho, "Unnamed: i" para células vazias) e
+    índice contínuo entre blocos, como se fosse um único DataFrame.
+
+    Arquivos .xlsx são lidos com openpyxl em modo read_only, então só um
+    bloco fica em memória por vez. Diferente do pd.read_excel, colunas vazias
+    no fim da planilha não são descartadas (viram "Unnamed: i"), pois isso
+    exigiria ler o arquivo inteiro antes do primeiro bloco. Arquivos .xls (xlrd não tem streaming)
+    são lidos inteiros e entregues fatiados.
+
+    Linhas com mais células que o cabeçalho (planilhas sem a dimensão gravada) não são
+    cortadas: as células extras viram colunas "Unnamed: i", como no read_file, a partir
+    do bloco em que aparecem (os blocos anteriores já entregues ficam mais estreitos).
+    '''
+    # Verifica se o arquivo existe e se a extensão é válida
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"O arquivo {file_path} não foi encontrado.")
+    if not file_path.endswith(('.xls', '.xlsx')):
+        raise ValueError("O arquivo deve ter extensão .xls ou .xlsx.")
+    if not isinstance(chunk_size, int) or chunk_size <= 0:
+        raise ValueError("O tamanho do bloco deve ser um inteiro positivo.")
+
+    if file_path.endswith('.xls'):
+        df = read_file(file_path)
+        for inicio in range(0, len(df), chunk_size):
+            yield df.iloc[inicio:inicio + chunk_size]
+        return
+
+    try:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    except Exception as e:
+        raise IOError(f"Erro ao ler o arquivo: {e}")
+
+    try:
+        linhas = workbook.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = _nomes_colunas(cabecalho)
+        largura = len(colunas)
+
+        bloco = []
+        inicio = 0
+        for linha in linhas:
+            if len(linha) > largura:
+                # Linha mais larga: novas colunas sem nome, e o bloco atual é alargado
+                colunas = _nomes_colunas(tuple(cabecalho) + (None,) * (len(linha) - len(cabecalho)))
+                largura = len(colunas)
+                bloco = [tuple(anterior) + (None,) * (largura - len(anterior)) for anterior in bloco]
+            elif len(linha) < largura:
+                # Completa linhas curtas até a largura do cabeçalho
+                linha = tuple(linha) + (None,) * (largura - len(linha))
+            bloco.append(linha)
+            if len(bloco) == chunk_size:
+                yield _bloco_para_dataframe(bloco, colunas, inicio)
+                inicio += len(bloco)
+                bloco = []
+
+        if bloco:
+            yield _bloco_para_dataframe(bloco, colunas, inicio)
+    finally:
+        workbook.close()
+
+def _nomes_colunas(cabecalho):
+    '''
+    Gera os nomes das colunas como o pandas faz: células vazias viram
+    "Unnamed: i" e nomes repetidos ganham sufixo ".1", ".2", ...
+    '''
+    colunas = []
+    vistos = {}
+    for i, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {i}" if valor is None or valor == "" else valor
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        colunas.append(nome)
+    return colunas
+
+def _bloco_para_dataframe(bloco, colunas, inicio):
+    '''
+    Converte uma lista de tuplas em DataFrame com índice a partir de inicio.
+    '''
+    df = pd.DataFrame.from_records(bloco, columns=colunas)
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df.fillna(value=np.nan).infer_objects()
+
 #----------Função para escrever um DataFrame em um arquivo Excel-------------
 
 def write_file(df, file_path):
@@ -47,3 +153,707 @@ def write_file(df, file_path):
     except Exception as e:
         raise IOError(f"Erro ao salvar o arquivo: {e}")
     return True
+
+#----------Gravação atômica dos arquivos de saída-------------
+
+@contextmanager
+def _arquivo_temporario(file_path):
+    '''
+    Entrega um caminho temporário ao lado de file_path e só o renomeia para file_path
+    se o bloco terminar sem erro; senão apaga o temporário (nunca fica um arquivo pela metade).
+    Erros de sistema de arquivos viram IOError.
+    '''
+    # Garante que o diretório de destino exista antes de salvar
+    dir_name = os.path.dirname(file_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+
+    temporario = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        yield temporario
+        os.replace(temporario, file_path)
+    except OSError as e:
+        raise IOError(f"Erro ao salvar o arquivo: {e}")
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+#----------Função para escrever blocos de DataFrame em um arquivo Excel (streaming)-------------
+'''
+Escritor .xlsx próprio (zipfile + XML) em vez do openpyxl: o XML de cada coluna é montado
+de uma vez por bloco, sem criar um objeto por célula, e vai direto para o zip. Só o bloco
+atual fica em memória. Textos são gravados inline (sem tabela de strings compartilhadas).
+write_sheets_chunks grava várias abas no mesmo arquivo, uma depois da outra.
+'''
+
+# Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+LIMITE_LINHAS_XLSX = 1048576
+
+# Formato padrão de datas (o mesmo do to_excel)
+FORMATO_DATA_PADRAO = "yyyy-mm-dd hh:mm:ss"
+
+_EPOCA_EXCEL = datetime.datetime(1899, 12, 30)
+_ESTILO_CABECALHO = 1
+_ESTILO_DATA = 2
+
+_XML_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# Caracteres que o Excel não aceita no nome de uma aba (e o tamanho máximo do nome)
+_CARACTERES_INVALIDOS_ABA = set('[]:*?/\\')
+_LIMITE_NOME_ABA = 31
+
+
+def _xml_content_types(n_planilhas):
+    planilhas = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, n_planilhas + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        f'{planilhas}'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    )
+
+
+def _xml_workbook(nomes):
+    abas = "".join(
+        f'<sheet name="{_escapar_xml(nome).replace(chr(34), "&quot;")}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, nome in enumerate(nomes, start=1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets>{abas}</sheets>'
+        '</workbook>'
+    )
+
+
+def _xml_workbook_rels(n_planilhas):
+    planilhas = "".join(
+        f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, n_planilhas + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{planilhas}'
+        f'<Relationship Id="rId{n_planilhas + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+
+
+def _escapar_xml(texto):
+    texto = ILLEGAL_CHARACTERS_RE.sub("", texto)
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _xml_estilos(formatos):
+    '''
+    styles.xml com: 0 = padrão, 1 = cabeçalho em negrito, 2 = data padrão e
+    um estilo por formato de número em formatos (na ordem recebida, a partir de 3).
+    '''
+    numeros = [FORMATO_DATA_PADRAO] + list(formatos)
+    num_fmts = "".join(
+        f'<numFmt numFmtId="{164 + i}" formatCode="{_escapar_xml(formato).replace(chr(34), "&quot;")}"/>'
+        for i, formato in enumerate(numeros)
+    )
+    xfs = "".join(
+        f'<xf numFmtId="{164 + i}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        for i in range(len(numeros))
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f'<numFmts count="{len(numeros)}">{num_fmts}</numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="{2 + len(numeros)}">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        f'{xfs}</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+
+
+def _xml_celula(ref, valor, estilo, estilo_data):
+    '''
+    XML de uma célula com valor de tipo qualquer (colunas object).
+    None/NaN/NaT viram células vazias, como no to_excel.
+    '''
+    if valor is None or valor is pd.NaT:
+        return ""
+    if isinstance(valor, (bool, np.bool_)):
+        return f'<c r="{ref}"{estilo} t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, np.integer)):
+        return f'<c r="{ref}"{estilo}><v>{int(valor)}</v></c>'
+    if isinstance(valor, (float, np.floating)):
+        if valor != valor:
+            return ""
+        if not np.isfinite(valor):
+            return f'<c r="{ref}"{estilo} t="inlineStr"><is><t>{valor}</t></is></c>'
+        return f'<c r="{ref}"{estilo}><v>{float(valor)!r}</v></c>'
+    if isinstance(valor, datetime.datetime):
+        serial = (valor.replace(tzinfo=None) - _EPOCA_EXCEL) / datetime.timedelta(days=1)
+        return f'<c r="{ref}"{estilo_data}><v>{serial!r}</v></c>'
+    if isinstance(valor, datetime.date):
+        serial = (valor - _EPOCA_EXCEL.date()).days
+        return f'<c r="{ref}"{estilo_data}><v>{serial}</v></c>'
+    return f'<c r="{ref}"{estilo} t="inlineStr"><is><t xml:space="preserve">{_escapar_xml(str(valor))}</t></is></c>'
+
+
+def _xml_coluna(serie, letra, linhas, estilo_id, estilo_data_id=_ESTILO_DATA):
+    '''
+    XML das células de uma coluna do bloco (uma string por linha, "" para células vazias).
+    Colunas numéricas, booleanas, de datas e só de textos são convertidas de uma vez;
+    as demais célula a célula. Datas sem estilo_id usam estilo_data_id.
+    '''
+    estilo = f' s="{estilo_id}"' if estilo_id else ""
+    estilo_data = f' s="{estilo_id or estilo_data_id}"' if estilo_id or estilo_data_id else ""
+    valores = serie.to_numpy()
+    tipo = valores.dtype.kind
+
+    if tipo == "b":
+        return [f'<c r="{letra}{r}"{estilo} t="b"><v>{int(v)}</v></c>' for r, v in zip(linhas, valores.tolist())]
+    if tipo in "iu":
+        return [f'<c r="{letra}{r}"{estilo}><v>{v}</v></c>' for r, v in zip(linhas, valores.tolist())]
+    if tipo == "f" and np.isfinite(valores[~np.isnan(valores)]).all():
+        return [f'<c r="{letra}{r}"{estilo}><v>{v!r}</v></c>' if v == v else ""
+                for r, v in zip(linhas, valores.tolist())]
+    if tipo == "M":
+        # Datas: número de série do Excel (dias desde 30/12/1899)
+        serie = serie.dt.tz_localize(None) if getattr(serie.dt, "tz", None) is not None else serie
+        seriais = ((serie - _EPOCA_EXCEL) / pd.Timedelta(days=1)).tolist()
+        return [f'<c r="{letra}{r}"{estilo_data}><v>{v!r}</v></c>' if v == v else ""
+                for r, v in zip(linhas, seriais)]
+
+    if tipo == "O":
+        # Textos: cada valor distinto é escapado uma vez (datas, tipos e nomes se repetem muito)
+        codigos, distintos = pd.factorize(valores)
+        if all(type(valor) is str for valor in distintos):
+            sufixos = [f' t="inlineStr"><is><t xml:space="preserve">{_escapar_xml(valor)}</t></is></c>' for valor in distintos]
+            return [f'<c r="{letra}{r}"{estilo}{sufixos[c]}' if c >= 0 else ""
+                    for r, c in zip(linhas, codigos.tolist())]
+
+    return [_xml_celula(f"{letra}{r}", v, estilo, estilo_data) for r, v in zip(linhas, serie.astype(object).tolist())]
+
+
+def write_file_chunks(chunks, file_path, indice=True, formatos=None):
+    ''' 
+    Escreve um iterável de DataFrames em um único arquivo .xlsx, bloco a bloco.
+    Só o bloco atual fica em memória; o arquivo é gravado em um temporário e só
+    substitui file_path no final (erro ou cancelamento no meio não deixam arquivo).
+
+    Parâmetros:
+    - indice: bool - True escreve o índice na primeira coluna (layout do to_excel/write_file)
+    - formatos: dict, opcional - Coluna -> formato de número do Excel (ex: Template.formatacao,
+      {"Valor": "#,##0.00"}); chaves que não são colunas são ignoradas
+
+    Retorna o número de linhas escritas.
+    '''
+    total, = write_sheets_chunks([("Sheet1", chunks)], file_path, indice=indice, formatos=formatos, permitir_vazias=False)
+    return total
+
+
+def write_sheets_chunks(planilhas, file_path, indice=False, formatos=None, permitir_vazias=True):
+    '''
+    Escreve várias abas em um único arquivo .xlsx, numa passada: cada aba recebe um iterável
+    de DataFrames (lido até o fim antes de passar para a próxima aba), como em write_file_chunks.
+
+    Parâmetros:
+    - planilhas: lista de (nome da aba, iterável de DataFrames); o cabeçalho vem do primeiro
+      DataFrame (um DataFrame sem linhas gera uma aba só com o cabeçalho)
+    - indice / formatos: como em write_file_chunks (formatos vale para as colunas de qualquer aba)
+    - permitir_vazias: bool - False levanta ValueError se uma aba ficar sem linhas de dados
+
+    Retorna a lista com o número de linhas escritas em cada aba.
+    '''
+    if not file_path.endswith('.xlsx'):
+        raise ValueError("O arquivo deve ter extensão .xlsx.")
+
+    planilhas = list(planilhas)
+    nomes = [str(nome) for nome, _ in planilhas]
+    if not nomes:
+        raise ValueError("Nenhuma aba para gravar.")
+    for nome in nomes:
+        if not nome or len(nome) > _LIMITE_NOME_ABA or _CARACTERES_INVALIDOS_ABA & set(nome):
+            raise ValueError(f"Nome de aba inválido: '{nome}' (até {_LIMITE_NOME_ABA} caracteres, sem []:*?/\\).")
+    if len({nome.casefold() for nome in nomes}) != len(nomes):
+        raise ValueError("Os nomes das abas devem ser diferentes.")
+
+    formatos = formatos or {}
+    estilos_formato = {formato: 3 + i for i, formato in enumerate(dict.fromkeys(formatos.values()))}
+    totais = []
+
+    with _arquivo_temporario(file_path) as temporario:
+        with zipfile.ZipFile(temporario, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as arquivo_zip:
+            arquivo_zip.writestr("[Content_Types].xml", _xml_content_types(len(nomes)))
+            arquivo_zip.writestr("_rels/.rels", _XML_RELS)
+            arquivo_zip.writestr("xl/workbook.xml", _xml_workbook(nomes))
+            arquivo_zip.writestr("xl/_rels/workbook.xml.rels", _xml_workbook_rels(len(nomes)))
+            arquivo_zip.writestr("xl/styles.xml", _xml_estilos(estilos_formato))
+
+            for numero, (_, chunks) in enumerate(planilhas, start=1):
+                with arquivo_zip.open(f"xl/worksheets/sheet{numero}.xml", "w", force_zip64=True) as planilha:
+                    total = _escrever_aba(planilha, chunks, indice, formatos, estilos_formato)
+                if total == 0 and not permitir_vazias:
+                    raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+                totais.append(total)
+    return totais
+
+
+def _escrever_aba(planilha, chunks, indice, formatos, estilos_formato):
+    '''
+    Grava o XML de uma aba (sheetN.xml) bloco a bloco. Retorna o número de linhas de dados.
+    '''
+    planilha.write(
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    )
+    total = 0
+    colunas = None
+    for df in chunks:
+        if colunas is None:
+            colunas = [str(coluna) for coluna in df.columns]
+            letras = [get_column_letter(i + 1) for i in range(len(colunas) + indice)]
+            estilos = [estilos_formato.get(formatos.get(coluna)) for coluna in colunas]
+            cabecalho = [""] * indice + [
+                f'<c r="{letra}1" s="{_ESTILO_CABECALHO}" t="inlineStr"><is><t xml:space="preserve">'
+                f'{_escapar_xml(coluna)}</t></is></c>'
+                for letra, coluna in zip(letras[indice:], colunas)
+            ]
+            planilha.write(f'<row r="1">{"".join(cabecalho)}</row>'.encode())
+
+        if total + len(df) + 1 > LIMITE_LINHAS_XLSX:
+            raise ValueError(f"O arquivo .xlsx comporta no máximo {LIMITE_LINHAS_XLSX - 1} linhas de dados.")
+
+        # Fatias de TAMANHO_BLOCO_PADRAO linhas limitam o XML montado de uma vez
+        for inicio in range(0, len(df), TAMANHO_BLOCO_PADRAO):
+            fatia = df.iloc[inicio:inicio + TAMANHO_BLOCO_PADRAO]
+            linhas = range(total + 2, total + 2 + len(fatia))
+            celulas = [_xml_coluna(fatia.iloc[:, i], letra, linhas, estilo)
+                       for i, (letra, estilo) in enumerate(zip(letras[indice:], estilos))]
+            if indice:
+                celulas.insert(0, _xml_coluna(fatia.index.to_series(), letras[0], linhas, _ESTILO_CABECALHO))
+            planilha.write("".join(
+                f'<row r="{r}">{"".join(linha)}</row>' for r, linha in zip(linhas, zip(*celulas))
+            ).encode())
+            total += len(fatia)
+
+    planilha.write(b'</sheetData></worksheet>')
+    return total
+
+#----------Função para escrever blocos de DataFrame dentro de uma planilha existente (streaming)-------------
+'''
+fill_sheet_chunks copia um .xlsx existente (ex: planilha base de importação do ERP) e grava
+os blocos nas linhas de uma das abas. Só o XML dessa aba é reescrito, numa passada e em
+pedaços de _PEDACO_XML; as demais partes do arquivo (outras abas, estilos, validações,
+larguras) são copiadas como estão. As linhas já existentes são repassadas sem serem
+interpretadas célula a célula.
+'''
+
+_PEDACO_XML = 1024 * 1024
+
+_NS_PLANILHA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_RELACAO = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_RE_INICIO_DADOS = re.compile(rb'<sheetData\b[^>]*?(/?)>')
+_RE_FIM_DADOS = re.compile(rb'\s*</sheetData>')
+_RE_LINHA_XML = re.compile(rb'\s*(<row\b[^>]*?/>|<row\b.*?</row>)', re.S)
+_RE_NUMERO_LINHA = re.compile(rb'\br="(\d+)"')
+_RE_VALOR_XML = re.compile(rb'<(?:v|f|is)\b')
+_RE_DIMENSAO = re.compile(rb'<dimension\b[^>]*/>')
+_RE_COLUNA_XML = re.compile(rb'<col\b[^>]*>')
+_RE_ATRIBUTO = re.compile(rb'\b(min|max|style)="(\d+)"')
+_RE_CELLXFS = re.compile(rb'<cellXfs\b[^>]*>(.*?)</cellXfs>', re.S)
+_RE_CALCCHAIN = re.compile(rb'<(?:Override|Relationship)\b[^>]*calcChain\.xml"[^>]*/>')
+
+# Estilo de data acrescentado ao styles.xml da planilha (formato interno 14: data curta do Excel)
+_XML_ESTILO_DATA_CURTA = b'<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+
+
+def fill_sheet_chunks(base_path, chunks, file_path, aba=None, primeira_linha=2, substituir=False, posicoes=None,
+                      permitir_vazias=True):
+    '''
+    Grava uma cópia de base_path em file_path com as linhas dos blocos escritas na aba.
+
+    Parâmetros:
+    - chunks: iterável de DataFrames (sem cabeçalho: só os valores vão para a planilha)
+    - aba: str, opcional - Nome da aba (padrão: a aba ativa)
+    - primeira_linha: int - Primeira linha de dados da aba (1 = primeira linha da planilha);
+      as linhas acima dela (títulos, cabeçalho) são sempre mantidas
+    - substituir: bool - True apaga as linhas a partir de primeira_linha antes de escrever;
+      False acrescenta depois da última linha com algum valor (linhas só formatadas no fim são descartadas)
+    - posicoes: list[int], opcional - Coluna da planilha (0 = A) de cada coluna dos blocos
+      (padrão: as colunas em sequência a partir de A)
+    - permitir_vazias: bool - False levanta ValueError se nenhum bloco tiver linhas
+
+    As células novas recebem o estilo da coluna na planilha (<col style>), se houver; datas
+    sem estilo de coluna recebem um estilo de data curta. O calcChain.xml é descartado
+    (o Excel o refaz ao abrir). Retorna o número de linhas escritas.
+    '''
+    # Verifica se o arquivo existe e se as extensões são válidas
+    if not os.path.isfile(base_path):
+        raise FileNotFoundError(f"O arquivo {base_path} não foi encontrado.")
+    if not base_path.endswith('.xlsx') or not file_path.endswith('.xlsx'):
+        raise ValueError("O arquivo deve ter extensão .xlsx.")
+    if not isinstance(primeira_linha, int) or not 1 <= primeira_linha <= LIMITE_LINHAS_XLSX:
+        raise ValueError(f"A primeira linha deve ser um inteiro entre 1 e {LIMITE_LINHAS_XLSX}.")
+    if posicoes is not None and len(set(posicoes)) != len(posicoes):
+        raise ValueError("Duas colunas não podem ser escritas na mesma posição.")
+
+    try:
+        base = zipfile.ZipFile(base_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise IOError(f"Erro ao ler o arquivo: {e}")
+
+    with base, _arquivo_temporario(file_path) as temporario:
+        parte_aba = _parte_da_aba(base, aba)
+        nomes = base.namelist()
+        partes_alteradas = {}
+        if "xl/styles.xml" in nomes:
+            partes_alteradas["xl/styles.xml"], estilo_data = _estilos_com_data(base.read("xl/styles.xml"))
+        else:
+            estilo_data = None
+        for parte in ("[Content_Types].xml", "xl/_rels/workbook.xml.rels"):
+            if parte in nomes:
+                partes_alteradas[parte] = _RE_CALCCHAIN.sub(b"", base.read(parte))
+
+        total = None
+        with zipfile.ZipFile(temporario, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as arquivo_zip:
+            for info in base.infolist():
+                if info.filename == "xl/calcChain.xml":
+                    continue
+                destino = zipfile.ZipInfo(info.filename, info.date_time)
+                destino.compress_type = zipfile.ZIP_DEFLATED
+                if info.filename in partes_alteradas:
+                    arquivo_zip.writestr(destino, partes_alteradas[info.filename])
+                    continue
+                with base.open(info) as origem, arquivo_zip.open(destino, "w", force_zip64=True) as saida:
+                    if info.filename == parte_aba:
+                        total = _reescrever_aba(origem, saida, chunks, primeira_linha, substituir, posicoes, estilo_data)
+                    else:
+                        shutil.copyfileobj(origem, saida, _PEDACO_XML)
+
+        if total is None:
+            raise IOError(f"Erro ao ler o arquivo: {parte_aba} não encontrado.")
+        if total == 0 and not permitir_vazias:
+            raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+    return total
+
+
+def _parte_da_aba(arquivo_zip, aba):
+    '''
+    Caminho, dentro do zip, do XML da aba com esse nome (ou da aba ativa, se aba for None).
+    '''
+    try:
+        workbook = ET.fromstring(arquivo_zip.read("xl/workbook.xml"))
+        relacoes = ET.fromstring(arquivo_zip.read("xl/_rels/workbook.xml.rels"))
+    except (KeyError, ET.ParseError) as e:
+        raise IOError(f"Erro ao ler o arquivo: {e}")
+
+    abas = workbook.findall(f"{_NS_PLANILHA}sheets/{_NS_PLANILHA}sheet")
+    if aba is None:
+        vista = workbook.find(f"{_NS_PLANILHA}bookViews/{_NS_PLANILHA}workbookView")
+        ativa = int(vista.get("activeTab", 0)) if vista is not None else 0
+        escolhida = abas[ativa] if ativa < len(abas) else None
+    else:
+        escolhida = next((elemento for elemento in abas if elemento.get("name") == aba), None)
+    if escolhida is None:
+        raise ValueError(f"A aba '{aba}' não existe no arquivo.")
+
+    alvos = {relacao.get("Id"): relacao.get("Target") for relacao in relacoes.iter(f"{_NS_PACOTE}Relationship")}
+    alvo = alvos.get(escolhida.get(f"{_NS_RELACAO}id"))
+    if alvo is None:
+        raise IOError("Erro ao ler o arquivo: aba sem XML correspondente.")
+    # Alvos relativos partem de xl/; absolutos partem da raiz do pacote
+    return alvo.lstrip("/") if alvo.startswith("/") else posixpath.normpath(posixpath.join("xl", alvo))
+
+
+def _estilos_com_data(xml):
+    '''
+    Acrescenta um estilo de data curta ao fim de <cellXfs> do styles.xml.
+    Retorna (styles.xml alterado, id do estilo), ou (xml, None) se não houver <cellXfs>.
+    '''
+    achado = _RE_CELLXFS.search(xml)
+    if achado is None:
+        return xml, None
+    estilo_id = len(re.findall(rb'<xf\b', achado.group(1)))
+    cellxfs = b'<cellXfs count="%d">%s%s</cellXfs>' % (estilo_id + 1, achado.group(1), _XML_ESTILO_DATA_CURTA)
+    return xml[:achado.start()] + cellxfs + xml[achado.end():], estilo_id
+
+
+def _estilos_das_colunas(xml):
+    '''
+    Estilo de cada coluna (0 = A) definido em <cols> no início do XML da aba.
+    '''
+    estilos = {}
+    for coluna in _RE_COLUNA_XML.findall(xml):
+        atributos = {nome: int(valor) for nome, valor in _RE_ATRIBUTO.findall(coluna)}
+        if atributos.get(b"style") and b"min" in atributos:
+            for posicao in range(atributos[b"min"] - 1, atributos.get(b"max", atributos[b"min"])):
+                estilos[posicao] = atributos[b"style"]
+    return estilos
+
+
+def _reescrever_aba(origem, saida, chunks, primeira_linha, substituir, posicoes, estilo_data):
+    '''
+    Copia o XML da aba de origem para saida, trocando as linhas de dados conforme
+    substituir e acrescentando as linhas dos blocos no fim de <sheetData>.
+    Retorna o número de linhas escritas.
+    '''
+    buffer = origem.read(_PEDACO_XML)
+    inicio = _RE_INICIO_DADOS.search(buffer)
+    while inicio is None:
+        pedaco = origem.read(_PEDACO_XML)
+        if not pedaco:
+            raise IOError("Erro ao ler o arquivo: aba sem <sheetData>.")
+        buffer += pedaco
+        inicio = _RE_INICIO_DADOS.search(buffer)
+
+    # A dimensão antiga deixaria de valer (o elemento é opcional)
+    cabecalho_xml = _RE_DIMENSAO.sub(b"", buffer[:inicio.start()])
+    estilos_colunas = _estilos_das_colunas(cabecalho_xml)
+    saida.write(cabecalho_xml + b"<sheetData>")
+
+    ultima = primeira_linha - 1
+    posicao = inicio.end()
+    if not inicio.group(1):
+        # Linhas existentes: mantidas até primeira_linha; depois, só no modo acrescentar e
+        # até a última com valor (linhas vazias no meio dos dados ficam)
+        pendentes = []
+        numero = 0
+        while True:
+            linha = _RE_LINHA_XML.match(buffer, posicao)
+            if linha is None:
+                fim = _RE_FIM_DADOS.match(buffer, posicao)
+                if fim is not None:
+                    posicao = fim.end()
+                    break
+                pedaco = origem.read(_PEDACO_XML)
+                if not pedaco:
+                    raise IOError("Erro ao ler o arquivo: <sheetData> incompleto.")
+                buffer = buffer[posicao:] + pedaco
+                posicao = 0
+                continue
+
+            posicao = linha.end()
+            xml = linha.group(1)
+            marca = xml[:xml.index(b">")]
+            achado = _RE_NUMERO_LINHA.search(marca)
+            if achado is not None:
+                numero = int(achado.group(1))
+            else:
+                numero += 1
+                xml = b'<row r="%d"%s' % (numero, xml[4:])
+
+            if numero < primeira_linha:
+                saida.write(xml)
+            elif substituir:
+                continue
+            elif _RE_VALOR_XML.search(xml):
+                saida.write(b"".join(pendentes) + xml)
+                pendentes = []
+                ultima = numero
+            else:
+                pendentes.append(xml)
+
+    total = _escrever_linhas(saida, chunks, ultima + 1, posicoes, estilos_colunas, estilo_data)
+
+    saida.write(b"</sheetData>" + buffer[posicao:])
+    shutil.copyfileobj(origem, saida, _PEDACO_XML)
+    return total
+
+
+def _escrever_linhas(saida, chunks, linha_inicial, posicoes, estilos_colunas, estilo_data):
+    '''
+    Grava as linhas dos blocos a partir de linha_inicial, cada coluna na sua posição da planilha.
+    '''
+    total = 0
+    ordem = None
+    for df in chunks:
+        if ordem is None:
+            colunas = list(posicoes) if posicoes is not None else list(range(df.shape[1]))
+            if len(colunas) != df.shape[1]:
+                raise ValueError("posicoes deve ter uma posição para cada coluna dos blocos.")
+            # As células de uma linha precisam estar em ordem de coluna
+            ordem = sorted(range(len(colunas)), key=colunas.__getitem__)
+            letras = [get_column_letter(colunas[i] + 1) for i in ordem]
+            estilos = [estilos_colunas.get(colunas[i]) for i in ordem]
+
+        if linha_inicial + total + len(df) - 1 > LIMITE_LINHAS_XLSX:
+            raise ValueError(f"O arquivo .xlsx comporta no máximo {LIMITE_LINHAS_XLSX} linhas.")
+
+        # Fatias de TAMANHO_BLOCO_PADRAO linhas limitam o XML montado de uma vez
+        for inicio in range(0, len(df), TAMANHO_BLOCO_PADRAO):
+            fatia = df.iloc[inicio:inicio + TAMANHO_BLOCO_PADRAO]
+            linhas = range(linha_inicial + total, linha_inicial + total + len(fatia))
+            celulas = [_xml_coluna(fatia.iloc[:, i], letra, linhas, estilo, estilo_data)
+                       for i, letra, estilo in zip(ordem, letras, estilos)]
+            saida.write("".join(
+                f'<row r="{r}">{"".join(linha)}</row>' for r, linha in zip(linhas, zip(*celulas))
+            ).encode())
+            total += len(fatia)
+    return total
+
+#----------Escritores de saída em outros formatos (streaming)-------------
+'''
+Mesma interface de write_file_chunks: recebem um iterável de DataFrames, gravam bloco a bloco
+em um temporário e retornam o número de linhas escritas. formatos (formato de número do Excel)
+só vale para .xlsx e é ignorado pelos demais.
+'''
+
+def write_csv_chunks(chunks, file_path, indice=False, formatos=None, separador=";", decimal=",", codificacao="utf-8-sig"):
+    '''
+    Escreve os blocos em um CSV. O padrão (";" e vírgula decimal, UTF-8 com BOM) é o que
+    o Excel em português abre direto; separador, decimal e codificacao são configuráveis.
+    '''
+    if not isinstance(separador, str) or len(separador) != 1:
+        raise ValueError("O separador deve ser um único caractere.")
+    if not isinstance(decimal, str) or len(decimal) != 1 or decimal == separador:
+        raise ValueError("O separador decimal deve ser um único caractere diferente do separador.")
+
+    total = 0
+    with _arquivo_temporario(file_path) as temporario:
+        with open(temporario, "w", encoding=codificacao, newline="") as arquivo:
+            cabecalho = True
+            for df in chunks:
+                df.to_csv(arquivo, sep=separador, decimal=decimal, index=indice, header=cabecalho, lineterminator="\n")
+                cabecalho = False
+                total += len(df)
+        if total == 0:
+            raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+    return total
+
+
+def write_jsonl_chunks(chunks, file_path, indice=False, formatos=None):
+    '''
+    Escreve os blocos em JSON Lines (um objeto por linha, UTF-8, datas em ISO 8601, vazios como null).
+    '''
+    total = 0
+    with _arquivo_temporario(file_path) as temporario:
+        with open(temporario, "w", encoding="utf-8", newline="\n") as arquivo:
+            for df in chunks:
+                if len(df) == 0:
+                    continue
+                if indice:
+                    df = df.reset_index()
+                arquivo.write(df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso"))
+                total += len(df)
+        if total == 0:
+            raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+    return total
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Os formatos Parquet e Feather precisam do pacote pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def _tabelas_arrow(pa, chunks, indice):
+    '''
+    Converte os blocos em tabelas Arrow com o esquema do primeiro bloco.
+    Colunas object (ex: campos extras com tipos misturados) são gravadas como texto.
+    '''
+    esquema = None
+    for df in chunks:
+        objetos = df.select_dtypes(include="object").columns
+        if len(objetos):
+            df = df.astype({coluna: "string" for coluna in objetos})
+        try:
+            tabela = pa.Table.from_pandas(df, schema=esquema, preserve_index=indice)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"Um bloco não tem os mesmos tipos de coluna do primeiro: {e}")
+        esquema = tabela.schema
+        yield tabela
+
+
+def write_parquet_chunks(chunks, file_path, indice=False, formatos=None):
+    '''
+    Escreve os blocos em Parquet (um row group por bloco). Precisa do pyarrow.
+    '''
+    pa = _importar_pyarrow()
+    import pyarrow.parquet as pq
+
+    total = 0
+    with _arquivo_temporario(file_path) as temporario:
+        escritor = None
+        try:
+            for tabela in _tabelas_arrow(pa, chunks, indice):
+                if escritor is None:
+                    escritor = pq.ParquetWriter(temporario, tabela.schema)
+                escritor.write_table(tabela)
+                total += tabela.num_rows
+        finally:
+            if escritor is not None:
+                escritor.close()
+        if total == 0:
+            raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+    return total
+
+
+def write_feather_chunks(chunks, file_path, indice=False, formatos=None):
+    '''
+    Escreve os blocos em Feather (formato de arquivo Arrow IPC, compressão lz4). Precisa do pyarrow.
+    '''
+    pa = _importar_pyarrow()
+
+    total = 0
+    with _arquivo_temporario(file_path) as temporario:
+        escritor = None
+        try:
+            for tabela in _tabelas_arrow(pa, chunks, indice):
+                if escritor is None:
+                    escritor = pa.ipc.new_file(temporario, tabela.schema,
+                                               options=pa.ipc.IpcWriteOptions(compression="lz4"))
+                escritor.write_table(tabela)
+                total += tabela.num_rows
+        finally:
+            if escritor is not None:
+                escritor.close()
+        if total == 0:
+            raise ValueError("O DataFrame está vazio e não pode ser salvo.")
+    return total
+
+
+# Formato (extensão) -> escritor em blocos
+ESCRITORES_SAIDA = {
+    "xlsx": write_file_chunks,
+    "csv": write_csv_chunks,
+    "parquet": write_parquet_chunks,
+    "feather": write_feather_chunks,
+    "jsonl": write_jsonl_chunks,
+}
+
+
+def escritor_saida(file_path, formato=None):
+    '''
+    Retorna o escritor em blocos do arquivo de saída: o de formato, se informado,
+    senão o da extensão de file_path. Levanta ValueError para formatos não suportados.
+    '''
+    if formato is None:
+        formato = os.path.splitext(file_path)[1].lstrip(".")
+    escritor = ESCRITORES_SAIDA.get(formato.lower())
+    if escritor is None:
+        raise ValueError(f"O arquivo de saída deve ser {', '.join(list(ESCRITORES_SAIDA)[:-1])} ou {list(ESCRITORES_SAIDA)[-1]}.")
+    return escritor
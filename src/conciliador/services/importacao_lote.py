@@ -0,0 +1,177 @@
+# Importações
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ..models.template import Template
+from ..models.transaction import tabela_de_tipos
+from ..models.transaction_batch import TransactionBatch
+from . import file_handler
+from . import sheet_processor
+from . import data_mapper
+from . import output_generator
+from . import cache_planilhas
+from . import template_manager
+
+#----------Importação de várias planilhas em paralelo-------------#
+'''
+Distribui as planilhas entre processos (ProcessPoolExecutor), um arquivo por tarefa.
+Cada processo roda read_file -> clean_sheet -> extract_transaction_batch e:
+- gera a planilha de saída do próprio arquivo (modo "um arquivo por entrada"), ou
+- devolve o lote de transações para ser consolidado em uma única saída.
+'''
+
+EXTENSOES_PLANILHA = ('.xls', '.xlsx')
+
+# Tabela de tipos de pagamento da importação em cada processo do pool (ver _iniciar_processo)
+_tipos_do_processo = None
+
+
+def listar_planilhas(pasta):
+    '''
+    Lista as planilhas (.xls/.xlsx) de uma pasta, em ordem alfabética.
+    Ignora arquivos temporários do Excel (~$arquivo.xlsx).
+    '''
+    if not os.path.isdir(pasta):
+        raise FileNotFoundError(f"A pasta {pasta} não foi encontrada.")
+
+    return sorted(
+        os.path.join(pasta, nome)
+        for nome in os.listdir(pasta)
+        if nome.endswith(EXTENSOES_PLANILHA) and not nome.startswith("~$")
+    )
+
+
+def _iniciar_processo(tipos):
+    '''
+    Inicializador dos processos do pool: guarda a tabela de tipos de pagamento da importação.
+    '''
+    global _tipos_do_processo
+    _tipos_do_processo = tipos
+
+
+def _processar_arquivo(caminho, template, caminho_saida, usar_cache=False, mapping=None, identificar_template=False):
+    '''
+    Tarefa executada em um processo do pool (precisa ser uma função de módulo).
+    Retorna (resumo, lote); lote só é devolvido quando não há caminho_saida.
+    mapping e identificar_template têm o mesmo papel que em pipeline.processar_planilha.
+    '''
+    inicio = time.perf_counter()
+    resumo = {"caminho": caminho, "status": "ok", "transacoes": 0, "erros": [], "caminho_saida": None,
+              "template_identificado": None, "hash_entrada": None}
+    lote = None
+    try:
+        if usar_cache:
+            # O hash da chave do cache volta no resumo (histórico), sem reler o arquivo
+            resumo["hash_entrada"] = cache_planilhas.hash_arquivo(caminho)
+            df_limpo = cache_planilhas.carregar_planilha_limpa(caminho, resumo["hash_entrada"])
+        else:
+            df_limpo = sheet_processor.clean_sheet(file_handler.read_file(caminho))
+        if mapping is None and identificar_template:
+            encontrado = template_manager.resolve_template(df_limpo.columns)
+            if encontrado is not None:
+                mapping = encontrado["colunas"]
+                resumo["template_identificado"] = encontrado["nome"]
+        lote, erros = data_mapper.extract_transaction_batch(df_limpo, mapping, _tipos_do_processo)
+        resumo["transacoes"] = len(lote)
+        resumo["erros"] = erros
+
+        if caminho_saida is not None:
+            resumo["caminho_saida"] = output_generator.gerar_planilha(lote, template, caminho_saida)
+            lote = None
+    except Exception as e:
+        resumo["status"] = "erro"
+        resumo["mensagem"] = str(e)
+        lote = None
+
+    resumo["tempo"] = time.perf_counter() - inicio
+    return resumo, lote
+
+
+def importar_arquivos(caminhos, template, pasta_saida, consolidar=False, max_workers=None, status=None, cancelar=None,
+                      usar_cache=False, mapping=None, identificar_template=False, tipos=None):
+    '''
+    Importa várias planilhas em paralelo.
+
+    Parâmetros:
+    - caminhos: list[str] - Planilhas de entrada
+    - template: Template - Formato de saída
+    - pasta_saida: str - Pasta onde as saídas são gravadas
+    - consolidar: bool - True gera uma única planilha com todas as transações
+      (na ordem de caminhos); False gera uma planilha por arquivo
+    - max_workers: int, opcional - Número de processos (padrão: núcleos da CPU)
+    - status: callable(dict), opcional - Chamado no processo principal a cada arquivo concluído
+    - cancelar: callable() -> bool, opcional - Consultado a cada arquivo concluído; se retornar
+      True, os arquivos que ainda não começaram são cancelados (status "cancelado")
+    - usar_cache: bool - Reaproveita (ou grava) as planilhas limpas em cache_planilhas
+    - mapping / identificar_template: colunas de origem fixas, ou template identificado
+      pelo cabeçalho de cada arquivo (ver pipeline.processar_planilha)
+    - tipos: dict, opcional - Tabela de tipos de pagamento da importação (transaction.tabela_de_tipos);
+      padrão: a tabela base deste processo
+
+    Retorna:
+    - dict: {"arquivos": [resumo por arquivo, na ordem de caminhos],
+             "caminho_consolidado", "tempo_total", "tempo_sequencial"}
+      tempo_sequencial é a soma dos tempos de cada arquivo (o que levaria em série).
+    '''
+    # Validações
+    if not isinstance(template, Template):
+        raise ValueError("O template deve ser uma instância da classe Template.")
+    caminhos = list(caminhos)
+    if not caminhos:
+        raise ValueError("Nenhuma planilha para importar.")
+
+    inicio = time.perf_counter()
+    resumos = [None] * len(caminhos)
+    lotes = [None] * len(caminhos)
+
+    # Os processos recebem a tabela de tipos de pagamento da importação (sinônimos
+    # registrados em tempo de execução ou do template não existem num processo novo)
+    if tipos is None:
+        tipos = tabela_de_tipos()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_processo,
+                             initargs=(tipos,)) as executor:
+        tarefas = {}
+        nomes_usados = set()
+        for posicao, caminho in enumerate(caminhos):
+            caminho_saida = None
+            if not consolidar:
+                # Arquivos de pastas diferentes podem ter o mesmo nome
+                nome = os.path.splitext(os.path.basename(caminho))[0]
+                if nome in nomes_usados:
+                    nome = f"{nome}_{posicao + 1}"
+                nomes_usados.add(nome)
+                caminho_saida = os.path.join(pasta_saida, f"conciliacao_{nome}.xlsx")
+            tarefas[executor.submit(_processar_arquivo, caminho, template, caminho_saida, usar_cache,
+                                    mapping, identificar_template)] = posicao
+
+        for tarefa in as_completed(tarefas):
+            posicao = tarefas[tarefa]
+            if tarefa.cancelled():
+                resumos[posicao] = {"caminho": caminhos[posicao], "status": "cancelado", "transacoes": 0,
+                                    "erros": [], "caminho_saida": None, "template_identificado": None,
+                                    "hash_entrada": None, "tempo": 0.0}
+            else:
+                resumos[posicao], lotes[posicao] = tarefa.result()
+            if status is not None:
+                status(resumos[posicao])
+
+            # Arquivos já em execução terminam; os que estão na fila são cancelados
+            if cancelar is not None and cancelar():
+                for pendente in tarefas:
+                    pendente.cancel()
+
+    resultado = {
+        "arquivos": resumos,
+        "caminho_consolidado": None,
+        "tempo_sequencial": sum(resumo["tempo"] for resumo in resumos),
+    }
+
+    if consolidar:
+        lote = TransactionBatch.concatenar(lote for lote in lotes if lote is not None)
+        if len(lote) > 0:
+            caminho_consolidado = os.path.join(pasta_saida, "conciliacao_consolidada.xlsx")
+            resultado["caminho_consolidado"] = output_generator.gerar_planilha(lote, template, caminho_consolidado)
+
+    resultado["tempo_total"] = time.perf_counter() - inicio
+    return resultado
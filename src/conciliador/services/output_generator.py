@@ -1,17 +1,22 @@
 # Importações
+from operator import attrgetter
+
 import pandas as pd 
-from ..models.template import Template
-from .file_handler import write_file
+from ..models.template import Template, ACESSO_ATRIBUTO, ACESSO_CONSTANTE
+from ..models.transaction_batch import TransactionBatch
+from .file_handler import escritor_saida
 
 # Função para gerar saída
-def gerar_planilha(transactions, template, output_path):
+def gerar_planilha(transactions, template, output_path, formato=None, **opcoes_saida):
     '''
     Gera um arquivo de saída baseado em transações e um template.
 
     Parâmetros:
-    - transactions: list[Transaction] - Lista de transações processadas
+    - transactions: list[Transaction] | TransactionBatch - Transações processadas
     - template: Template - Instância da classe Template (formato de saída)
-    - output_path: str - Caminho onde o arquivo será salvo (deve terminar com .xlsx)
+    - output_path: str - Caminho onde o arquivo será salvo (.xlsx, .csv, .parquet, .feather ou .jsonl)
+    - formato: str, opcional - Formato de saída (padrão: pela extensão de output_path)
+    - opcoes_saida: repassadas ao escritor (ex: separador=";" e decimal="," no CSV)
 
     Retorna:
     - str: Caminho do arquivo gerado
@@ -31,27 +36,45 @@ def gerar_planilha(transactions, template, output_path):
         raise ValueError("O caminho de saída deve ser uma string.")
     if not output_path.strip():
         raise ValueError("O caminho de saída não pode ser vazio.")
-    if not output_path.endswith('.xlsx'):
-        raise ValueError("O arquivo de saída deve ser xlsx.")
+    escritor = escritor_saida(output_path, formato)
 
     # Processamento
+    df = montar_dataframe(transactions, template)
 
-    # Cria lista para armazenar linhas
-    linhas = []
+    # Salva sem o índice; os formatos de coluna do template só valem no xlsx
+    escritor([df], output_path, indice=False, formatos=template.formatacao, **opcoes_saida)
 
-    # Preenche lista com dados das transactions
-    for transaction in transactions:
-        linha = {}
-        for coluna in template.colunas:
-            valor = template.get_valor_mapeado(transaction, coluna)
-            linha[coluna] = valor
-        linhas.append(linha)
+    # Retorna o caminho do arquivo gerado
+    return output_path
 
-    # Cria DataFrame de uma vez com todas as linhas
-    df = pd.DataFrame(linhas, columns=template.colunas)
+# Função para montar o DataFrame de saída
+def montar_dataframe(transactions, template):
+    '''
+    Monta o DataFrame de saída (colunas do template) a partir das transações.
+    Usado por gerar_planilha e pelo pipeline em blocos.
 
-    # Salva com write_file
-    write_file(df, output_path)
+    Parâmetros:
+    - transactions: list[Transaction] | TransactionBatch - Transações processadas
+    - template: Template - Instância da classe Template (formato de saída)
 
-    # Retorna o caminho do arquivo gerado
-    return output_path
+    Retorna:
+    - pd.DataFrame: Uma linha por transação, colunas na ordem do template
+    '''
+    # Cada coluna de saída é montada inteira a partir do acesso compilado do template
+    lote = isinstance(transactions, TransactionBatch)
+    extras = None
+    colunas = {}
+    for coluna, (acesso, campo) in template.compilar().items():
+        if acesso == ACESSO_CONSTANTE:
+            colunas[coluna] = [campo] * len(transactions)
+        elif lote:
+            # Lote colunar: a coluna já existe, sem objetos por linha
+            colunas[coluna] = transactions.coluna(campo)
+        elif acesso == ACESSO_ATRIBUTO:
+            colunas[coluna] = list(map(attrgetter(campo), transactions))
+        else:
+            if extras is None:
+                extras = [transaction.extras for transaction in transactions]
+            colunas[coluna] = [extras_linha.get(campo, "") for extras_linha in extras]
+
+    return pd.DataFrame(colunas, columns=template.colunas)
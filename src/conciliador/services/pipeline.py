@@ -0,0 +1,172 @@
+# Importações
+from ..models.template import Template
+from . import file_handler
+from . import sheet_processor
+from . import data_mapper
+from . import output_generator
+from . import cache_planilhas
+from . import template_manager
+
+#----------Pipeline em blocos: ler -> limpar -> mapear -> escrever-------------#
+'''
+Encadeia as etapas do conciliador bloco a bloco, com memória limitada:
+- file_handler.read_file_chunks     -> lê o arquivo em blocos (openpyxl read_only)
+- sheet_processor.clean_sheet_chunks -> cabeçalho no primeiro bloco, ffill entre blocos
+- data_mapper.extract_transaction_batch -> Transactions em lote colunar
+- output_generator.montar_dataframe + file_handler.escritor_saida -> escrita incremental
+  (sem índice; xlsx com Template.formatacao como formato das colunas, ou csv/parquet/feather/jsonl)
+Só um bloco de cada etapa fica em memória por vez.
+Com usar_cache=True os blocos limpos são gravados em cache_planilhas; reimportar
+o mesmo arquivo pula a leitura e a limpeza.
+'''
+
+class ImportacaoCancelada(Exception):
+    '''
+    Levantada quando o processamento é cancelado entre dois blocos.
+    Nenhum arquivo de saída é gravado nesse caso.
+    '''
+
+
+def processar_planilha(caminho_entrada, template, caminho_saida, chunk_size=file_handler.TAMANHO_BLOCO_PADRAO,
+                       progresso=None, cancelar=None, usar_cache=False, mapping=None, identificar_template=False,
+                       formato=None, previa=None, tipos=None, **opcoes_saida):
+    '''
+    Processa uma planilha inteira em blocos e grava a saída no formato do template.
+
+    Parâmetros:
+    - caminho_entrada: str - Planilha de origem (.xlsx ou .xls)
+    - template: Template - Formato de saída
+    - caminho_saida: str - Caminho do arquivo gerado (.xlsx, .csv, .parquet, .feather ou .jsonl)
+    - chunk_size: int - Linhas lidas por bloco
+    - progresso: callable(dict), opcional - Chamado após cada bloco com
+      {"linhas_lidas", "transacoes", "erros"} (erros = quantidade até agora)
+    - cancelar: callable() -> bool, opcional - Consultado antes de cada bloco;
+      se retornar True, levanta ImportacaoCancelada
+    - usar_cache: bool - Reaproveita (ou grava) os blocos limpos em cache_planilhas
+    - mapping: dict, opcional - Colunas de origem {"data", "tipo", "valor"} (senão, column_identifier)
+    - identificar_template: bool - Sem mapping, procura um template salvo pelo cabeçalho do
+      primeiro bloco (template_manager.resolve_template) e usa as colunas dele
+    - formato / opcoes_saida: como em output_generator.gerar_planilha
+    - previa: callable(DataFrame), opcional - Recebe cada bloco de saída assim que é montado
+      (antes da gravação), para exibir o resultado enquanto a importação continua;
+      os blocos recebidos, juntos, são a saída inteira
+    - tipos: dict, opcional - Tabela de tipos de pagamento da importação
+      (transaction.tabela_de_tipos, ex: com os sinônimos do template); padrão: a tabela base
+
+    Retorna:
+    - dict: {"caminho_saida", "linhas_lidas", "transacoes", "erros", "cache", "template_identificado",
+      "hash_entrada"}
+      cache indica se a leitura/limpeza veio do cache; template_identificado é o nome
+      do template encontrado pelo cabeçalho (ou None); hash_entrada é o SHA-256 da planilha
+      calculado para a chave do cache (None sem usar_cache)
+    '''
+    # Validações
+    if not isinstance(template, Template):
+        raise ValueError("O template deve ser uma instância da classe Template.")
+    if not isinstance(caminho_saida, str) or not caminho_saida.strip():
+        raise ValueError("O caminho de saída não pode ser vazio.")
+    escritor = file_handler.escritor_saida(caminho_saida, formato)
+
+    resumo = {
+        "caminho_saida": caminho_saida,
+        "linhas_lidas": 0,
+        "transacoes": 0,
+        "erros": [],
+        "cache": False,
+        "template_identificado": None,
+        "hash_entrada": None,
+    }
+
+    def contar_lidas(blocos):
+        for bloco in blocos:
+            resumo["linhas_lidas"] += len(bloco)
+            yield bloco
+
+    def blocos_saida(blocos_limpos):
+        colunas = mapping
+        for posicao, bloco in enumerate(blocos_limpos):
+            if cancelar is not None and cancelar():
+                raise ImportacaoCancelada("Importação cancelada pelo usuário.")
+
+            # Todos os blocos têm o cabeçalho do primeiro
+            if posicao == 0 and colunas is None and identificar_template:
+                encontrado = template_manager.resolve_template(bloco.columns)
+                if encontrado is not None:
+                    colunas = encontrado["colunas"]
+                    resumo["template_identificado"] = encontrado["nome"]
+
+            lote, erros = data_mapper.extract_transaction_batch(bloco, colunas, tipos)
+            resumo["erros"].extend(erros)
+            if len(lote) > 0:
+                df_saida = output_generator.montar_dataframe(lote, template)
+                resumo["transacoes"] += len(df_saida)
+                if previa is not None:
+                    previa(df_saida)
+                yield df_saida
+
+            if progresso is not None:
+                progresso({
+                    "linhas_lidas": resumo["linhas_lidas"],
+                    "transacoes": resumo["transacoes"],
+                    "erros": len(resumo["erros"]),
+                })
+
+    def blocos_do_cache(registros):
+        for linhas_lidas, bloco in registros:
+            resumo["linhas_lidas"] = linhas_lidas
+            yield bloco
+
+    def blocos_para_cache(blocos_limpos):
+        # Cada bloco vai para o cache junto com o total de linhas lidas até ele
+        for bloco in blocos_limpos:
+            yield resumo["linhas_lidas"], bloco
+
+    def blocos_da_planilha():
+        resumo["linhas_lidas"] = 0
+        blocos = contar_lidas(file_handler.read_file_chunks(caminho_entrada, chunk_size))
+        blocos_limpos = sheet_processor.clean_sheet_chunks(blocos)
+        if usar_cache:
+            blocos_limpos = blocos_do_cache(cache_planilhas.gravar_registros(chave, blocos_para_cache(blocos_limpos)))
+        return blocos_limpos
+
+    def blocos_do_cache_ou_planilha(registros):
+        # Uma entrada ilegível é descartada por ler_registros no meio da leitura: a limpeza
+        # é refeita a partir da planilha (como em carregar_planilha_limpa), pulando os blocos
+        # já entregues, e o cache é regravado
+        entregues = 0
+        blocos = blocos_do_cache(registros)
+        while True:
+            try:
+                bloco = next(blocos)
+            except StopIteration:
+                return
+            except Exception:
+                break
+            entregues += 1
+            yield bloco
+
+        resumo["cache"] = False
+        for posicao, bloco in enumerate(blocos_da_planilha()):
+            if posicao >= entregues:
+                yield bloco
+
+    registros = None
+    if usar_cache:
+        # A limpeza em blocos depende do tamanho do primeiro bloco (cabeçalho)
+        resumo["hash_entrada"] = cache_planilhas.hash_arquivo(caminho_entrada)
+        chave = cache_planilhas.chave_cache(caminho_entrada, f"blocos:{chunk_size}", resumo["hash_entrada"])
+        registros = cache_planilhas.ler_registros(chave)
+
+    if registros is not None:
+        resumo["cache"] = True
+        blocos_limpos = blocos_do_cache_ou_planilha(registros)
+    else:
+        blocos_limpos = blocos_da_planilha()
+
+    try:
+        escritor(blocos_saida(blocos_limpos), caminho_saida, indice=False, formatos=template.formatacao, **opcoes_saida)
+    except ValueError:
+        if resumo["transacoes"] == 0:
+            raise ValueError("A lista de transações está vazia.")
+        raise
+    return resumo
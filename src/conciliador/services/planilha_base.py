@@ -0,0 +1,208 @@
+# Importações
+import os
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+
+from ..models.template import Template
+from ..models.transaction import Transaction
+from ..models.transaction_batch import TransactionBatch
+from . import file_handler
+from . import sheet_processor
+from . import output_generator
+from . import template_manager
+
+#----------Preenchimento de uma planilha base (ex: modelo de importação do Omie)-------------#
+'''
+Escreve os dados do pipeline dentro de uma planilha base do ERP, na ordem de colunas dela:
+1 - ler_planilha_base abre a planilha uma vez (openpyxl read_only, só as primeiras linhas),
+    acha o cabeçalho (sheet_processor.header_finder) e monta o índice nome da coluna -> posição
+2 - As colunas do template salvo são casadas com esse índice pelo nome
+    (mesma normalização de template_manager: minúsculas e espaços simples)
+3 - Os blocos (lotes de transações montados pelo template, ou DataFrames já montados) são
+    gravados de uma vez por file_handler.fill_sheet_chunks: uma passada em streaming pelo XML
+    da aba, sem atribuir célula a célula. O resto da planilha base (outras abas, formatação,
+    validações) é preservado
+
+O arquivo gerado vai para data/saved_files como omie_preenchida_AAAAMMDD.xlsx
+(omie_preenchida_AAAAMMDD_2.xlsx, ... se já existir).
+'''
+
+PASTA_SAIDA = os.path.join("data", "saved_files")
+PREFIXO_PREENCHIDA = "omie_preenchida"
+
+# Modos de escrita
+MODO_ACRESCENTAR = "acrescentar"
+MODO_SUBSTITUIR = "substituir"
+
+
+def indice_colunas(cabecalho):
+    '''
+    Índice nome normalizado da coluna -> posição (0 = coluna A).
+    Colunas sem nome ficam de fora; nomes repetidos valem pela primeira ocorrência.
+    '''
+    indice = {}
+    for posicao, valor in enumerate(cabecalho):
+        nome = template_manager._normalizar_coluna(valor) if valor is not None else ""
+        if nome:
+            indice.setdefault(nome, posicao)
+    return indice
+
+
+def ler_planilha_base(caminho, aba=None):
+    '''
+    Lê o cabeçalho da planilha base (nas primeiras JANELA_CABECALHO linhas da aba).
+
+    Parâmetros:
+    - caminho: str - Planilha base (.xlsx)
+    - aba: str, opcional - Nome da aba (padrão: a aba ativa)
+
+    Retorna:
+    - dict: {"aba", "linha_cabecalho" (1 = primeira linha), "colunas" (nomes na ordem da planilha,
+      "" para colunas sem nome), "indice" (ver indice_colunas)}
+    '''
+    if not os.path.isfile(caminho):
+        raise FileNotFoundError(f"O arquivo {caminho} não foi encontrado.")
+    if not caminho.endswith('.xlsx'):
+        raise ValueError("A planilha base deve ter extensão .xlsx.")
+
+    try:
+        workbook = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    except Exception as e:
+        raise IOError(f"Erro ao ler o arquivo: {e}")
+
+    try:
+        if aba is not None and aba not in workbook.sheetnames:
+            raise ValueError(f"A aba '{aba}' não existe no arquivo.")
+        planilha = workbook[aba] if aba is not None else workbook.active
+        linhas = list(planilha.iter_rows(max_row=sheet_processor.JANELA_CABECALHO + 1, values_only=True))
+        titulo = planilha.title
+    finally:
+        workbook.close()
+
+    largura = max((len(linha) for linha in linhas), default=0)
+    if largura == 0:
+        raise ValueError("A planilha base está vazia.")
+    linhas = [tuple(linha) + (None,) * (largura - len(linha)) for linha in linhas]
+
+    # Mesma convenção de clean_sheet: -1 = cabeçalho na primeira linha
+    df = pd.DataFrame.from_records(linhas[1:], columns=file_handler._nomes_colunas(linhas[0]))
+    posicao = sheet_processor.header_finder(df)
+    linha_cabecalho = 1 if posicao < 0 else posicao + 2
+    cabecalho = linhas[linha_cabecalho - 1]
+
+    return {
+        "aba": titulo,
+        "linha_cabecalho": linha_cabecalho,
+        "colunas": ["" if valor is None else str(valor) for valor in cabecalho],
+        "indice": indice_colunas(cabecalho),
+    }
+
+
+def caminho_planilha_preenchida(pasta=None, data=None):
+    '''
+    Próximo caminho livre para a planilha preenchida: <pasta>/omie_preenchida_AAAAMMDD.xlsx
+    (pasta padrão: PASTA_SAIDA), ou com sufixo _2, _3, ... se já existir um arquivo do mesmo dia.
+    '''
+    if pasta is None:
+        pasta = PASTA_SAIDA
+    base = f"{PREFIXO_PREENCHIDA}_{(data or datetime.now()).strftime('%Y%m%d')}"
+    caminho = os.path.join(pasta, f"{base}.xlsx")
+    numero = 2
+    while os.path.exists(caminho):
+        caminho = os.path.join(pasta, f"{base}_{numero}.xlsx")
+        numero += 1
+    return caminho
+
+
+def _resolver_template(template):
+    if isinstance(template, Template):
+        return template
+    if isinstance(template, str):
+        encontrado = template_manager.get_template(template)
+        if encontrado is None:
+            raise ValueError(f"O template '{template}' não foi encontrado.")
+        return encontrado["template"]
+    raise ValueError("O template deve ser uma instância da classe Template ou o nome de um template salvo.")
+
+
+def _como_blocos(blocos):
+    '''
+    Um bloco sozinho (lote, DataFrame ou lista de Transactions) vira uma lista com ele.
+    '''
+    if isinstance(blocos, (pd.DataFrame, TransactionBatch)):
+        return [blocos]
+    if isinstance(blocos, list) and (not blocos or isinstance(blocos[0], Transaction)):
+        return [blocos]
+    return blocos
+
+
+def _bloco_do_template(bloco, template):
+    '''
+    DataFrame com as colunas do template: lotes de transações passam por
+    output_generator.montar_dataframe; DataFrames (saída do pipeline) são só recortados.
+    '''
+    if isinstance(bloco, pd.DataFrame):
+        faltando = [coluna for coluna in template.colunas if coluna not in bloco.columns]
+        if faltando:
+            raise ValueError(f"Colunas do template ausentes nos dados: {', '.join(faltando)}.")
+        return bloco[template.colunas]
+    return output_generator.montar_dataframe(bloco, template)
+
+
+def preencher_planilha_base(caminho_base, blocos, template, modo=MODO_ACRESCENTAR, caminho_saida=None, aba=None):
+    '''
+    Escreve os dados do pipeline na planilha base, cada coluna do template na coluna
+    de mesmo nome da planilha, e salva o resultado em um novo arquivo.
+
+    Parâmetros:
+    - caminho_base: str - Planilha base (.xlsx); não é alterada
+    - blocos: TransactionBatch, list[Transaction], DataFrame ou iterável de blocos desses tipos
+      (ex: os lotes do pipeline, ou os DataFrames de saída dele já nas colunas do template)
+    - template: Template ou nome de um template salvo - As colunas dele são nomes de colunas
+      da planilha base e o mapeamento diz qual campo da transação vai em cada uma
+    - modo: MODO_ACRESCENTAR (depois da última linha preenchida) ou MODO_SUBSTITUIR
+      (apaga as linhas abaixo do cabeçalho)
+    - caminho_saida: str, opcional - Padrão: caminho_planilha_preenchida()
+    - aba: str, opcional - Aba da planilha base (padrão: a aba ativa)
+
+    Retorna:
+    - dict: {"caminho_saida", "aba", "linha_cabecalho", "linhas_escritas",
+      "colunas": {coluna do template: posição na planilha (0 = A)}}
+    '''
+    template = _resolver_template(template)
+    if modo not in (MODO_ACRESCENTAR, MODO_SUBSTITUIR):
+        raise ValueError(f"O modo deve ser '{MODO_ACRESCENTAR}' ou '{MODO_SUBSTITUIR}'.")
+
+    base = ler_planilha_base(caminho_base, aba)
+    posicoes = {}
+    faltando = []
+    for coluna in template.colunas:
+        posicao = base["indice"].get(template_manager._normalizar_coluna(coluna))
+        if posicao is None:
+            faltando.append(coluna)
+        posicoes[coluna] = posicao
+    if faltando:
+        raise ValueError(f"Colunas do template que não existem na planilha base: {', '.join(faltando)}.")
+
+    if caminho_saida is None:
+        caminho_saida = caminho_planilha_preenchida()
+
+    def blocos_saida():
+        for bloco in _como_blocos(blocos):
+            if len(bloco) > 0:
+                yield _bloco_do_template(bloco, template)
+
+    linhas = file_handler.fill_sheet_chunks(
+        caminho_base, blocos_saida(), caminho_saida, aba=base["aba"], primeira_linha=base["linha_cabecalho"] + 1,
+        substituir=modo == MODO_SUBSTITUIR, posicoes=list(posicoes.values()), permitir_vazias=True,
+    )
+
+    return {
+        "caminho_saida": caminho_saida,
+        "aba": base["aba"],
+        "linha_cabecalho": base["linha_cabecalho"],
+        "linhas_escritas": linhas,
+        "colunas": posicoes,
+    }
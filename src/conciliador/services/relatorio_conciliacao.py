@@ -0,0 +1,224 @@
+# Importações
+import numpy as np
+import pandas as pd
+
+from . import file_handler
+from .conciliacao import como_lote, centavos, numeros_de_dia, tipos_compartilhados, SEM_DATA, CRITERIO_EXATA
+
+#----------Relatório de conciliação (xlsx com várias abas)-------------#
+'''
+Grava o resultado de conciliacao.conciliar / conciliar_com_tolerancia num único .xlsx:
+- Conciliados: um par por linha (data, tipo e valor dos dois lados, critério)
+- Sem par - <esquerda> / Sem par - <direita>: as transações que sobraram, com os campos extras
+- Divergências: pares com diferença de data ou de valor (conciliação com tolerância)
+- Resumo: por dia x tipo de pagamento, quantidade e valor conciliados e sem par de cada lado,
+  com o total de cada tipo e o total geral
+
+As abas são montadas em blocos de linhas direto dos arrays dos lotes (indexação pelas
+posições do resultado) e vão para file_handler.write_sheets_chunks numa passada só:
+nenhuma aba existe inteira em memória. O resumo é um groupby vetorizado.
+'''
+
+FORMATO_VALOR = "#,##0.00"
+
+# Rótulos do resumo
+TOTAL_TIPO = "Total"
+TOTAL_GERAL = "Total geral"
+SEM_DATA_ROTULO = "(sem data)"
+
+
+def _coluna(lote, campo, linhas):
+    '''
+    Valores de um campo do lote só nas linhas pedidas (sem montar a coluna inteira).
+    '''
+    if campo == "data":
+        return lote._data_categorias[lote._data_codigos[linhas]]
+    if campo == "tipo_pagamento":
+        return lote._tipo_categorias[lote._tipo_codigos[linhas]]
+    if campo == "valor":
+        return lote.valor[linhas]
+    return lote.extras[campo][linhas]
+
+
+def _em_blocos(n_linhas, linhas_por_bloco, montar):
+    '''
+    Gera montar(inicio, fim) para cada bloco; com n_linhas = 0 gera um bloco vazio (só o cabeçalho).
+    '''
+    for inicio in range(0, max(n_linhas, 1), linhas_por_bloco):
+        yield montar(inicio, min(inicio + linhas_por_bloco, n_linhas))
+
+
+def _aba_conciliados(pares_e, pares_d, criterios, esquerda, direita, nome_e, nome_d):
+    def montar(inicio, fim):
+        e, d = pares_e[inicio:fim], pares_d[inicio:fim]
+        return pd.DataFrame({
+            f"Nº {nome_e}": e + 1,
+            f"Nº {nome_d}": d + 1,
+            "Tipo": _coluna(esquerda, "tipo_pagamento", e),
+            f"Data {nome_e}": _coluna(esquerda, "data", e),
+            f"Data {nome_d}": _coluna(direita, "data", d),
+            f"Valor {nome_e}": _coluna(esquerda, "valor", e),
+            f"Valor {nome_d}": _coluna(direita, "valor", d),
+            "Critério": criterios[inicio:fim],
+        })
+    return montar
+
+
+def _aba_sem_par(linhas, lote, nome):
+    def montar(inicio, fim):
+        fatia = linhas[inicio:fim]
+        colunas = {
+            f"Nº {nome}": fatia + 1,
+            "Data": _coluna(lote, "data", fatia),
+            "Tipo": _coluna(lote, "tipo_pagamento", fatia),
+            "Valor": _coluna(lote, "valor", fatia),
+        }
+        colunas.update({campo: _coluna(lote, campo, fatia) for campo in lote.extras})
+        return pd.DataFrame(colunas)
+    return montar
+
+
+def _aba_divergencias(pares_e, pares_d, esquerda, direita, dia_e, dia_d, nome_e, nome_d):
+    def montar(inicio, fim):
+        e, d = pares_e[inicio:fim], pares_d[inicio:fim]
+        valor_e, valor_d = _coluna(esquerda, "valor", e), _coluna(direita, "valor", d)
+        return pd.DataFrame({
+            f"Nº {nome_e}": e + 1,
+            f"Nº {nome_d}": d + 1,
+            "Tipo": _coluna(esquerda, "tipo_pagamento", e),
+            f"Data {nome_e}": _coluna(esquerda, "data", e),
+            f"Data {nome_d}": _coluna(direita, "data", d),
+            "Dias": _dias_entre(dia_e[e], dia_d[d]),
+            f"Valor {nome_e}": valor_e,
+            f"Valor {nome_d}": valor_d,
+            "Diferença": (centavos(valor_d) - centavos(valor_e)) / 100,
+        })
+    return montar
+
+
+def _dias_entre(dia_e, dia_d):
+    '''
+    Dias da data da esquerda até a da direita (vazio se alguma das datas for inválida).
+    '''
+    invalida = (dia_e == SEM_DATA) | (dia_d == SEM_DATA)
+    return np.where(invalida, np.nan, dia_d - dia_e)
+
+
+def resumo_por_dia_e_tipo(resultado, esquerda, direita, nomes=("Extrato", "ERP")):
+    '''
+    Tabela dia x tipo de pagamento (tipo canônico) com quantidade e valor conciliados e sem par
+    de cada lado, e a diferença de valor dos pares. Os pares entram pelo dia e tipo da esquerda.
+    Depois dos dias vêm o total de cada tipo (Data = "Total") e o total geral.
+    '''
+    nome_e, nome_d = nomes
+    esquerda, direita = como_lote(esquerda), como_lote(direita)
+    pares_e = resultado["pares"]["linha_esquerda"].to_numpy()
+    pares_d = resultado["pares"]["linha_direita"].to_numpy()
+    sem_par_e, sem_par_d = resultado["sem_par_esquerda"], resultado["sem_par_direita"]
+
+    tipo_e, tipo_d, tipos = tipos_compartilhados(esquerda, direita)
+    dia_e, dia_d = numeros_de_dia(esquerda), numeros_de_dia(direita)
+    valor_e, valor_d = centavos(esquerda.valor), centavos(direita.valor)
+
+    def parte(dias, tipos_linha, **medidas):
+        return pd.DataFrame({"dia": dias, "tipo": tipos_linha, **medidas})
+
+    vazio = np.zeros(0, dtype=np.int64)
+    partes = pd.concat([
+        parte(dia_e[pares_e], tipo_e[pares_e], conciliados=np.ones(len(pares_e), dtype=np.int64),
+              valor_conciliado=valor_e[pares_e], diferenca=valor_d[pares_d] - valor_e[pares_e]),
+        parte(dia_e[sem_par_e], tipo_e[sem_par_e], sem_par_e=np.ones(len(sem_par_e), dtype=np.int64),
+              valor_sem_par_e=valor_e[sem_par_e]),
+        parte(dia_d[sem_par_d], tipo_d[sem_par_d], sem_par_d=np.ones(len(sem_par_d), dtype=np.int64),
+              valor_sem_par_d=valor_d[sem_par_d]),
+        parte(vazio, vazio, conciliados=vazio, valor_conciliado=vazio, diferenca=vazio, sem_par_e=vazio,
+              valor_sem_par_e=vazio, sem_par_d=vazio, valor_sem_par_d=vazio),
+    ], ignore_index=True).fillna(0)
+
+    medidas = ["conciliados", "valor_conciliado", "sem_par_e", "valor_sem_par_e", "sem_par_d", "valor_sem_par_d", "diferenca"]
+    por_dia = partes.groupby(["dia", "tipo"], sort=True)[medidas].sum().reset_index()
+    por_tipo = por_dia.groupby("tipo", sort=True)[medidas].sum().reset_index()
+    geral = por_dia[medidas].sum().to_frame().T
+
+    datas = pd.to_datetime(por_dia["dia"].where(por_dia["dia"] != SEM_DATA), unit="D").dt.strftime("%d/%m/%Y")
+    tabela = pd.concat([
+        por_dia.assign(Data=datas.fillna(SEM_DATA_ROTULO).to_numpy(), Tipo=tipos[por_dia["tipo"]]),
+        por_tipo.assign(Data=TOTAL_TIPO, Tipo=tipos[por_tipo["tipo"]]),
+        geral.assign(Data=TOTAL_GERAL, Tipo=""),
+    ], ignore_index=True)
+
+    for coluna in medidas:
+        if coluna.startswith("valor") or coluna == "diferenca":
+            tabela[coluna] = tabela[coluna] / 100
+        else:
+            tabela[coluna] = tabela[coluna].astype(np.int64)
+    return tabela[["Data", "Tipo"] + medidas].rename(columns={
+        "conciliados": "Conciliados",
+        "valor_conciliado": "Valor conciliado",
+        "sem_par_e": f"Sem par {nome_e}",
+        "valor_sem_par_e": f"Valor sem par {nome_e}",
+        "sem_par_d": f"Sem par {nome_d}",
+        "valor_sem_par_d": f"Valor sem par {nome_d}",
+        "diferenca": "Diferença",
+    })
+
+
+def gerar_relatorio(resultado, esquerda, direita, caminho_saida, nomes=("Extrato", "ERP"),
+                    linhas_por_bloco=file_handler.TAMANHO_BLOCO_PADRAO):
+    '''
+    Grava o relatório de conciliação (abas Conciliados, Sem par de cada lado, Divergências e Resumo).
+
+    Parâmetros:
+    - resultado: dict de conciliacao.conciliar ou conciliar_com_tolerancia
+    - esquerda / direita: os mesmos lotes (ou listas de Transaction) que foram conciliados
+    - caminho_saida: str - Arquivo .xlsx gerado
+    - nomes: (str, str) - Nome de cada lado, usado nas abas e colunas (ex: ("Extrato", "ERP"))
+    - linhas_por_bloco: int - Linhas montadas de cada vez em cada aba
+
+    Retorna:
+    - dict: {"caminho_saida", "conciliados", "sem_par_esquerda", "sem_par_direita", "divergencias"}
+      (linhas gravadas em cada aba)
+    '''
+    # Validações
+    if not isinstance(resultado, dict) or not {"pares", "sem_par_esquerda", "sem_par_direita"} <= resultado.keys():
+        raise ValueError("O resultado deve vir de conciliar ou conciliar_com_tolerancia.")
+    if not isinstance(caminho_saida, str) or not caminho_saida.strip():
+        raise ValueError("O caminho de saída não pode ser vazio.")
+    nome_e, nome_d = nomes
+
+    esquerda, direita = como_lote(esquerda), como_lote(direita)
+    pares = resultado["pares"]
+    pares_e = pares["linha_esquerda"].to_numpy()
+    pares_d = pares["linha_direita"].to_numpy()
+    criterios = pares["criterio"].to_numpy() if "criterio" in pares else np.full(len(pares), CRITERIO_EXATA, dtype=object)
+    sem_par_e = np.asarray(resultado["sem_par_esquerda"])
+    sem_par_d = np.asarray(resultado["sem_par_direita"])
+
+    # Divergência: par com data ou valor (em centavos) diferentes
+    dia_e, dia_d = numeros_de_dia(esquerda), numeros_de_dia(direita)
+    divergente = np.flatnonzero(
+        (centavos(esquerda.valor[pares_e]) != centavos(direita.valor[pares_d])) | (dia_e[pares_e] != dia_d[pares_d])
+    )
+    div_e, div_d = pares_e[divergente], pares_d[divergente]
+
+    abas = [
+        ("Conciliados", _em_blocos(len(pares_e), linhas_por_bloco,
+                                   _aba_conciliados(pares_e, pares_d, criterios, esquerda, direita, nome_e, nome_d))),
+        (f"Sem par - {nome_e}"[:31], _em_blocos(len(sem_par_e), linhas_por_bloco, _aba_sem_par(sem_par_e, esquerda, nome_e))),
+        (f"Sem par - {nome_d}"[:31], _em_blocos(len(sem_par_d), linhas_por_bloco, _aba_sem_par(sem_par_d, direita, nome_d))),
+        ("Divergências", _em_blocos(len(div_e), linhas_por_bloco,
+                                    _aba_divergencias(div_e, div_d, esquerda, direita, dia_e, dia_d, nome_e, nome_d))),
+        ("Resumo", iter([resumo_por_dia_e_tipo(resultado, esquerda, direita, nomes)])),
+    ]
+    formatos = {coluna: FORMATO_VALOR for coluna in (
+        "Valor", f"Valor {nome_e}", f"Valor {nome_d}", "Diferença", "Valor conciliado",
+        f"Valor sem par {nome_e}", f"Valor sem par {nome_d}",
+    )}
+    conciliados, sem_e, sem_d, divergencias, _ = file_handler.write_sheets_chunks(abas, caminho_saida, formatos=formatos)
+    return {
+        "caminho_saida": caminho_saida,
+        "conciliados": conciliados,
+        "sem_par_esquerda": sem_e,
+        "sem_par_direita": sem_d,
+        "divergencias": divergencias,
+    }
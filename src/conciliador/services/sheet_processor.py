@@ -1,5 +1,7 @@
 # Importações
+import numpy as np
 import pandas as pd
+from . import data_mapper
 
 #-----------Funções de Processamento de Planilhas-----------#
 '''
@@ -8,27 +10,59 @@ Aqui serão definidas as funções para:
 - Remover vazios -> remove_empty
 - Desmesclar células -> unmerge_cells
 - Limpar planilhas -> clean_sheet
+- Limpar planilhas em blocos (streaming) -> clean_sheet_chunks
 '''
 
-def header_finder(df):
+# Máximo de linhas preenchidas abaixo de uma célula mesclada
+LIMITE_FFILL = 10
+
+# Quantas linhas do início da planilha são consideradas na busca pelo cabeçalho
+JANELA_CABECALHO = 50
+
+# Fração mínima de células preenchidas para uma linha ser candidata a cabeçalho
+LIMIAR_CABECALHO = 0.7
+
+def _normalizar_celula(valor):
+    return valor.strip().lower() if isinstance(valor, str) else ""
+
+def header_finder(df, janela=None):
     # Lógica para identificar cabeçalhos
     '''
-Vai iterar pelas linhas do DataFrame e identificar a linha que contém os cabeçalhos
-com base em: 
-Se a linha possui mais de 70% de células preenchidas, e ela possui mais de 70% de células que não sejam NaN, 
-ela é considerada o cabeçalho.
+Procura o cabeçalho nas primeiras `janela` linhas (padrão JANELA_CABECALHO), de uma vez só:
+a matriz notna() da janela é calculada uma única vez e cada linha recebe uma pontuação.
+
+São candidatas as linhas com pelo menos 70% (LIMIAR_CABECALHO) de células preenchidas.
+Entre elas vence a de maior pontuação:
+    fração de células preenchidas + fração de células de texto
+    + número de campos obrigatórios (data, tipo, valor) reconhecidos pelos sinônimos do data_mapper
+Em caso de empate vence a primeira. Se nenhuma linha da janela for candidata, retorna 0.
     '''
     if not any("Unnamed" in str(col) for col in df.columns):  # Se não houver NaNs, cancela a busca
         return -1
-    
-    for i in range (len(df)):
-        line = df.iloc[i]
-        filled_cells = line.notna().sum()
-        total_cells = len(line)
-        if filled_cells / total_cells >= 0.7:
-            return i
 
-    return 0
+    if janela is None:
+        janela = JANELA_CABECALHO
+    bloco = df.iloc[:janela]
+    if bloco.empty or bloco.shape[1] == 0:
+        return 0
+
+    preenchidas = bloco.notna().to_numpy()
+    fracao_preenchida = preenchidas.mean(axis=1)
+    candidatas = fracao_preenchida >= LIMIAR_CABECALHO
+    if not candidatas.any():
+        return 0
+
+    textos = np.vectorize(_normalizar_celula, otypes=[object])(bloco.to_numpy(dtype=object))
+    fracao_texto = (textos != "").mean(axis=1)
+
+    # Campos obrigatórios reconhecidos em cada linha (cada campo conta uma vez)
+    campos = np.zeros(len(bloco))
+    for keywords in (data_mapper.data_keywords, data_mapper.tipo_keywords, data_mapper.valor_keywords):
+        contem = np.vectorize(lambda texto: any(keyword in texto for keyword in keywords), otypes=[bool])
+        campos += contem(textos).any(axis=1)
+
+    pontuacao = np.where(candidatas, fracao_preenchida + fracao_texto + campos, -np.inf)
+    return int(np.argmax(pontuacao))
 
 def remove_empty(df):
     # Lógica para remover linhas/colunas vazias
@@ -45,28 +79,128 @@ def unmerge_cells(df):
     '''
 Preenche células mescladas com o valor da célula mais próxima acima.
     '''
-    df = df.ffill(limit=10)  # Preenche valores NaN com o valor mais próximo
+    df = df.ffill(limit=LIMITE_FFILL)  # Preenche valores NaN com o valor mais próximo
     return df
 
 def clean_sheet(df):
     # Orquestra as funções de limpeza
     '''
-Esta função chama as demais funções de limpeza em sequência para preparar a planilha para análise.
+Esta função faz a limpeza completa para preparar a planilha para análise, em uma passada:
     1 - Coloca o header na posição correta
     2 - Remove linhas e colunas vazias
     3 - Desmescla células
+O resultado é o mesmo de encadear header -> remove_empty -> unmerge_cells -> reset_index,
+mas a matriz notna() é calculada uma vez, as máscaras de linhas e colunas são aplicadas
+juntas (uma única cópia) e o ffill é feito coluna a coluna sobre o bloco já recortado.
     '''
     header_index = header_finder(df)
+    inicio = header_index + 1 if header_index >= 0 else 0
+
+    preenchidas = df.notna().to_numpy()[inicio:]
+    linhas = inicio + np.flatnonzero(preenchidas.any(axis=1))  # Linhas com algum valor
+    colunas = np.flatnonzero(preenchidas.any(axis=0))           # Colunas com algum valor
+    preenchidas = preenchidas[linhas - inicio][:, colunas]
 
     # Só redefine cabeçalho se encontrou um (header_index >= 0)
     if header_index >= 0:
-        df.columns = df.iloc[header_index]  # Define a linha do cabeçalho
-        df.columns = df.columns.astype(str)  # Garante que todos os nomes de colunas sejam strings
-        df = df[header_index + 1:]  # Remove linhas acima do cabeçalho
+        nomes = pd.Index(df.iloc[header_index].iloc[colunas]).astype(str)  # Nomes de colunas como strings
 
-    df = remove_empty(df)  # Remove linhas e colunas vazias
-    df = unmerge_cells(df)  # Desmescla células
-    df = df.reset_index(drop=True)  # Reseta o índice
+    df = df.iloc[linhas, colunas]  # Única cópia dos dados
+    if header_index >= 0:
+        df.columns = nomes
+    df.index = pd.RangeIndex(len(df))  # Reseta o índice
+
+    _preencher_mescladas(df, preenchidas)  # Desmescla células
     return df
 
+def _preencher_mescladas(df, preenchidas):
+    '''
+Equivalente a unmerge_cells, coluna a coluna e no próprio DataFrame, usando a matriz
+notna() já calculada. Cada célula vazia recebe o último valor acima dela, se estiver
+a no máximo LIMITE_FFILL linhas de distância.
+    '''
+    posicoes = np.arange(len(df))
+    for j in range(df.shape[1]):
+        vazias = ~preenchidas[:, j]
+        if not vazias.any():
+            continue
+        ultima = np.maximum.accumulate(np.where(vazias, -1, posicoes))  # Última linha preenchida
+        preencher = vazias & (ultima >= 0) & (posicoes - ultima <= LIMITE_FFILL)
+        if preencher.any():
+            # Series.take mantém o dtype da coluna (um array numpy de objetos seria reinferido)
+            coluna = df.iloc[:, j].take(np.where(preencher, ultima, posicoes))
+            df.isetitem(j, coluna.set_axis(df.index))
+
+
+def _nome_vazio(coluna):
+    '''
+    Indica se o nome de coluna veio de uma célula de cabeçalho vazia.
+    '''
+    return coluna in ("nan", "None", "") or coluna.startswith("Unnamed:")
+
+def clean_sheet_chunks(chunks):
+    # Versão em blocos do clean_sheet
+    '''
+Recebe um iterável de DataFrames (ex: file_handler.read_file_chunks) e devolve um
+gerador de blocos limpos, equivalente a aplicar clean_sheet no arquivo inteiro:
+    1 - O cabeçalho é identificado uma única vez, no primeiro bloco, e reaplicado nos demais
+    2 - Linhas vazias são removidas bloco a bloco
+    3 - O ffill continua entre blocos: as últimas LIMITE_FFILL linhas (antes do preenchimento)
+        do bloco anterior entram como contexto do próximo
+    4 - O índice continua entre blocos, como o reset_index do clean_sheet
+
+Diferença: o conjunto de colunas é decidido no primeiro bloco. Só são removidas
+as colunas sem nome de cabeçalho que estejam vazias nesse bloco, para não perder
+dados que apareçam só mais adiante no arquivo. Um bloco mais largo (linhas com mais
+células que o cabeçalho, ver file_handler.read_file_chunks) acrescenta as colunas
+novas no fim, sem nome, com a mesma regra (vazias nesse bloco são descartadas).
+    '''
+    colunas = None
+    manter = None
+    cauda = None
+    inicio = 0
+
+    for df in chunks:
+        if colunas is None:
+            header_index = header_finder(df)
+
+            # Só redefine cabeçalho se encontrou um (header_index >= 0)
+            if header_index >= 0:
+                df.columns = df.iloc[header_index]  # Define a linha do cabeçalho
+                df.columns = df.columns.astype(str)  # Garante que todos os nomes de colunas sejam strings
+                df = df[header_index + 1:]  # Remove linhas acima do cabeçalho
+            colunas = df.columns
+
+            # Colunas sem nome e vazias no primeiro bloco são descartadas em todos os blocos
+            vazias = df.isna().all().to_numpy()
+            manter = ~(vazias & [_nome_vazio(str(coluna)) for coluna in colunas])
+        else:
+            if df.shape[1] > len(colunas):
+                novas = df.iloc[:, len(colunas):]
+                # Sem nome no cabeçalho: "nan" como em clean_sheet, ou o "Unnamed: i" da leitura
+                nomes = pd.Index(["nan"] * novas.shape[1]) if header_index >= 0 else novas.columns
+                manter_novas = novas.notna().any().to_numpy()
+                colunas = colunas.append(nomes)
+                manter = np.concatenate([manter, manter_novas])
+                if cauda is not None:
+                    vazias = pd.DataFrame(np.nan, index=cauda.index, columns=nomes[manter_novas], dtype=object)
+                    cauda = pd.concat([cauda, vazias], axis=1)
+            df.columns = colunas
+
+        df = df.loc[:, manter]
+        df = df.dropna(how='all')  # Remove linhas vazias
+        if df.empty:
+            continue
+
+        # ffill com o contexto do bloco anterior
+        if cauda is not None and not cauda.empty:
+            combinado = pd.concat([cauda, df])
+            preenchido = unmerge_cells(combinado).iloc[len(cauda):]
+        else:
+            combinado = df
+            preenchido = unmerge_cells(df)
+        cauda = combinado.iloc[-LIMITE_FFILL:]
 
+        preenchido.index = pd.RangeIndex(inicio, inicio + len(preenchido))
+        inicio += len(preenchido)
+        yield preenchido
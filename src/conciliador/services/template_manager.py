@@ -1,21 +1,50 @@
 # Importações
 import os
+import copy
 import json
+import sqlite3
+import hashlib
+import itertools
+import threading
 from datetime import datetime
 
+from .. import database
+from ..models.template import Template
+
 TEMPLATE_DIR = os.path.join("data", "templates")
 
+# Campos que um template de origem mapeia para colunas da planilha
+CAMPOS_ORIGEM = ("data", "tipo", "valor")
+
+# Similaridade mínima (Jaccard) para aceitar um template na busca aproximada
+SIMILARIDADE_MINIMA = 0.5
+
  # Funções:
   # - salvar_template(nome, mapping) ->save_template
   # - carregar_template(nome) ->load_template
   # - listar_templates() ->list_templates
   # - deletar_template(nome) ->delete_template
+  # - assinatura do cabeçalho -> header_signature
+  # - identificar template pelo cabeçalho -> resolve_template
+  # - registro em memória -> template_names, get_template, build_template
+  # - cópia no SQLite (database.py, tabela templates) -> gravada por save/delete e lida pelo registro
+
+# Saída padrão (modo "Automático" e templates de origem)
+MAPEAMENTO_PADRAO = {"Data": "data", "Tipo": "tipo_pagamento", "Valor": "valor"}
+
+# Registro em memória dos templates (ver _registro_atual) e índice assinatura -> template
+_registro = None
+_indice = None
+_trava = threading.Lock()
+_versoes = itertools.count(1) # Nunca se repete, mesmo após refresh_templates
 
 
 
-def save_template(nome, mapping):
+def save_template(nome, mapping, cabecalho=None):
     '''
     Salva um template de mapeamento em um arquivo JSON.
+    cabecalho (opcional) guarda a linha de cabeçalho completa da planilha de origem,
+    usada para identificar o template automaticamente (ver resolve_template).
     '''
 
     # Validações
@@ -37,52 +66,44 @@ def save_template(nome, mapping):
         "data_criacao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "mapping": mapping
     }
+    if cabecalho is not None:
+        template_data["cabecalho"] = [str(coluna) for coluna in cabecalho]
 
     # Salva o arquivo JSON
     with open(file_path, "w", encoding="utf-8") as file:
         json.dump(template_data, file, indent=4, ensure_ascii=False)
 
+    # Cópia no banco com a data de modificação do arquivo: o registro não precisa reabrir o JSON
+    _no_banco(database.salvar_template, _pasta_no_banco(), f"{file_name}.json", template_data,
+              os.stat(file_path).st_mtime_ns)
+    _esquecer(f"{file_name}.json")
     return file_path
 
 def load_template(nome):
     '''
     Carrega um template de mapeamento de um arquivo JSON.
     Retorna o dicionário do template ou None se não encontrado.
+    O conteúdo vem do registro em memória (o arquivo só é relido se mudou).
     '''
     # Padroniza o nome do arquivo e carrega ele
     file_name = nome.strip().lower().replace(" ", "_")
-    file_path = os.path.join(TEMPLATE_DIR, f"{file_name}.json")
+    entrada = _registro_atual()["arquivos"].get(f"{file_name}.json")
 
-    # Verifica se o arquivo existe
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (json.JSONDecodeError, IOError):
-            return None # Retorna None se o arquivo estiver corrompido ou ilegível
-    else:
+    # Retorna None se o arquivo não existir ou estiver corrompido/ilegível
+    if entrada is None or entrada["dados"] is None:
         return None
+    return copy.deepcopy(entrada["dados"]) # Cópia: quem chama pode alterar o dicionário
 
 def list_templates():
     '''
     Lista todos os templates de mapeamento disponíveis.
     Retorna uma lista com os nomes dos templates.
     '''
-    # Verifica se o arquivo existe
-    if not os.path.exists(TEMPLATE_DIR):
-        return []
-    
-    # Cria uma lista vazia para salvar a lista de templates
-    templates = []
-
-    # Itera sobre os arquivos no diretório
-    for filename in os.listdir(TEMPLATE_DIR):
-        if filename.endswith(".json"):
-            # Remove a extensão .json para obter o nome do template
-            template_name = filename[:-5].replace("_", " ").title()
-            templates.append(template_name)
-    
-    return sorted(templates)
+    # Remove a extensão .json para obter o nome do template
+    return sorted(
+        filename[:-5].replace("_", " ").title()
+        for filename in _registro_atual()["arquivos"]
+    )
 
 def delete_template(nome):
     '''
@@ -97,7 +118,300 @@ def delete_template(nome):
     if os.path.exists(file_path):
         try:
             os.remove(file_path) # Deleta o arquivo
+            _no_banco(database.deletar_template, _pasta_no_banco(), f"{file_name}.json")
+            _esquecer(f"{file_name}.json")
             return True
         except OSError:
             return False
     return False
+
+
+    ###Registro de templates em memória
+
+def _pasta_no_banco():
+    return os.path.abspath(TEMPLATE_DIR)
+
+def _no_banco(funcao, *args):
+    '''
+    Chama uma função do database. Se o banco falhar (ex: pasta data somente leitura),
+    retorna None e os templates continuam vindo só dos JSON.
+    '''
+    try:
+        return funcao(*args)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"ERRO ao acessar os templates no banco: {e}")
+        return None
+
+def build_template(dados):
+    '''
+    Valida o dicionário de um template salvo e cria o objeto Template de saída.
+    Retorna (template, origem):
+    - template de origem (data/tipo/valor no mapping, ex: banco_inter.json): saída padrão
+      (MAPEAMENTO_PADRAO) e origem = colunas da planilha {"data", "tipo", "valor"}
+    - template de saída: as colunas são as chaves do mapping salvo e origem = None
+    Levanta ValueError/TypeError se o template for inválido.
+    '''
+    if not isinstance(dados, dict):
+        raise TypeError("O template deve ser um objeto JSON.")
+    nome = dados.get("nome")
+    origem = source_columns(dados)
+    if origem is not None:
+        template = Template(nome, list(MAPEAMENTO_PADRAO), dict(MAPEAMENTO_PADRAO), dados.get("formatacao"))
+    else:
+        mapping = dados.get("mapping", {})
+        colunas = list(mapping.keys()) if isinstance(mapping, dict) else []
+        template = Template(nome, colunas, mapping, dados.get("formatacao"))
+    return template, origem
+
+def _ler_arquivo(caminho, mtime, copia=None):
+    '''
+    Lê e valida um arquivo de template. Arquivos ilegíveis ou inválidos entram no registro
+    com dados/template None (ou com o erro de validação), para não serem relidos sem mudar.
+    copia é a linha do banco para o arquivo (ver database.templates_da_pasta): com a mesma
+    data de modificação, os dados vêm dela e o JSON não é reaberto.
+    '''
+    entrada = {"mtime": mtime, "dados": None, "template": None, "origem": None, "erro": None}
+    try:
+        if copia is not None and copia["mtime"] == mtime:
+            entrada["dados"] = copia["dados"]
+        else:
+            with open(caminho, "r", encoding="utf-8") as file:
+                entrada["dados"] = json.load(file)
+        entrada["template"], entrada["origem"] = build_template(entrada["dados"])
+    except (json.JSONDecodeError, IOError, UnicodeDecodeError) as e:
+        entrada["dados"] = None
+        entrada["erro"] = str(e)
+    except (TypeError, ValueError) as e:
+        entrada["erro"] = str(e)
+    return entrada
+
+def _registro_atual():
+    '''
+    Retorna o registro {"diretorio", "mtime", "arquivos": {arquivo.json: entrada}, "versao"},
+    atualizando só o que mudou no disco:
+    - diretório com a mesma data de modificação: só confere a data de cada arquivo conhecido
+    - diretório alterado (arquivo criado/removido/renomeado): relista e relê os arquivos novos ou alterados
+    Os arquivos a ler vêm da cópia no banco quando ela tem a mesma data de modificação; os lidos
+    do disco atualizam a cópia, e os que sumiram da pasta saem dela.
+    versao aumenta a cada mudança (usado pelo índice de assinaturas).
+    '''
+    global _registro
+    with _trava:
+        registro = _registro
+        if registro is None or registro["diretorio"] != TEMPLATE_DIR:
+            registro = {"diretorio": TEMPLATE_DIR, "mtime": None, "arquivos": {}, "versao": next(_versoes)}
+
+        try:
+            mtime_diretorio = os.stat(TEMPLATE_DIR).st_mtime_ns
+        except FileNotFoundError:
+            if registro["arquivos"]:
+                registro = dict(registro, arquivos={}, versao=next(_versoes))
+            _registro = dict(registro, mtime=None)
+            return _registro
+
+        arquivos = registro["arquivos"]
+        if mtime_diretorio == registro["mtime"]:
+            nomes = list(arquivos)
+        else:
+            nomes = [filename for filename in os.listdir(TEMPLATE_DIR) if filename.endswith(".json")]
+
+        novos = {}
+        copias = None # Cópias do banco, consultadas só se algum arquivo precisar ser lido
+        pasta = _pasta_no_banco()
+        mudou = set(nomes) != set(arquivos)
+        for filename in nomes:
+            caminho = os.path.join(TEMPLATE_DIR, filename)
+            try:
+                mtime = os.stat(caminho).st_mtime_ns
+            except FileNotFoundError:
+                mudou = True
+                continue
+            entrada = arquivos.get(filename)
+            if entrada is None or entrada["mtime"] != mtime:
+                if copias is None:
+                    copias = _no_banco(database.templates_da_pasta, pasta) or {}
+                copia = copias.get(filename)
+                entrada = _ler_arquivo(caminho, mtime, copia)
+                if copia is None or copia["mtime"] != mtime:
+                    if isinstance(entrada["dados"], dict):
+                        _no_banco(database.salvar_template, pasta, filename, entrada["dados"], mtime)
+                    elif copia is not None:
+                        _no_banco(database.deletar_template, pasta, filename)
+                mudou = True
+            novos[filename] = entrada
+
+        # Arquivos removidos fora do aplicativo saem também do banco
+        for filename in (set(arquivos) | set(copias or ())) - set(novos):
+            _no_banco(database.deletar_template, pasta, filename)
+
+        # O registro é trocado inteiro (nunca alterado), então leitores em outras threads
+        # sempre veem uma versão consistente
+        _registro = {
+            "diretorio": TEMPLATE_DIR,
+            "mtime": mtime_diretorio,
+            "arquivos": novos,
+            "versao": next(_versoes) if mudou else registro["versao"],
+        }
+        return _registro
+
+def _esquecer(filename):
+    '''
+    Força a releitura de um arquivo salvo/deletado por este processo (a data de
+    modificação pode não mudar se duas gravações caírem no mesmo instante).
+    '''
+    global _registro
+    with _trava:
+        if _registro is not None:
+            arquivos = {chave: entrada for chave, entrada in _registro["arquivos"].items() if chave != filename}
+            _registro = dict(_registro, arquivos=arquivos, mtime=None, versao=next(_versoes))
+
+def refresh_templates():
+    '''
+    Descarta o registro em memória: a próxima consulta relê todos os templates.
+    '''
+    global _registro
+    with _trava:
+        _registro = None
+
+def _templates_validos(registro=None):
+    '''
+    Templates válidos do registro, por nome de exibição ("nome" do JSON).
+    '''
+    if registro is None:
+        registro = _registro_atual()
+    validos = {}
+    for filename, entrada in sorted(registro["arquivos"].items()):
+        if entrada["template"] is not None:
+            validos.setdefault(entrada["template"].nome, entrada)
+    return validos
+
+def template_names():
+    '''
+    Nomes de exibição dos templates válidos, em ordem alfabética (para o menu da interface).
+    '''
+    return sorted(_templates_validos())
+
+def get_template(nome):
+    '''
+    Retorna o template salvo com esse nome, já validado, sem acessar o disco se nada mudou:
+    {"template": Template, "origem": colunas de origem ou None (ver build_template), "dados": JSON salvo}
+    Retorna None se não existir ou for inválido. Aceita o nome de exibição ou o do arquivo.
+    '''
+    registro = _registro_atual()
+    entrada = _templates_validos(registro).get(nome)
+    if entrada is None:
+        file_name = nome.strip().lower().replace(" ", "_")
+        entrada = registro["arquivos"].get(f"{file_name}.json")
+    if entrada is None or entrada["template"] is None:
+        return None
+    return {"template": entrada["template"], "origem": entrada["origem"], "dados": entrada["dados"]}
+
+
+    ###Identificação do template pelo cabeçalho da planilha
+
+def _normalizar_coluna(coluna):
+    '''
+    Normaliza um nome de coluna para comparação: minúsculas e espaços simples.
+    Colunas sem nome (vazias, "nan", "Unnamed: n") viram string vazia.
+    '''
+    nome = " ".join(str(coluna).split()).lower()
+    if nome in ("nan", "none") or nome.startswith("unnamed:"):
+        return ""
+    return nome
+
+def header_signature(colunas):
+    '''
+    Assinatura de um conjunto de colunas: hash dos nomes normalizados, sem colunas
+    sem nome, em ordem alfabética (a ordem das colunas na planilha não importa).
+    '''
+    nomes = sorted({nome for nome in map(_normalizar_coluna, colunas) if nome})
+    return hashlib.sha1("\x1f".join(nomes).encode("utf-8")).hexdigest()
+
+def source_columns(template):
+    '''
+    Colunas da planilha de origem usadas pelo template: os valores de data/tipo/valor
+    no mapping (ex: banco_inter.json). Retorna None se o template não for desse tipo.
+    '''
+    mapping = template.get("mapping")
+    if not isinstance(mapping, dict) or not all(isinstance(mapping.get(campo), str) for campo in CAMPOS_ORIGEM):
+        return None
+    return {campo: mapping[campo] for campo in CAMPOS_ORIGEM}
+
+def _indice_assinaturas():
+    '''
+    Monta o índice assinatura -> nome do template a partir do registro, e só o refaz
+    quando o registro muda. Cada template de origem entra pela assinatura das colunas
+    do mapping e, se salvo, pela do cabeçalho completo.
+    '''
+    global _indice
+    registro = _registro_atual()
+    chave = (registro["diretorio"], registro["versao"])
+    if _indice is not None and _indice["chave"] == chave:
+        return _indice
+
+    assinaturas = {}
+    templates = {}
+    for nome, entrada in _templates_validos(registro).items():
+        template = entrada["dados"]
+        if entrada["origem"] is None:
+            continue
+        templates[nome] = template
+        assinaturas.setdefault(header_signature(entrada["origem"].values()), nome)
+        if template.get("cabecalho"):
+            assinaturas.setdefault(header_signature(template["cabecalho"]), nome)
+
+    _indice = {"chave": chave, "assinaturas": assinaturas, "templates": templates}
+    return _indice
+
+def resolve_template(colunas):
+    '''
+    Identifica o template salvo que corresponde ao cabeçalho de uma planilha limpa.
+
+    1 - Busca direta (O(1)) pela assinatura do cabeçalho no índice
+    2 - Se não houver, busca aproximada: entre os templates cujas colunas do mapping
+        existem todas na planilha, o de maior similaridade de Jaccard com o cabeçalho
+        (cabeçalho salvo, ou as colunas do mapping). Templates com cabeçalho salvo
+        precisam de similaridade >= SIMILARIDADE_MINIMA
+
+    Retorna None ou {"nome", "template", "colunas": {campo: coluna real da planilha}, "confianca"}.
+    '''
+    colunas = list(colunas)
+    reais = {}
+    for coluna in colunas:
+        reais.setdefault(_normalizar_coluna(coluna), coluna)
+    reais.pop("", None)
+
+    def resultado(nome, confianca):
+        template = indice["templates"][nome]
+        origem = source_columns(template)
+        try:
+            mapeadas = {campo: reais[_normalizar_coluna(coluna)] for campo, coluna in origem.items()}
+        except KeyError:
+            return None # Assinatura igual, mas o mapping aponta para colunas que não existem
+        return {"nome": nome, "template": template, "colunas": mapeadas, "confianca": confianca}
+
+    indice = _indice_assinaturas()
+    nome = indice["assinaturas"].get(header_signature(colunas))
+    if nome is not None:
+        encontrado = resultado(nome, 1.0)
+        if encontrado is not None:
+            return encontrado
+
+    # Busca aproximada (só quando a busca direta falha)
+    presentes = set(reais)
+    melhor = None
+    for nome, template in indice["templates"].items():
+        origem = {_normalizar_coluna(coluna) for coluna in source_columns(template).values()}
+        if not origem <= presentes:
+            continue
+        cabecalho = {_normalizar_coluna(coluna) for coluna in template.get("cabecalho") or []} - {""}
+        referencia = cabecalho or origem
+        similaridade = len(referencia & presentes) / len(referencia | presentes)
+        if cabecalho and similaridade < SIMILARIDADE_MINIMA:
+            continue
+        if melhor is None or similaridade > melhor[1]:
+            melhor = (nome, similaridade)
+
+    if melhor is None:
+        return None
+    return resultado(melhor[0], round(melhor[1], 3))
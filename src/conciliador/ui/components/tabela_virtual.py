@@ -0,0 +1,456 @@
+# Importações
+import math
+import time
+import tkinter as tk
+from tkinter import ttk
+from tkinter import font as tkfont
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#----------Tabela virtualizada para DataFrames grandes-------------
+'''
+Exibe um DataFrame de qualquer tamanho em um Canvas sem criar um widget por célula:
+- ModeloTabela formata as linhas sob demanda, em blocos de TAMANHO_BLOCO linhas
+  guardados num cache LRU (rolar de volta não formata de novo)
+- TabelaVirtual desenha só as linhas que cabem na tela. Os itens de texto do Canvas
+  formam um pool fixo (linhas visíveis x colunas) que é reaproveitado a cada rolagem:
+  rolar só troca o texto dos itens, nunca cria ou destrói widgets
+- A rolagem vertical é lógica (índice da primeira linha), então o Canvas não
+  precisa de uma área de rolagem proporcional ao número de linhas
+- Dados novos aparecem na hora (só o primeiro bloco é formatado e medido); o ajuste
+  da largura das colunas e a formatação antecipada correm em fatias curtas com a
+  interface ociosa (after_idle), e blocos podem ser acrescentados durante a importação
+'''
+
+CORES_CLARAS = {
+    "fundo": "#FFFFFF",
+    "zebra": "#F2F4F7",
+    "cabecalho": "#DCE4EE",
+    "texto": "#1A1A1A",
+    "grade": "#D0D5DD",
+}
+
+CORES_ESCURAS = {
+    "fundo": "#2B2B2B",
+    "zebra": "#323232",
+    "cabecalho": "#1F538D",
+    "texto": "#DCE4EE",
+    "grade": "#3F3F3F",
+}
+
+
+def formatar_coluna(serie):
+    '''
+    Formata uma coluna para exibição (lista de str):
+    vazios -> "", números com 2 casas no padrão brasileiro ("1.234,56"),
+    inteiros sem casas, datas como DD/MM/AAAA (com hora se houver).
+    '''
+    valores = serie.to_numpy()
+    tipo = valores.dtype.kind
+
+    if tipo in "iu":
+        return [str(v) for v in valores.tolist()]
+    if tipo == "f":
+        return [_numero_br(v) if v == v else "" for v in valores.tolist()]
+    if tipo == "b":
+        return ["Sim" if v else "Não" for v in valores.tolist()]
+    if tipo == "M":
+        return [_data_br(v) for v in serie.tolist()]
+    return [v if type(v) is str else formatar_valor(v) for v in serie.tolist()]
+
+
+def formatar_valor(valor):
+    '''
+    Formata um valor de tipo qualquer (mesmas regras de formatar_coluna).
+    '''
+    if valor is None or valor is pd.NaT:
+        return ""
+    if isinstance(valor, (bool, np.bool_)):
+        return "Sim" if valor else "Não"
+    if isinstance(valor, (int, np.integer)):
+        return str(valor)
+    if isinstance(valor, (float, np.floating)):
+        return _numero_br(float(valor)) if valor == valor else ""
+    if isinstance(valor, pd.Timestamp):
+        return _data_br(valor)
+    return str(valor)
+
+
+def _numero_br(valor):
+    if math.isinf(valor):
+        return str(valor)
+    return f"{valor:,.2f}".translate(_PONTO_VIRGULA)
+
+
+_PONTO_VIRGULA = str.maketrans(",.", ".,")
+
+
+def _data_br(valor):
+    if valor is pd.NaT or valor is None:
+        return ""
+    if valor.hour or valor.minute or valor.second:
+        return valor.strftime("%d/%m/%Y %H:%M:%S")
+    return valor.strftime("%d/%m/%Y")
+
+
+class ModeloTabela:
+    '''
+    Fonte de dados da TabelaVirtual: entrega janelas de linhas já formatadas de um DataFrame.
+    Aceita novos blocos no fim (acrescentar), para exibir a saída enquanto ela é gerada.
+    '''
+
+    TAMANHO_BLOCO = 128
+    BLOCOS_EM_CACHE = 128
+
+    def __init__(self, df):
+        self.colunas = [str(coluna) for coluna in df.columns]
+        # Números alinhados à direita, o resto à esquerda
+        self.alinhamentos = ["e" if df.dtypes.iloc[i].kind in "iuf" else "w" for i in range(len(self.colunas))]
+        self._partes = [] # Colunas (Series, sem cópia) de cada DataFrame recebido
+        self._inicios = [] # Primeira linha de cada parte
+        self._total = 0
+        self._blocos = OrderedDict()
+        self.acrescentar(df)
+
+    def __len__(self):
+        return self._total
+
+    def acrescentar(self, df):
+        '''
+        Acrescenta as linhas de df (mesmas colunas) ao fim da tabela.
+        '''
+        if [str(coluna) for coluna in df.columns] != self.colunas:
+            raise ValueError("O bloco não tem as mesmas colunas da tabela.")
+        if len(df) == 0:
+            return
+
+        # O último bloco formatado pode ter ficado incompleto
+        self._blocos.pop(self._total // self.TAMANHO_BLOCO, None)
+        self._inicios.append(self._total)
+        self._partes.append([df.iloc[:, i] for i in range(df.shape[1])])
+        self._total += len(df)
+
+    def _bloco(self, indice):
+        '''
+        Linhas formatadas do bloco indice (lista de tuplas), com cache LRU.
+        '''
+        bloco = self._blocos.get(indice)
+        if bloco is not None:
+            self._blocos.move_to_end(indice)
+            return bloco
+
+        inicio = indice * self.TAMANHO_BLOCO
+        fim = min(inicio + self.TAMANHO_BLOCO, len(self))
+        if not self.colunas:
+            bloco = [()] * (fim - inicio)
+        else:
+            # O bloco pode atravessar mais de uma parte
+            bloco = []
+            parte = bisect_right(self._inicios, inicio) - 1
+            while inicio < fim:
+                base = self._inicios[parte]
+                series = self._partes[parte]
+                ate = min(fim, base + len(series[0]))
+                colunas = [formatar_coluna(serie.iloc[inicio - base:ate - base]) for serie in series]
+                bloco.extend(zip(*colunas))
+                inicio = ate
+                parte += 1
+
+        self._blocos[indice] = bloco
+        if len(self._blocos) > self.BLOCOS_EM_CACHE:
+            self._blocos.popitem(last=False)
+        return bloco
+
+    def linhas(self, inicio, fim):
+        '''
+        Linhas formatadas de inicio até fim (exclusivo), limitadas ao tamanho da tabela.
+        '''
+        inicio = max(0, inicio)
+        fim = min(fim, len(self))
+        resultado = []
+        while inicio < fim:
+            indice, deslocamento = divmod(inicio, self.TAMANHO_BLOCO)
+            bloco = self._bloco(indice)
+            trecho = bloco[deslocamento:deslocamento + (fim - inicio)]
+            resultado.extend(trecho)
+            inicio += len(trecho)
+        return resultado
+
+    def larguras(self, inicio=0, fim=TAMANHO_BLOCO, minimo=4, maximo=40):
+        '''
+        Largura de cada coluna em caracteres: cabeçalho e as linhas de inicio até fim,
+        entre minimo e maximo.
+        '''
+        larguras = [len(coluna) for coluna in self.colunas]
+        for linha in self.linhas(inicio, fim):
+            larguras = [max(largura, len(texto)) for largura, texto in zip(larguras, linha)]
+        return [min(max(largura, minimo), maximo) for largura in larguras]
+
+
+def limitar_primeira_linha(primeira, visiveis, total):
+    '''
+    Índice válido da primeira linha exibida: a última página fica cheia e nunca passa do fim.
+    '''
+    return max(0, min(primeira, total - visiveis))
+
+
+def cortar_texto(texto, limite):
+    '''
+    Corta o texto em limite caracteres (com "…") para não invadir a coluna vizinha.
+    '''
+    if len(texto) <= limite:
+        return texto
+    return texto[:max(limite - 1, 0)] + "…"
+
+
+class TabelaVirtual(tk.Frame):
+    '''
+    Grade somente leitura para DataFrames grandes (ver comentário do módulo).
+    definir_dados(df) troca o conteúdo, acrescentar_dados(df) inclui linhas no fim;
+    rolar_para(linha) posiciona a primeira linha visível.
+    '''
+
+    ALTURA_LINHA = 22
+    MARGEM = 6
+    # Linhas medidas na hora ao exibir dados novos
+    PREVIA_LINHAS = ModeloTabela.TAMANHO_BLOCO
+    # Linhas usadas (no máximo) para calcular a largura das colunas
+    LINHAS_AMOSTRA = 10_000
+    # Duração máxima de cada fatia de preparo (ms)
+    ORCAMENTO_MS = 4
+
+    def __init__(self, master, cores=None, fonte=("Segoe UI", 10), **kwargs):
+        self.cores = dict(CORES_CLARAS, **(cores or {}))
+        super().__init__(master, bg=self.cores["fundo"], **kwargs)
+
+        self.fonte = fonte
+        self.modelo = ModeloTabela(pd.DataFrame())
+        self.primeira = 0
+        self._x = [0] # Início de cada coluna (px) e, no fim, a largura total
+        self._larguras = [] # Largura de cada coluna (caracteres)
+        self._limites = [] # Caracteres que cabem em cada coluna
+        self._medidas = 0 # Linhas já consideradas nas larguras
+        self._itens = [] # Pool: (fundo, [texto por coluna]) por linha visível
+        self._redesenho_agendado = False
+        self._preparo_agendado = False
+
+        self.cabecalho = tk.Canvas(self, height=self.ALTURA_LINHA, bg=self.cores["cabecalho"], highlightthickness=0)
+        self.corpo = tk.Canvas(self, bg=self.cores["fundo"], highlightthickness=0)
+        self.barra_vertical = ttk.Scrollbar(self, orient="vertical", command=self._rolar_vertical)
+        self.barra_horizontal = ttk.Scrollbar(self, orient="horizontal", command=self._rolar_horizontal)
+        self.corpo.configure(xscrollcommand=self.barra_horizontal.set)
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.cabecalho.grid(row=0, column=0, sticky="ew")
+        self.corpo.grid(row=1, column=0, sticky="nsew")
+        self.barra_vertical.grid(row=1, column=1, sticky="ns")
+        self.barra_horizontal.grid(row=2, column=0, sticky="ew")
+
+        self.corpo.bind("<Configure>", lambda event: self._agendar_redesenho())
+        for widget in (self.corpo, self.cabecalho):
+            widget.bind("<MouseWheel>", self._roda_do_mouse)
+            widget.bind("<Shift-MouseWheel>", self._roda_do_mouse_horizontal)
+            widget.bind("<Button-4>", lambda event: self._rolar_vertical("scroll", -3, "units"))
+            widget.bind("<Button-5>", lambda event: self._rolar_vertical("scroll", 3, "units"))
+
+    # ---------- Dados ----------
+
+    def definir_dados(self, df, manter_posicao=False):
+        '''
+        Exibe um novo DataFrame (volta para a primeira linha, a não ser com manter_posicao).
+        Só o primeiro bloco é medido na hora; as larguras das colunas se ajustam
+        aos poucos, em fatias (ver _preparar_fatia).
+        '''
+        colunas_anteriores = self.modelo.colunas
+        self.modelo = ModeloTabela(df)
+        larguras = self.modelo.larguras(0, self.PREVIA_LINHAS)
+        manter_posicao = manter_posicao and self.modelo.colunas == colunas_anteriores
+        if manter_posicao:
+            larguras = [max(nova, atual) for nova, atual in zip(larguras, self._larguras)]
+        else:
+            self.primeira = 0
+        self._medidas = min(self.PREVIA_LINHAS, len(self.modelo))
+        self._aplicar_larguras(larguras, voltar_ao_inicio=not manter_posicao)
+        self._agendar_preparo()
+
+    def acrescentar_dados(self, df):
+        '''
+        Acrescenta linhas ao fim da tabela sem mudar a posição de rolagem.
+        Com a tabela vazia, equivale a definir_dados(df).
+        '''
+        if len(self.modelo) == 0:
+            self.definir_dados(df)
+            return
+        self.modelo.acrescentar(df)
+        self._agendar_preparo()
+        self._agendar_redesenho()
+
+    def limpar(self):
+        '''
+        Esvazia a tabela (ex: prévia de uma importação que foi cancelada ou falhou).
+        '''
+        self.definir_dados(pd.DataFrame())
+
+    def _aplicar_larguras(self, larguras, voltar_ao_inicio=True):
+        '''
+        Posiciona as colunas com as larguras dadas (em caracteres) e redesenha.
+        '''
+        self._larguras = larguras
+        largura_caractere = tkfont.Font(font=self.fonte).measure("0")
+        pixels = [largura * largura_caractere + 2 * self.MARGEM for largura in larguras]
+        self._x = [0]
+        for largura in pixels:
+            self._x.append(self._x[-1] + largura)
+        self._limites = list(larguras)
+
+        # Colunas mudaram: o pool é refeito no próximo desenho
+        self._descartar_pool()
+        self._desenhar_cabecalho()
+        self.corpo.configure(scrollregion=(0, 0, self._x[-1], 0))
+        self.cabecalho.configure(scrollregion=(0, 0, self._x[-1], 0))
+        if voltar_ao_inicio:
+            self.corpo.xview_moveto(0)
+            self.cabecalho.xview_moveto(0)
+        self._redesenhar()
+
+    # ---------- Preparo em fatias ----------
+
+    def _agendar_preparo(self):
+        if not self._preparo_agendado:
+            self._preparo_agendado = True
+            self.after_idle(self._preparar_fatia)
+
+    def _preparar_fatia(self):
+        '''
+        Uma fatia de no máximo ORCAMENTO_MS de trabalho com a interface ociosa: mede mais
+        linhas da amostra de larguras (alargando as colunas se preciso) e formata com
+        antecedência a página seguinte à visível. Se sobrar trabalho, agenda outra fatia;
+        os eventos da interface são atendidos entre uma fatia e outra.
+        '''
+        self._preparo_agendado = False
+        limite = time.perf_counter() + self.ORCAMENTO_MS / 1000
+        alvo = min(len(self.modelo), self.LINHAS_AMOSTRA)
+
+        larguras = self._larguras
+        while self._medidas < alvo and time.perf_counter() < limite:
+            fim = min(alvo, self._medidas + ModeloTabela.TAMANHO_BLOCO)
+            larguras = [max(atual, nova) for atual, nova in zip(larguras, self.modelo.larguras(self._medidas, fim))]
+            self._medidas = fim
+
+        if time.perf_counter() < limite:
+            visiveis = self._visiveis()
+            self.modelo.linhas(self.primeira + visiveis, self.primeira + 2 * visiveis)
+
+        if larguras != self._larguras:
+            self._aplicar_larguras(larguras, voltar_ao_inicio=False)
+        if self._medidas < alvo:
+            self._agendar_preparo()
+
+    def _desenhar_cabecalho(self):
+        self.cabecalho.delete("all")
+        for coluna, nome in enumerate(self.modelo.colunas):
+            x0, x1 = self._x[coluna], self._x[coluna + 1]
+            self.cabecalho.create_line(x1 - 1, 0, x1 - 1, self.ALTURA_LINHA, fill=self.cores["grade"])
+            self.cabecalho.create_text(
+                x0 + self.MARGEM, self.ALTURA_LINHA // 2, anchor="w", fill=self.cores["texto"],
+                font=(self.fonte[0], self.fonte[1], "bold"), text=cortar_texto(nome, self._limites[coluna]),
+            )
+
+    # ---------- Pool de itens ----------
+
+    def _visiveis(self):
+        return max(1, self.corpo.winfo_height() // self.ALTURA_LINHA + 1)
+
+    def _descartar_pool(self):
+        self.corpo.delete("all")
+        self._itens = []
+
+    def _ajustar_pool(self, visiveis):
+        '''
+        Cria (ou apaga) linhas do pool até ter uma por linha visível.
+        '''
+        while len(self._itens) > visiveis:
+            fundo, textos = self._itens.pop()
+            self.corpo.delete(fundo, *textos)
+
+        while len(self._itens) < visiveis:
+            linha = len(self._itens)
+            y0 = linha * self.ALTURA_LINHA
+            fundo = self.corpo.create_rectangle(0, y0, self._x[-1], y0 + self.ALTURA_LINHA, width=0)
+            textos = []
+            for coluna, alinhamento in enumerate(self.modelo.alinhamentos):
+                x = self._x[coluna] + self.MARGEM if alinhamento == "w" else self._x[coluna + 1] - self.MARGEM
+                textos.append(self.corpo.create_text(
+                    x, y0 + self.ALTURA_LINHA // 2, anchor=alinhamento, fill=self.cores["texto"], font=self.fonte))
+            self._itens.append((fundo, textos))
+
+    # ---------- Desenho ----------
+
+    def _agendar_redesenho(self):
+        # Vários eventos de rolagem/redimensionamento seguidos viram um único redesenho
+        if not self._redesenho_agendado:
+            self._redesenho_agendado = True
+            self.after_idle(self._redesenhar)
+
+    def _redesenhar(self):
+        self._redesenho_agendado = False
+        visiveis = self._visiveis()
+        self._ajustar_pool(visiveis)
+        self.primeira = limitar_primeira_linha(self.primeira, visiveis - 1, len(self.modelo))
+
+        linhas = self.modelo.linhas(self.primeira, self.primeira + visiveis)
+        for posicao, (fundo, textos) in enumerate(self._itens):
+            linha = linhas[posicao] if posicao < len(linhas) else None
+            if linha is None:
+                self.corpo.itemconfigure(fundo, fill=self.cores["fundo"])
+                for texto in textos:
+                    self.corpo.itemconfigure(texto, text="")
+                continue
+            zebra = (self.primeira + posicao) % 2
+            self.corpo.itemconfigure(fundo, fill=self.cores["zebra"] if zebra else self.cores["fundo"])
+            for texto, valor, limite in zip(textos, linha, self._limites):
+                self.corpo.itemconfigure(texto, text=cortar_texto(valor, limite))
+
+        self.barra_vertical.set(*self.fracoes_visiveis(visiveis - 1))
+
+    def fracoes_visiveis(self, visiveis):
+        '''
+        Fração (início, fim) das linhas visíveis, no formato de Scrollbar.set.
+        '''
+        total = len(self.modelo)
+        if total <= visiveis or total == 0:
+            return 0.0, 1.0
+        return self.primeira / total, min(1.0, (self.primeira + visiveis) / total)
+
+    # ---------- Rolagem ----------
+
+    def rolar_para(self, primeira):
+        '''
+        Posiciona a primeira linha visível (limitada ao tamanho dos dados).
+        '''
+        primeira = limitar_primeira_linha(int(primeira), self._visiveis() - 1, len(self.modelo))
+        if primeira != self.primeira:
+            self.primeira = primeira
+            self._agendar_redesenho()
+
+    def _rolar_vertical(self, acao, valor, unidade=None):
+        # Mesmo protocolo do comando de uma Scrollbar ("moveto", fração) / ("scroll", n, "units"|"pages")
+        if acao == "moveto":
+            self.rolar_para(round(float(valor) * len(self.modelo)))
+        elif acao == "scroll":
+            passo = max(1, self._visiveis() - 2) if unidade == "pages" else 1
+            self.rolar_para(self.primeira + int(valor) * passo)
+
+    def _rolar_horizontal(self, *args):
+        self.corpo.xview(*args)
+        self.cabecalho.xview(*args)
+
+    def _roda_do_mouse(self, event):
+        self._rolar_vertical("scroll", -3 if event.delta > 0 else 3, "units")
+
+    def _roda_do_mouse_horizontal(self, event):
+        self._rolar_horizontal("scroll", -3 if event.delta > 0 else 3, "units")
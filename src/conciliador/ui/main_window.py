@@ -1,6 +1,8 @@
+import os
 import customtkinter as ctk
 # Importa a nova classe controller
 from .ui_controller import UIController
+from .components.tabela_virtual import TabelaVirtual, CORES_CLARAS, CORES_ESCURAS
 
 ctk.set_appearance_mode("system")
 
@@ -24,6 +26,9 @@ class MainWindow(ctk.CTk):
         self.criar_header()
         self.criar_area_central()
 
+        # Primeira página do histórico de conciliações
+        self.controller.carregar_historico()
+
     # ==================================================================================
     # HEADER
     # ==================================================================================
@@ -88,17 +93,19 @@ class MainWindow(ctk.CTk):
         template_label = ctk.CTkLabel(left_frame, text="Template de Mapeamento:", anchor="w")
         template_label.pack(pady=(10, 5), padx=20, fill="x")
 
-        # A view não busca mais os dados, ela apenas é construída.
-        # A lógica de carregar os templates será chamada pelo controller.
-        templates_disponiveis = ["Automático", "Banco Inter", "Nubank"]
+        # A view não busca os dados: os nomes vêm do controller (registro de templates).
+        templates_disponiveis = self.controller.nomes_templates()
 
         # A ação do menu é delegada para o controller.
-        template_option_menu = ctk.CTkOptionMenu(
+        self.template_option_menu = ctk.CTkOptionMenu(
             left_frame,
             values=templates_disponiveis,
             command=self.controller.on_template_select
         )
-        template_option_menu.pack(pady=(0, 20), padx=20, fill="x")
+        self.template_option_menu.pack(pady=(0, 20), padx=20, fill="x")
+
+        # Templates criados/alterados/removidos no disco aparecem quando a janela recebe foco
+        self.bind("<FocusIn>", self.controller.atualizar_lista_templates, add="+")
 
         # ONDE PROGRAMAR (5): Ler o estado deste checkbox.
         # Após o `DataMapper` retornar a lista de erros, verifique o estado com `log_checkbox.get()`.
@@ -106,6 +113,36 @@ class MainWindow(ctk.CTk):
         log_checkbox = ctk.CTkCheckBox(left_frame, text="Salvar log de erros")
         log_checkbox.pack(pady=(20, 10), padx=20, fill="x")
 
+        # --- Seção de Importação em Lote ---
+        # Várias planilhas (ou uma pasta inteira) processadas em paralelo pelo controller.
+        lote_label = ctk.CTkLabel(left_frame, text="Importação em lote:", anchor="w")
+        lote_label.pack(pady=(20, 5), padx=20, fill="x")
+
+        self.consolidar_checkbox = ctk.CTkCheckBox(left_frame, text="Consolidar em uma planilha")
+        self.consolidar_checkbox.pack(pady=(0, 10), padx=20, fill="x")
+
+        self.lote_arquivos_button = ctk.CTkButton(
+            left_frame,
+            text="Importar vários arquivos",
+            command=self.controller.iniciar_importacao_em_lote)
+        self.lote_arquivos_button.pack(pady=(0, 10), padx=20, fill="x")
+
+        self.lote_pasta_button = ctk.CTkButton(
+            left_frame,
+            text="Importar pasta",
+            command=lambda: self.controller.iniciar_importacao_em_lote(pasta=True))
+        self.lote_pasta_button.pack(pady=(0, 10), padx=20, fill="x")
+
+    def definir_templates(self, nomes, selecionado):
+        """Atualiza as opções do menu de templates (chamado pelo controller)."""
+        self.template_option_menu.configure(values=nomes)
+        if self.template_option_menu.get() != selecionado:
+            self.template_option_menu.set(selecionado)
+
+    def consolidar_lote(self):
+        """Retorna True se o usuário marcou para consolidar o lote em uma única planilha."""
+        return bool(self.consolidar_checkbox.get())
+
 
     def criar_frame_direito(self, parent):
         """Cria o painel de histórico rolável à direita."""
@@ -115,6 +152,66 @@ class MainWindow(ctk.CTk):
         scroll_Title = ctk.CTkLabel(right_frame, text="Últimas Conciliações:", font=("Sans-serif", 14))
         scroll_Title.pack(pady=10)
 
+        # Lista de status por arquivo da importação em lote (preenchida pelo controller)
+        self.status_arquivos_frame = ctk.CTkFrame(right_frame, fg_color="transparent")
+        self.status_arquivos_frame.pack(fill="x", padx=5)
+        self.status_arquivos_labels = {}
+
+        # Histórico paginado (consultado no banco SQLite pelo controller)
+        self.historico_frame = ctk.CTkFrame(right_frame, fg_color="transparent")
+        self.historico_frame.pack(fill="x", padx=5, pady=(10, 0))
+
+        paginacao_frame = ctk.CTkFrame(right_frame, fg_color="transparent")
+        paginacao_frame.pack(fill="x", padx=5, pady=10)
+        paginacao_frame.grid_columnconfigure(1, weight=1)
+        self.historico_anterior_button = ctk.CTkButton(
+            paginacao_frame, text="<", width=30,
+            command=lambda: self.controller.carregar_historico(self.historico_pagina - 1))
+        self.historico_anterior_button.grid(row=0, column=0)
+        self.historico_pagina_label = ctk.CTkLabel(paginacao_frame, text="")
+        self.historico_pagina_label.grid(row=0, column=1)
+        self.historico_proxima_button = ctk.CTkButton(
+            paginacao_frame, text=">", width=30,
+            command=lambda: self.controller.carregar_historico(self.historico_pagina + 1))
+        self.historico_proxima_button.grid(row=0, column=2)
+        self.historico_pagina = 1
+
+    def exibir_historico(self, resultado):
+        """Mostra uma página do histórico (resultado de database.listar_importacoes)."""
+        for child in self.historico_frame.winfo_children():
+            child.destroy()
+
+        if not resultado["registros"]:
+            ctk.CTkLabel(self.historico_frame, text="Nenhuma conciliação registrada.", anchor="w").pack(fill="x")
+        for registro in resultado["registros"]:
+            texto = (f"{registro['iniciado_em']} - {registro['template'] or ''}\n"
+                     f"{os.path.basename(registro['caminho_entrada'])}: {registro['status']}, "
+                     f"{registro['transacoes']} transações, {registro['n_erros']} erros")
+            label = ctk.CTkLabel(self.historico_frame, text=texto, anchor="w", justify="left", wraplength=280)
+            label.pack(fill="x", pady=2)
+
+        self.historico_pagina = resultado["pagina"]
+        self.historico_pagina_label.configure(text=f"Página {resultado['pagina']} de {resultado['total_paginas']}")
+        self.historico_anterior_button.configure(state="normal" if resultado["pagina"] > 1 else "disabled")
+        self.historico_proxima_button.configure(
+            state="normal" if resultado["pagina"] < resultado["total_paginas"] else "disabled")
+
+    def iniciar_status_arquivos(self, nomes):
+        """Recria a lista de status do frame direito com um item 'Na fila' por arquivo."""
+        for child in self.status_arquivos_frame.winfo_children():
+            child.destroy()
+        self.status_arquivos_labels = {}
+        for nome in nomes:
+            label = ctk.CTkLabel(self.status_arquivos_frame, text=f"{nome}: Na fila", anchor="w", justify="left", wraplength=280)
+            label.pack(fill="x", pady=2)
+            self.status_arquivos_labels[nome] = label
+
+    def atualizar_status_arquivo(self, nome, texto):
+        """Atualiza o status de um arquivo da lista do frame direito."""
+        label = self.status_arquivos_labels.get(nome)
+        if label is not None:
+            label.configure(text=f"{nome}: {texto}")
+
 
 
 
@@ -126,18 +223,61 @@ class MainWindow(ctk.CTk):
 
         # Frame decorativo para o botão de importação.
         import_frame = ctk.CTkFrame(center_frame, height=200, width=250, corner_radius=50)
-        import_frame.place(relx=0.5, rely=0.5, anchor="center")
+        import_frame.place(relx=0.5, rely=0.17, anchor="center")
 
         import_label = ctk.CTkLabel(import_frame, text="Importe aqui suas planilhas Excel:", font=("Sans-serif", 14))
         import_label.place(relx=0.5, rely=0.4, anchor="center")
 
         # A ação do botão é delegada para o controller.
-        importButton = ctk.CTkButton(
+        self.import_button = ctk.CTkButton(
             import_frame,
             text="Importar",
             corner_radius=40,
             command=self.controller.iniciar_processo_importacao)
-        importButton.place(relx=0.5, rely=0.75, anchor="center")
+        self.import_button.place(relx=0.5, rely=0.75, anchor="center")
+
+        # Progresso da importação (atualizado pelo controller enquanto o pipeline roda em segundo plano)
+        self.progresso_label = ctk.CTkLabel(center_frame, text="", font=("Sans-serif", 12))
+        self.progresso_label.place(relx=0.5, rely=0.34, anchor="center")
+
+        self.cancel_button = ctk.CTkButton(
+            center_frame,
+            text="Cancelar",
+            corner_radius=40,
+            state="disabled",
+            command=self.controller.cancelar_importacao)
+        self.cancel_button.place(relx=0.5, rely=0.40, anchor="center")
+
+        # Resultado da última importação: tabela virtualizada (só as linhas visíveis são desenhadas)
+        cores = CORES_ESCURAS if ctk.get_appearance_mode() == "Dark" else CORES_CLARAS
+        self.tabela_resultado = TabelaVirtual(center_frame, cores=cores)
+        self.tabela_resultado.place(relx=0.02, rely=0.45, relwidth=0.96, relheight=0.55)
+
+    def renderizar_planilha_no_frame(self, df):
+        """Exibe o DataFrame gerado na tabela de resultado (chamado pelo controller)."""
+        self.tabela_resultado.definir_dados(df)
+
+    def acrescentar_previa(self, df):
+        """Acrescenta um bloco da importação em andamento ao fim da tabela de resultado."""
+        self.tabela_resultado.acrescentar_dados(df)
+
+    def descartar_previa(self):
+        """Esvazia a tabela de resultado (prévia de uma importação que não terminou)."""
+        self.tabela_resultado.limpar()
+
+    def atualizar_progresso(self, texto):
+        """Mostra o texto de progresso da importação abaixo do botão."""
+        self.progresso_label.configure(text=texto)
+
+    def definir_importacao_em_andamento(self, em_andamento):
+        """Habilita/desabilita os botões conforme há ou não uma importação rodando."""
+        estado = "disabled" if em_andamento else "normal"
+        self.import_button.configure(state=estado)
+        self.lote_arquivos_button.configure(state=estado)
+        self.lote_pasta_button.configure(state=estado)
+        self.cancel_button.configure(state="normal" if em_andamento else "disabled")
+        if em_andamento:
+            self.atualizar_progresso("Processando...")
 
     def run(self):
         self.mainloop() 
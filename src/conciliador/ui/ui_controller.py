@@ -1,19 +1,21 @@
 # Importações do sistema e de bibliotecas
 from tkinter import filedialog
+import itertools
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-import pandas as pd
 
 # Importações dos módulos do projeto (camada de serviços)
 # Usando caminhos relativos a partir da estrutura do projeto
-from ..services import file_handler
-from ..services import sheet_processor
-from ..services import data_mapper
 from ..services import template_manager
-from ..services import output_generator
+from ..services import pipeline
+from ..services import importacao_lote
+from .. import database
 
 # Importações dos modelos de dados
-from ..models.transaction import Transaction
+from ..models.transaction import tabela_de_tipos
 from ..models.template import Template
 
 # Importação da View para type hinting
@@ -22,6 +24,9 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .main_window import MainWindow
 
+# Intervalo (ms) entre as leituras da fila de mensagens da thread de trabalho
+INTERVALO_FILA_MS = 100
+
 
 class UIController:
     def __init__(self, view: "MainWindow"):
@@ -34,11 +39,21 @@ class UIController:
         self.view = view
         self.template_selecionado = "Automático" # Valor padrão
 
+        # Estado da importação em segundo plano
+        self._fila = queue.Queue()          # Mensagens da thread de trabalho para a UI
+        self._cancelar = threading.Event()  # Sinal de cancelamento (checado entre blocos)
+        self._worker = None
+        self._previa_parcial = False        # A tabela exibe blocos de uma importação ainda sem resultado
+
     def iniciar_processo_importacao(self):
         """
         Orquestra todo o fluxo de importação e processamento de uma planilha.
         Este método é o "maestro" chamado pelo botão 'Importar'.
         """
+        if self._worker is not None and self._worker.is_alive():
+            print("Já existe uma importação em andamento.")
+            return
+
         try:
             print("Iniciando processo de importação...")
             # 1. Abrir diálogo de arquivo para pegar o caminho
@@ -54,37 +69,8 @@ class UIController:
 
             print(f"Caminho selecionado: {caminho}")
 
-            # 2. Chamar file_handler
-            df = file_handler.read_file(caminho)
-            print(f"Arquivo lido com sucesso! Dimensões: {df.shape}")
-
-            # 3. Chamar sheet_processor
-            df_limpo = sheet_processor.clean_sheet(df)
-            print("Planilha limpa com sucesso!")
-
-            # 4. Chamar data_mapper
-            transactions, erros = data_mapper.extract_transactions(df_limpo)
-            print(f"Transações extraídas: {len(transactions)} sucesso, {len(erros)} erros.")
-
-            # 5. Preparar um objeto Template para a geração de saída
-            #    - se o usuário escolher um template salvo, carregamos ele via template_manager
-            #    - caso contrário usamos um template "Automático" padrão
-            try:
-                if self.template_selecionado != "Automático":
-                    loaded = template_manager.load_template(self.template_selecionado)
-                    if loaded is None:
-                        raise ValueError(f"Template '{self.template_selecionado}' não encontrado.")
-                    mapping = loaded.get("mapping", {})
-                    # As colunas do template são as chaves do mapping salvo
-                    colunas = list(mapping.keys())
-                    template = Template(loaded.get("nome", self.template_selecionado), colunas, mapping, loaded.get("formatacao"))
-                else:
-                    # Template automático: mapeia colunas padrão para atributos do Transaction
-                    default_mapping = {"Data": "data", "Tipo": "tipo_pagamento", "Valor": "valor"}
-                    template = Template("Automático", list(default_mapping.keys()), default_mapping)
-            except Exception as e:
-                # Propaga como erro mais descritivo para a camada superior/log
-                raise RuntimeError(f"Erro ao preparar o template de saída: {e}")
+            # 2. Preparar um objeto Template para a geração de saída
+            template, mapping, tipos = self._preparar_template()
 
             # Define pasta de saída padrão dentro do projeto
             output_dir = os.path.join("data", "saved_files")
@@ -92,27 +78,327 @@ class UIController:
             output_filename = f"conciliacao_{timestamp}.xlsx"
             caminho_saida = os.path.join(output_dir, output_filename)
 
-            caminho_saida = output_generator.gerar_planilha(transactions, template, caminho_saida)
-            print(f"Planilha gerada em: {caminho_saida}")
-
-            # 6. Atualizar a view com o resultado
-            print("Processo finalizado com sucesso!")
-            # self.view.mostrar_sucesso(len(transactions), len(erros))
-
-            # >>> PONTO DE EXTENSÃO: Se quiser mostrar a planilha gerada diretamente
-            # no frame scroll da direita, aqui é o lugar ideal para:
-            # 1) ler o arquivo gerado (pandas.read_excel(caminho_saida))
-            # 2) chamar uma função da View/Controller que renderiza o DataFrame no
-            #    frame de scroll direito (ver `database.py` para instruções)
-            
-            # Lê o arquivo de saída recém-criado para exibi-lo na UI
-            if os.path.exists(caminho_saida):
-                df_saida = pd.read_excel(caminho_saida, index_col=0) # index_col=0 para não ler o índice salvo pelo pandas
-                self.view.renderizar_planilha_no_frame(df_saida)
+            # 3. Rodar o pipeline em uma thread de trabalho, para não travar o mainloop do Tk.
+            #    O resultado volta pela fila e é tratado no thread da UI via after().
+            self._cancelar.clear()
+            self.view.definir_importacao_em_andamento(True)
+            self._worker = threading.Thread(
+                target=self._executar_importacao,
+                args=(caminho, template, caminho_saida, mapping, tipos),
+                daemon=True,
+            )
+            self._worker.start()
+            self.view.after(INTERVALO_FILA_MS, self._processar_fila)
         except Exception as e:
             print(f"ERRO no processo de importação: {e}")
             # self.view.mostrar_erro(str(e))
 
+    def iniciar_importacao_em_lote(self, pasta=False):
+        """
+        Importa várias planilhas de uma vez (seleção múltipla ou uma pasta inteira).
+        Os arquivos são distribuídos entre os núcleos da CPU por importacao_lote;
+        o status de cada arquivo aparece no frame da direita.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            print("Já existe uma importação em andamento.")
+            return
+
+        try:
+            # 1. Selecionar os arquivos (ou a pasta)
+            if pasta:
+                diretorio = filedialog.askdirectory(title="Selecione a pasta com as planilhas")
+                caminhos = importacao_lote.listar_planilhas(diretorio) if diretorio else []
+            else:
+                caminhos = list(filedialog.askopenfilenames(
+                    title="Selecione as planilhas",
+                    filetypes=[("Planilhas Excel", "*.xlsx *.xls"), ("Todos os arquivos", "*.*")]
+                ))
+
+            if not caminhos:
+                print("Nenhum arquivo selecionado. Processo cancelado.")
+                return
+
+            print(f"{len(caminhos)} planilhas selecionadas.")
+
+            # 2. Preparar o template e a pasta de saída do lote
+            template, mapping, tipos = self._preparar_template()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            pasta_saida = os.path.join("data", "saved_files", f"lote_{timestamp}")
+            consolidar = self.view.consolidar_lote()
+
+            # 3. Rodar o lote em uma thread de trabalho (que por sua vez usa o pool de processos)
+            self._cancelar.clear()
+            self.view.iniciar_status_arquivos([os.path.basename(caminho) for caminho in caminhos])
+            self.view.definir_importacao_em_andamento(True)
+            self._worker = threading.Thread(
+                target=self._executar_importacao_em_lote,
+                args=(caminhos, template, pasta_saida, consolidar, mapping, tipos),
+                daemon=True,
+            )
+            self._worker.start()
+            self.view.after(INTERVALO_FILA_MS, self._processar_fila)
+        except Exception as e:
+            print(f"ERRO no processo de importação em lote: {e}")
+
+    def _preparar_template(self):
+        """
+        Prepara o objeto Template de saída conforme o template selecionado
+        (antes da extração, para montar a tabela de tipos de pagamento da importação).
+
+        Retorna (template, mapping, tipos): mapping são as colunas de origem {"data", "tipo", "valor"}
+        quando o template selecionado for de origem (ex: banco_inter.json), senão None.
+        Com mapping None, o template de origem é identificado pelo cabeçalho da planilha.
+        tipos é a tabela base mais os sinônimos de tipo de pagamento do template
+        (a tabela global não é alterada), ou None para usar só a tabela base.
+        """
+        origem = None
+        tipos = None
+
+        # - se o usuário escolher um template salvo, pegamos ele do registro do template_manager
+        #   (já validado; o arquivo só é relido se mudou no disco)
+        # - caso contrário usamos um template "Automático" padrão
+        try:
+            if self.template_selecionado != "Automático":
+                encontrado = template_manager.get_template(self.template_selecionado)
+                if encontrado is None:
+                    raise ValueError(f"Template '{self.template_selecionado}' não encontrado.")
+                # Sinônimos de tipo de pagamento próprios do template (opcional), só nesta importação
+                sinonimos = encontrado["dados"].get("tipos_pagamento")
+                if sinonimos:
+                    tipos = tabela_de_tipos(sinonimos)
+                template, origem = encontrado["template"], encontrado["origem"]
+            else:
+                # Template automático: mapeia colunas padrão para atributos do Transaction
+                default_mapping = dict(template_manager.MAPEAMENTO_PADRAO)
+                template = Template("Automático", list(default_mapping.keys()), default_mapping)
+        except Exception as e:
+            # Propaga como erro mais descritivo para a camada superior/log
+            raise RuntimeError(f"Erro ao preparar o template de saída: {e}")
+        return template, origem, tipos
+
+    def cancelar_importacao(self):
+        """
+        Callback do botão 'Cancelar'. O pipeline para antes do próximo bloco.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            self._cancelar.set()
+            self.view.atualizar_progresso("Cancelando...")
+
+    def _registrar_historico(self, caminho, status, template, resumo=None, **campos):
+        """
+        Grava a importação no histórico (SQLite). Uma falha aqui não interrompe a importação.
+        O hash da planilha é o que o pipeline calculou para o cache (resumo["hash_entrada"]):
+        o arquivo não é relido só para o histórico.
+        """
+        resumo = resumo or {}
+        try:
+            database.registrar_importacao(
+                caminho, status,
+                template=resumo.get("template_identificado") or template.nome,
+                hash_entrada=resumo.get("hash_entrada"),
+                caminho_saida=resumo.get("caminho_saida") if status == "ok" else None,
+                linhas_lidas=resumo.get("linhas_lidas", 0),
+                transacoes=resumo.get("transacoes", 0),
+                erros=resumo.get("erros", []),
+                **campos,
+            )
+        except Exception as e:
+            print(f"ERRO ao gravar o histórico: {e}")
+
+    def _executar_importacao(self, caminho, template, caminho_saida, mapping=None, tipos=None):
+        """
+        Roda na thread de trabalho. Não toca em widgets: só publica mensagens na fila.
+        """
+        inicio = time.perf_counter()
+        blocos_enviados = itertools.count()
+        try:
+            # Chama o pipeline em blocos (file_handler -> sheet_processor -> data_mapper -> output_generator)
+            resumo = pipeline.processar_planilha(
+                caminho, template, caminho_saida,
+                progresso=lambda progresso: self._fila.put(("progresso", progresso)),
+                cancelar=self._cancelar.is_set,
+                usar_cache=True, # Reimportar o mesmo extrato (ex: com outro template) pula leitura e limpeza
+                mapping=mapping,
+                identificar_template=mapping is None,
+                tipos=tipos,
+                # Cada bloco montado vai para a tabela da view enquanto os próximos são processados
+                # (a saída é exibida direto da memória, sem reler o arquivo gravado)
+                previa=lambda bloco: self._fila.put(("previa", (bloco, next(blocos_enviados) == 0))),
+            )
+
+            self._registrar_historico(caminho, "ok", template, resumo, duracao=time.perf_counter() - inicio)
+            self._fila.put(("concluido", resumo))
+        except pipeline.ImportacaoCancelada:
+            self._registrar_historico(caminho, "cancelado", template, duracao=time.perf_counter() - inicio)
+            self._fila.put(("cancelado", None))
+        except Exception as e:
+            self._registrar_historico(caminho, "erro", template, {"erros": [str(e)]}, duracao=time.perf_counter() - inicio)
+            self._fila.put(("erro", e))
+
+    def _executar_importacao_em_lote(self, caminhos, template, pasta_saida, consolidar, mapping=None, tipos=None):
+        """
+        Roda na thread de trabalho: chama importacao_lote e publica o status de cada arquivo na fila.
+        """
+        try:
+            resultado = importacao_lote.importar_arquivos(
+                caminhos, template, pasta_saida,
+                consolidar=consolidar,
+                status=lambda resumo: self._fila.put(("arquivo", resumo)),
+                cancelar=self._cancelar.is_set,
+                usar_cache=True,
+                mapping=mapping,
+                identificar_template=mapping is None,
+                tipos=tipos,
+            )
+            for resumo in resultado["arquivos"]:
+                erros = resumo["erros"] if resumo["status"] != "erro" else [resumo.get("mensagem", "")]
+                caminho_saida = resumo["caminho_saida"] or resultado["caminho_consolidado"]
+                self._registrar_historico(resumo["caminho"], resumo["status"], template,
+                                          dict(resumo, erros=erros, caminho_saida=caminho_saida),
+                                          duracao=resumo["tempo"])
+            self._fila.put(("lote_concluido", resultado))
+        except Exception as e:
+            self._fila.put(("erro", e))
+
+    def _processar_fila(self):
+        """
+        Roda no thread da UI (agendado com after): aplica na view as mensagens da thread de trabalho.
+        """
+        finalizado = False
+        while True:
+            try:
+                tipo, conteudo = self._fila.get_nowait()
+            except queue.Empty:
+                break
+
+            if tipo == "progresso":
+                self.view.atualizar_progresso(
+                    f"Linhas lidas: {conteudo['linhas_lidas']} | "
+                    f"Mapeadas: {conteudo['transacoes']} | Erros: {conteudo['erros']}"
+                )
+            elif tipo == "previa":
+                bloco, primeiro = conteudo
+                self._previa_parcial = True
+                try:
+                    # O primeiro bloco substitui o resultado anterior; os outros vão para o fim
+                    if primeiro:
+                        self.view.renderizar_planilha_no_frame(bloco)
+                    else:
+                        self.view.acrescentar_previa(bloco)
+                except Exception as e:
+                    print(f"ERRO ao exibir a planilha gerada: {e}")
+            elif tipo == "concluido":
+                finalizado = True
+                self._previa_parcial = False
+                self._finalizar_importacao(conteudo)
+            elif tipo == "arquivo":
+                self.view.atualizar_status_arquivo(os.path.basename(conteudo["caminho"]), self._texto_status_arquivo(conteudo))
+            elif tipo == "lote_concluido":
+                finalizado = True
+                self._finalizar_importacao_em_lote(conteudo)
+            elif tipo == "cancelado":
+                finalizado = True
+                print("Importação cancelada pelo usuário.")
+                self._descartar_previa()
+                self.view.atualizar_progresso("Importação cancelada.")
+            elif tipo == "erro":
+                finalizado = True
+                print(f"ERRO no processo de importação: {conteudo}")
+                self._descartar_previa()
+                self.view.atualizar_progresso(f"Erro: {conteudo}")
+                # self.view.mostrar_erro(str(conteudo))
+
+        if finalizado:
+            self.view.definir_importacao_em_andamento(False)
+            self.carregar_historico()
+        else:
+            self.view.after(INTERVALO_FILA_MS, self._processar_fila)
+
+    def _descartar_previa(self):
+        """
+        A tabela tem só parte de uma importação que não terminou: esvazia, para que ela
+        não seja confundida com um resultado (a saída não foi gravada).
+        """
+        if self._previa_parcial:
+            self._previa_parcial = False
+            try:
+                self.view.descartar_previa()
+            except Exception as e:
+                print(f"ERRO ao limpar a planilha exibida: {e}")
+
+    @staticmethod
+    def _texto_status_arquivo(resumo):
+        """
+        Texto curto do status de um arquivo do lote.
+        """
+        if resumo["status"] == "ok":
+            return f"OK - {resumo['transacoes']} transações, {len(resumo['erros'])} erros ({resumo['tempo']:.1f} s)"
+        if resumo["status"] == "cancelado":
+            return "Cancelado"
+        return f"Erro: {resumo.get('mensagem', '')}"
+
+    def _finalizar_importacao_em_lote(self, resultado):
+        """
+        Mostra o resumo do lote: tempo de parede em paralelo x soma dos tempos em série.
+        """
+        arquivos = resultado["arquivos"]
+        ok = sum(1 for resumo in arquivos if resumo["status"] == "ok")
+        texto = (f"{ok}/{len(arquivos)} planilhas em {resultado['tempo_total']:.1f} s "
+                 f"(em série: {resultado['tempo_sequencial']:.1f} s)")
+        print(texto)
+        if resultado["caminho_consolidado"]:
+            print(f"Planilha consolidada gerada em: {resultado['caminho_consolidado']}")
+        self.view.atualizar_progresso(texto)
+
+    def _finalizar_importacao(self, resumo):
+        """
+        Atualiza a view com o resultado de uma importação concluída (thread da UI).
+        """
+        erros = resumo["erros"]
+        print(f"Linhas lidas: {resumo['linhas_lidas']}{' (cache)' if resumo.get('cache') else ''}.")
+        print(f"Transações extraídas: {resumo['transacoes']} sucesso, {len(erros)} erros.")
+        if resumo.get("template_identificado"):
+            print(f"Template identificado pelo cabeçalho: {resumo['template_identificado']}")
+        print(f"Planilha gerada em: {resumo['caminho_saida']}")
+
+        # 4. Atualizar a view com o resultado
+        print("Processo finalizado com sucesso!")
+        self.view.atualizar_progresso(f"Concluído: {resumo['transacoes']} transações, {len(erros)} erros.")
+        # self.view.mostrar_sucesso(resumo["transacoes"], len(erros))
+
+        # A tabela da view já recebeu todos os blocos pelas mensagens "previa"
+        # (components/tabela_virtual.py: só as linhas visíveis são desenhadas)
+
+    def carregar_historico(self, pagina=1):
+        """
+        Mostra uma página do histórico de importações (SQLite) no painel "Últimas Conciliações".
+        """
+        try:
+            resultado = database.listar_importacoes(pagina)
+            if pagina > resultado["total_paginas"]:
+                resultado = database.listar_importacoes(resultado["total_paginas"])
+        except Exception as e:
+            print(f"ERRO ao carregar o histórico: {e}")
+            return
+        self.view.exibir_historico(resultado)
+
+    def nomes_templates(self):
+        """
+        Opções do menu de templates: "Automático" + templates salvos válidos.
+        """
+        return ["Automático"] + template_manager.template_names()
+
+    def atualizar_lista_templates(self, event=None):
+        """
+        Atualiza o menu de templates (chamado quando a janela recebe foco).
+        Barato: o registro do template_manager só relê arquivos alterados.
+        """
+        nomes = self.nomes_templates()
+        if self.template_selecionado not in nomes:
+            # O template escolhido foi removido ou ficou inválido
+            self.template_selecionado = "Automático"
+        self.view.definir_templates(nomes, self.template_selecionado)
+
     def on_template_select(self, escolha: str):
         """
         Callback para quando um template de mapeamento é selecionado no OptionMenu.
@@ -145,21 +431,9 @@ class UIController:
         #         df_preview = aplicar_template_preview(self.ultima_df, escolha)
         #         self.view.renderizar_planilha_no_frame(df_preview)
 
-        # >>> PONTO DE EXTENSÃO: Leitura de uma planilha base (Omie)
-        # Se você deseja ler uma planilha base (por exemplo, o modelo Omie) e
-        # inserir os dados processados no pipeline nela, siga estas orientações:
-        # 1) Crie uma função (na camada de serviços) que abra a planilha base e
-        #    retorne seu DataFrame e um 'mapa de colunas' (coluna do Omie -> índice/posição).
-        # 2) Permita que o usuário mapeie manualmente quais campos do pipeline
-        #    correspondem às colunas do Omie (isso pode ser um diálogo simples
-        #    ou uma configuração salva em template).
-        # 3) A função que escreve na planilha base deve:
-        #    - receber um DataFrame com os dados do pipeline
-        #    - gerar um DataFrame resultante cujas colunas sigam a ordem/nome do Omie
-        #    - escrever os valores nas linhas apropriadas (p. ex. append ou substituir)
-        # 4) Após escrever, salve a planilha base em `data/saved_files` com um sufixo
-        #    para indicar que foi populada (ex: omie_preenchida_YYYYMMDD.xlsx) e
-        #    renderize-a no frame direito para visualização.
-
-        # Se quiser, posso transformar essas instruções em código (diálogo para
-        # mapear campos, função de leitura da planilha Omie e rotina de escrita).
\ No newline at end of file
+        # >>> Planilha base (Omie): services/planilha_base.py
+        # - ler_planilha_base(caminho) -> cabeçalho e índice coluna do Omie -> posição
+        # - preencher_planilha_base(caminho, lotes_ou_dataframes, template, modo) grava os dados
+        #   nas colunas de mesmo nome (template salvo com as colunas do Omie), acrescentando ou
+        #   substituindo as linhas, em data/saved_files/omie_preenchida_AAAAMMDD.xlsx
+        # Falta só a interface: escolher a planilha base e renderizar o arquivo gerado.
@@ -0,0 +1,154 @@
+import unittest
+import os
+import pickle
+import sys
+import time
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.template import Template
+from conciliador.services import cache_planilhas
+from conciliador.services import file_handler
+from conciliador.services import sheet_processor
+from conciliador.services.pipeline import processar_planilha
+
+
+class TestCachePlanilhas(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.pasta, "cache")
+        self.patcher = patch('conciliador.services.cache_planilhas.CACHE_DIR', self.cache_dir)
+        self.patcher.start()
+
+        self.entrada = os.path.join(self.pasta, "extrato.xlsx")
+        pd.DataFrame({
+            "Data": ["06/10/2025", "07/10/2025", "08/10/2025", "xx"],
+            "Tipo": ["pix", "débito", "crédito", "pix"],
+            "Valor": [150.5, 20.0, 30.0, 1.0],
+            "Cliente": ["Ana", "Bia", "Caio", "Duda"],
+        }).to_excel(self.entrada, index=False)
+        self.template = Template("Teste", ["Data", "Valor", "Cliente"],
+                                 {"Data": "data", "Valor": "valor", "Cliente": "Cliente"})
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.pasta)
+
+    def entradas(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_chave_depende_do_conteudo_e_da_versao(self):
+        copia = os.path.join(self.pasta, "copia.xlsx")
+        shutil.copy(self.entrada, copia)
+        chave = cache_planilhas.chave_cache(self.entrada, "inteira")
+
+        self.assertEqual(chave, cache_planilhas.chave_cache(copia, "inteira"))
+        self.assertNotEqual(chave, cache_planilhas.chave_cache(self.entrada, "blocos:10"))
+        with patch('conciliador.services.cache_planilhas.VERSAO_PIPELINE', cache_planilhas.VERSAO_PIPELINE + 1):
+            self.assertNotEqual(chave, cache_planilhas.chave_cache(self.entrada, "inteira"))
+
+        # Com o hash do conteúdo já calculado, o arquivo não é relido
+        hash_conteudo = cache_planilhas.hash_arquivo(self.entrada)
+        with patch('builtins.open', side_effect=AssertionError("releu o arquivo")):
+            self.assertEqual(chave, cache_planilhas.chave_cache(self.entrada, "inteira", hash_conteudo))
+
+    def test_carregar_planilha_limpa_usa_cache(self):
+        esperado = sheet_processor.clean_sheet(file_handler.read_file(self.entrada))
+        pd.testing.assert_frame_equal(cache_planilhas.carregar_planilha_limpa(self.entrada), esperado)
+        self.assertEqual(len(self.entradas()), 1)
+
+        with patch('conciliador.services.file_handler.read_file', side_effect=AssertionError("releu o arquivo")):
+            pd.testing.assert_frame_equal(cache_planilhas.carregar_planilha_limpa(self.entrada), esperado)
+
+    def test_entrada_ilegivel_e_refeita(self):
+        cache_planilhas.carregar_planilha_limpa(self.entrada)
+        caminho = os.path.join(self.cache_dir, self.entradas()[0])
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(b"corrompido")
+
+        df = cache_planilhas.carregar_planilha_limpa(self.entrada)
+        self.assertEqual(len(df), 4)
+        self.assertGreater(os.path.getsize(caminho), len(b"corrompido"))
+
+    def test_pipeline_reimportacao_com_outro_template(self):
+        with patch('conciliador.services.cache_planilhas.hash_arquivo', wraps=cache_planilhas.hash_arquivo) as hash_arquivo:
+            primeira = processar_planilha(self.entrada, self.template, os.path.join(self.pasta, "a.xlsx"),
+                                          chunk_size=3, usar_cache=True)
+        self.assertFalse(primeira["cache"])
+        # O hash da chave volta no resumo (histórico), calculado uma vez só
+        self.assertEqual(hash_arquivo.call_count, 1)
+        self.assertEqual(primeira["hash_entrada"], cache_planilhas.hash_arquivo(self.entrada))
+
+        outro = Template("Outro", ["Cliente", "Tipo"], {"Cliente": "Cliente", "Tipo": "tipo_pagamento"})
+        with patch('conciliador.services.file_handler.read_file_chunks', side_effect=AssertionError("releu o arquivo")):
+            segunda = processar_planilha(self.entrada, outro, os.path.join(self.pasta, "b.xlsx"),
+                                         chunk_size=3, usar_cache=True)
+
+        self.assertTrue(segunda["cache"])
+        self.assertEqual(segunda["linhas_lidas"], primeira["linhas_lidas"])
+        self.assertEqual(segunda["transacoes"], 3)
+        self.assertEqual(len(segunda["erros"]), 1)
+        df = pd.read_excel(os.path.join(self.pasta, "b.xlsx"))
+        self.assertEqual(list(df.columns), ["Cliente", "Tipo"])
+        self.assertEqual(list(df["Cliente"]), ["Ana", "Bia", "Caio"])
+
+    def test_pipeline_cache_ilegivel_no_meio_e_refeito(self):
+        """Uma entrada corrompida depois do primeiro bloco não interrompe a importação."""
+        blocos_esperados, blocos = [], []
+        esperado = processar_planilha(self.entrada, self.template, os.path.join(self.pasta, "a.xlsx"),
+                                      chunk_size=3, usar_cache=True, previa=blocos_esperados.append)
+        caminho = os.path.join(self.cache_dir, self.entradas()[0])
+        with open(caminho, "r+b") as arquivo:
+            pickle.load(arquivo)  # Mantém o primeiro bloco e corrompe o resto
+            arquivo.truncate(arquivo.tell())
+            arquivo.seek(0, os.SEEK_END)
+            arquivo.write(b"corrompido")
+
+        resumo = processar_planilha(self.entrada, self.template, os.path.join(self.pasta, "b.xlsx"),
+                                    chunk_size=3, usar_cache=True, previa=blocos.append)
+        self.assertFalse(resumo["cache"])
+        self.assertEqual(resumo["linhas_lidas"], esperado["linhas_lidas"])
+        pd.testing.assert_frame_equal(pd.concat(blocos, ignore_index=True), pd.concat(blocos_esperados, ignore_index=True))
+        self.assertEqual(len(resumo["erros"]), len(esperado["erros"]))
+
+        # O cache foi regravado inteiro
+        registros = list(cache_planilhas.ler_registros(self.entradas()[0][:-len(cache_planilhas.EXTENSAO)]))
+        self.assertEqual(len(registros), 2)
+
+    def test_cancelamento_nao_deixa_cache_parcial(self):
+        from conciliador.services.pipeline import ImportacaoCancelada
+        chamadas = iter([False, True])
+        with self.assertRaises(ImportacaoCancelada):
+            processar_planilha(self.entrada, self.template, os.path.join(self.pasta, "a.xlsx"),
+                               chunk_size=3, cancelar=lambda: next(chamadas), usar_cache=True)
+        self.assertEqual(self.entradas(), [])
+
+    def test_poda_lru_e_versoes_antigas(self):
+        os.makedirs(self.cache_dir)
+        for i, nome in enumerate(["a", "b", "c"]):
+            caminho = os.path.join(self.cache_dir, f"{nome}.v{cache_planilhas.VERSAO_PIPELINE}.pkl")
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(b"x" * 100)
+            os.utime(caminho, (time.time() - 100 + i, time.time() - 100 + i))
+        with open(os.path.join(self.cache_dir, "velho.v0.pkl"), "wb") as arquivo:
+            arquivo.write(b"x")
+
+        # "a" é o mais antigo, mas foi usado agora: "b" sai primeiro
+        self.assertIsNotNone(cache_planilhas.ler_registros(f"a.v{cache_planilhas.VERSAO_PIPELINE}"))
+        cache_planilhas.podar_cache(limite_bytes=200)
+
+        versao = cache_planilhas.VERSAO_PIPELINE
+        self.assertEqual(self.entradas(), [f"a.v{versao}.pkl", f"c.v{versao}.pkl"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,353 @@
+import unittest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.transaction import Transaction
+from conciliador.models.transaction_batch import TransactionBatch
+from conciliador.services import conciliacao
+from conciliador.services.conciliacao import (
+    conciliar, conciliar_com_tolerancia, atribuir_gulosa, numeros_de_dia, conciliar_agrupado, subconjunto_com_soma,
+    tabelas_de_somas,
+)
+
+
+class TestConciliacaoExata(unittest.TestCase):
+
+    def setUp(self):
+        # Extrato do banco x razão do ERP (categorias em ordens diferentes nos dois lotes)
+        self.extrato = TransactionBatch(
+            ["06/10/2025", "06/10/2025", "07/10/2025", "07/10/2025", "07/10/2025", "08/10/2025"],
+            ["PIX", "PIX", "DÉBITO", "DÉBITO", "CRÉDITO", "PIX"],
+            [150.5, 150.5, 20.0, 20.0, 99.9, 10.0],
+        )
+        self.erp = [
+            Transaction("08/10/2025", "pix", 10.0),
+            Transaction("07/10/2025", "débito", 20.0),
+            Transaction("06/10/2025", "pix", 150.5),
+            Transaction("07/10/2025", "débito", 20.0),
+            Transaction("07/10/2025", "débito", 20.0),
+            Transaction("07/10/2025", "crédito", 99.91),
+        ]
+
+    def test_pares_e_sobras(self):
+        resultado = conciliar(self.extrato, self.erp)
+        pares = list(resultado["pares"][["linha_esquerda", "linha_direita"]].itertuples(index=False, name=None))
+        # Chaves repetidas casam na ordem de ocorrência
+        self.assertEqual(pares, [(0, 2), (2, 1), (3, 3), (5, 0)])
+        self.assertEqual(resultado["sem_par_esquerda"].tolist(), [1, 4])
+        self.assertEqual(resultado["sem_par_direita"].tolist(), [4, 5])
+
+    def test_duplicados(self):
+        duplicados = conciliar(self.extrato, self.erp)["duplicados"]
+        self.assertEqual(
+            list(duplicados.itertuples(index=False, name=None)),
+            [("06/10/2025", "PIX", 150.5, 2, 1), ("07/10/2025", "DÉBITO", 20.0, 2, 3)],
+        )
+
+    def test_valor_em_centavos(self):
+        """Diferenças de ponto flutuante abaixo de meio centavo não impedem o par."""
+        resultado = conciliar(TransactionBatch(["06/10/2025"], ["PIX"], [0.1 + 0.2]),
+                              TransactionBatch(["06/10/2025"], ["PIX"], [0.3]))
+        self.assertEqual(len(resultado["pares"]), 1)
+
+    def test_grafias_do_mesmo_tipo_no_mesmo_lote(self):
+        """"crédito" e "CRÉDITO" no mesmo lote são o mesmo tipo canônico."""
+        resultado = conciliar(TransactionBatch(["06/10/2025", "06/10/2025"], ["crédito", "CRÉDITO"], [5.0, 7.0]),
+                              TransactionBatch(["06/10/2025", "06/10/2025"], ["CRÉDITO", "Crédito"], [7.0, 5.0]))
+        pares = list(resultado["pares"][["linha_esquerda", "linha_direita"]].itertuples(index=False, name=None))
+        self.assertEqual(pares, [(0, 1), (1, 0)])
+
+    def test_lado_vazio(self):
+        resultado = conciliar(self.extrato, TransactionBatch([], [], []))
+        self.assertEqual(len(resultado["pares"]), 0)
+        self.assertEqual(resultado["sem_par_esquerda"].tolist(), list(range(6)))
+        with self.assertRaises(ValueError):
+            conciliar(self.extrato, "não são transações")
+
+    def test_um_milhao_de_cada_lado(self):
+        """1M x 1M em poucos segundos (sem comparar as linhas duas a duas)."""
+        rng = np.random.default_rng(0)
+        n = 1_000_000
+        datas = pd.date_range("2025-01-01", periods=365).strftime("%d/%m/%Y").to_numpy(dtype=object)
+        extrato = TransactionBatch(rng.choice(datas, n), rng.choice(np.array(["PIX", "DÉBITO"], dtype=object), n),
+                                   np.round(rng.uniform(1, 5000, n), 2))
+        ordem = rng.permutation(n)
+        erp = TransactionBatch(extrato.data[ordem], extrato.tipo_pagamento[ordem], extrato.valor[ordem])
+
+        inicio = time.perf_counter()
+        resultado = conciliar(extrato, erp)
+        self.assertLess(time.perf_counter() - inicio, 10)
+        self.assertEqual(len(resultado["pares"]), n)
+        pares = resultado["pares"]
+        np.testing.assert_array_equal(extrato.valor[pares["linha_esquerda"]], erp.valor[pares["linha_direita"]])
+
+
+class TestConciliacaoComTolerancia(unittest.TestCase):
+
+    def setUp(self):
+        # Vendas no ERP x liquidações no extrato: D+1/D+2 e alguns centavos de tarifa
+        self.erp = TransactionBatch(
+            ["06/10/2025", "06/10/2025", "07/10/2025", "07/10/2025", "08/10/2025", "xx"],
+            ["CRÉDITO", "CRÉDITO", "DÉBITO", "PIX", "PIX", "PIX"],
+            [100.0, 100.0, 50.0, 10.0, 300.0, 1.0],
+        )
+        self.extrato = TransactionBatch(
+            ["08/10/2025", "07/10/2025", "08/10/2025", "07/10/2025", "20/10/2025", "07/10/2025"],
+            ["CRÉDITO", "CRÉDITO", "DÉBITO", "DÉBITO", "PIX", "PIX"],
+            [99.97, 100.0, 49.5, 50.0, 300.0, 10.0],
+        )
+
+    def test_exata_primeiro_depois_tolerancia(self):
+        resultado = conciliar_com_tolerancia(self.erp, self.extrato, dias_tolerancia=2, valor=0.05)
+        pares = list(resultado["pares"].itertuples(index=False, name=None))
+        self.assertEqual(pares, [
+            (0, 1, "tolerancia"), # 100,00 em D+1: diferença de valor zero vence os 99,97
+            (1, 0, "tolerancia"), # 99,97 em D+2
+            (2, 3, "exata"),
+            (3, 5, "exata"),
+        ])
+        # Fora da janela de data (D+12), data inválida e valor além da tolerância
+        self.assertEqual(resultado["sem_par_esquerda"].tolist(), [4, 5])
+        self.assertEqual(resultado["sem_par_direita"].tolist(), [2, 4])
+
+    def test_tolerancia_percentual_e_validacao(self):
+        resultado = conciliar_com_tolerancia(self.erp, self.extrato, dias_tolerancia=1, percentual=1)
+        casados = dict(zip(resultado["pares"]["linha_esquerda"], resultado["pares"]["linha_direita"]))
+        self.assertEqual(casados[2], 3) # Mesma data vence
+        self.assertNotIn(4, casados)
+        with self.assertRaises(ValueError):
+            conciliar_com_tolerancia(self.erp, self.extrato, dias_tolerancia=-1)
+
+    def test_gulosa_igual_ao_percurso_ordenado(self):
+        """As rodadas vetorizadas dão o mesmo resultado que percorrer os candidatos em ordem."""
+        rng = np.random.default_rng(1)
+        n = 3000
+        linhas_e = rng.integers(0, 500, n)
+        linhas_d = rng.integers(0, 400, n)
+        custo = rng.integers(0, 50, n)
+
+        livres_e, livres_d, esperado = set(range(500)), set(range(400)), set()
+        for _, e, d in sorted(zip(custo.tolist(), linhas_e.tolist(), linhas_d.tolist())):
+            if e in livres_e and d in livres_d:
+                livres_e.discard(e)
+                livres_d.discard(d)
+                esperado.add((e, d))
+
+        escolhidas_e, escolhidas_d = atribuir_gulosa(linhas_e, linhas_d, (custo,), 500, 400)
+        self.assertEqual(set(zip(escolhidas_e.tolist(), escolhidas_d.tolist())), esperado)
+
+        # O percurso único que termina as rodadas lentas dá o mesmo resultado
+        with patch('conciliador.services.conciliacao.RODADAS_MINIMAS', 1), \
+                patch('conciliador.services.conciliacao.FRACAO_MINIMA_RODADA', 1.0):
+            escolhidas_e, escolhidas_d = atribuir_gulosa(linhas_e, linhas_d, (custo,), 500, 400)
+        self.assertEqual(set(zip(escolhidas_e.tolist(), escolhidas_d.tolist())), esperado)
+
+    def test_escada_de_empates(self):
+        """Cada linha empata com a do lado e com a anterior (uma cadeia): tempo linear, não quadrático."""
+        n = 20_000
+        valores = np.round(10 + 0.02 * np.arange(n), 2)
+        erp = TransactionBatch(["06/10/2025"] * n, ["PIX"] * n, valores)
+        extrato = TransactionBatch(["06/10/2025"] * n, ["PIX"] * n, np.round(valores + 0.01, 2))
+
+        inicio = time.perf_counter()
+        resultado = conciliar_com_tolerancia(erp, extrato, dias_tolerancia=0, valor=0.01)
+        self.assertLess(time.perf_counter() - inicio, 2)
+        self.assertEqual(list(resultado["pares"]["linha_esquerda"]), list(range(n)))
+        self.assertEqual(list(resultado["pares"]["linha_direita"]), list(range(n)))
+
+    def test_valores_repetidos_casam_em_ordem(self):
+        """Muitas linhas iguais dos dois lados (empates) casam pela ordem de ocorrência, sem explodir."""
+        n = 2000
+        erp = TransactionBatch(["06/10/2025"] * n, ["PIX"] * n, [10.0] * n)
+        extrato = TransactionBatch(["07/10/2025"] * (n + 5), ["PIX"] * (n + 5), [10.0] * (n + 5))
+
+        inicio = time.perf_counter()
+        resultado = conciliar_com_tolerancia(erp, extrato, dias_tolerancia=2)
+        self.assertLess(time.perf_counter() - inicio, 2)
+        self.assertEqual(list(resultado["pares"]["linha_esquerda"]), list(range(n)))
+        self.assertEqual(list(resultado["pares"]["linha_direita"]), list(range(n)))
+        self.assertEqual(list(resultado["sem_par_direita"]), list(range(n, n + 5)))
+
+    def test_tolerancia_igual_ao_percurso_ordenado(self):
+        """Com empates, o resultado é o percurso guloso em que a classe (tipo, centavos, dia)
+        que aparece antes vence e as linhas de uma classe casam em ordem."""
+        rng = np.random.default_rng(3)
+        datas = pd.date_range("2025-10-01", periods=4).strftime("%d/%m/%Y").to_numpy(dtype=object)
+        tipos = np.array(["PIX", "DÉBITO"], dtype=object)
+
+        def lado(n):
+            return TransactionBatch(rng.choice(datas, n), rng.choice(tipos, n), rng.integers(100, 106, n) / 10)
+
+        erp, extrato = lado(300), lado(280)
+        resultado = conciliar_com_tolerancia(erp, extrato, dias_tolerancia=1, valor=0.2)
+        tolerancia = resultado["pares"][resultado["pares"]["criterio"] == "tolerancia"]
+
+        exata = conciliar(erp, extrato)
+        dia = {data: i for i, data in enumerate(datas)}
+
+        def chaves(lote, livres):
+            chave = {linha: (lote.tipo_pagamento[linha], round(lote.valor[linha] * 100), dia[lote.data[linha]])
+                     for linha in livres.tolist()}
+            representante = {}
+            for linha in livres.tolist():
+                representante.setdefault(chave[linha], linha)
+            return chave, {linha: representante[chave[linha]] for linha in chave}
+
+        chave_e, repr_e = chaves(erp, exata["sem_par_esquerda"])
+        chave_d, repr_d = chaves(extrato, exata["sem_par_direita"])
+        candidatos = []
+        for e, (tipo_e, valor_e, dia_e) in chave_e.items():
+            for d, (tipo_d, valor_d, dia_d) in chave_d.items():
+                if tipo_e == tipo_d and abs(valor_e - valor_d) <= 20 and abs(dia_e - dia_d) <= 1:
+                    candidatos.append((abs(valor_e - valor_d), abs(dia_e - dia_d), repr_e[e], repr_d[d], e, d))
+
+        livres_e, livres_d, esperado = set(chave_e), set(chave_d), []
+        for *_, e, d in sorted(candidatos):
+            if e in livres_e and d in livres_d:
+                livres_e.discard(e)
+                livres_d.discard(d)
+                esperado.append((e, d))
+
+        self.assertEqual(sorted(zip(tolerancia["linha_esquerda"], tolerancia["linha_direita"])), sorted(esperado))
+
+        # Classes com várias linhas também no percurso único das rodadas lentas
+        with patch('conciliador.services.conciliacao.RODADAS_MINIMAS', 1), \
+                patch('conciliador.services.conciliacao.FRACAO_MINIMA_RODADA', 1.0):
+            percorrido = conciliar_com_tolerancia(erp, extrato, dias_tolerancia=1, valor=0.2)
+        pd.testing.assert_frame_equal(percorrido["pares"], resultado["pares"])
+
+    def test_numeros_de_dia(self):
+        lote = TransactionBatch(["01/01/2025", "02/01/2025", "31/02/2025"], ["PIX"] * 3, [1.0] * 3)
+        numeros = numeros_de_dia(lote)
+        self.assertEqual(numeros[1] - numeros[0], 1)
+        self.assertEqual(numeros[2], np.iinfo(np.int64).min)
+
+    def test_escala(self):
+        """200k x 200k com deslocamento de data e centavos em poucos segundos."""
+        rng = np.random.default_rng(0)
+        n = 200_000
+        datas = pd.date_range("2025-01-01", periods=370)
+        dia = rng.integers(0, 365, n)
+        tipos = rng.choice(np.array(["CRÉDITO", "DÉBITO"], dtype=object), n)
+        valores = np.round(rng.uniform(1, 5000, n), 2)
+        erp = TransactionBatch(datas[dia].strftime("%d/%m/%Y"), tipos, valores)
+        extrato = TransactionBatch(datas[dia + rng.integers(1, 3, n)].strftime("%d/%m/%Y"), tipos,
+                                   valores - rng.integers(0, 5, n) / 100)
+
+        inicio = time.perf_counter()
+        resultado = conciliar_com_tolerancia(erp, extrato, dias_tolerancia=2, valor=0.05)
+        self.assertLess(time.perf_counter() - inicio, 15)
+        self.assertGreater(len(resultado["pares"]), 0.99 * n)
+
+
+class TestConciliacaoAgrupada(unittest.TestCase):
+
+    def setUp(self):
+        self.vendas = TransactionBatch(
+            ["06/10/2025"] * 4 + ["07/10/2025"] * 5 + ["08/10/2025"] * 2,
+            ["CRÉDITO", "crédito", "CRÉDITO", "DÉBITO",
+             "DÉBITO", "DÉBITO", "DÉBITO", "DÉBITO", "PIX",
+             "CRÉDITO", "CRÉDITO"],
+            [100.0, 50.0, 25.5, 80.0,
+             10.0, 20.0, 30.0, 45.0, 7.0,
+             60.0, 40.0],
+        )
+        self.depositos = TransactionBatch(
+            ["07/10/2025", "07/10/2025", "07/10/2025", "08/10/2025", "08/10/2025"],
+            ["CRÉDITO", "DÉBITO", "DÉBITO", "DÉBITO", "CRÉDITO"],
+            [175.5, 80.0, 55.0, 50.0, 99.0],
+        )
+
+    def test_grupos_inteiros_e_subconjuntos(self):
+        resultado = conciliar_agrupado(self.vendas, self.depositos, dias_tolerancia=1)
+        composicao = resultado["composicao"]
+        por_deposito = {
+            deposito: (sorted(grupo["linha_venda"].tolist()), grupo["criterio"].iloc[0])
+            for deposito, grupo in composicao.groupby("linha_deposito")
+        }
+        self.assertEqual(por_deposito[0], ([0, 1, 2], "agrupada")) # Tipos normalizados antes de agrupar
+        self.assertEqual(por_deposito[1], ([3], "agrupada"))
+        # DÉBITO de 07/10 (105,00) foi pago em dois depósitos: 55,00 e 50,00
+        self.assertEqual(por_deposito[2], ([4, 7], "subconjunto"))
+        self.assertEqual(por_deposito[3], ([5, 6], "subconjunto"))
+        self.assertNotIn(4, por_deposito)
+
+        self.assertEqual(resultado["sem_par_vendas"].tolist(), [8, 9, 10])
+        self.assertEqual(resultado["sem_par_depositos"].tolist(), [4])
+        self.assertEqual(list(resultado["pendentes"]["motivo"]), ["sem_combinacao", "sem_combinacao"])
+        self.assertEqual(resultado["pendentes"]["total"].tolist(), [7.0, 100.0])
+
+    def test_grupo_grande_nao_procura_subconjunto(self):
+        resultado = conciliar_agrupado(self.vendas, self.depositos, dias_tolerancia=1, limite_vendas=3)
+        self.assertIn("muitas_vendas", set(resultado["pendentes"]["motivo"]))
+        self.assertNotIn("subconjunto", set(resultado["composicao"]["criterio"]))
+
+    def test_subconjunto_com_soma(self):
+        self.assertEqual(subconjunto_com_soma([500, 300, 200, 700], 1000).tolist(), [1, 3])
+        self.assertIsNone(subconjunto_com_soma([500, 300], 801))
+        self.assertEqual(subconjunto_com_soma([500, 300], 801, tolerancia=1).tolist(), [0, 1])
+        self.assertIsNone(subconjunto_com_soma([5], 0)) # O subconjunto vazio não conta
+
+        self.assertEqual(subconjunto_com_soma([7, 0], 0).tolist(), [1]) # Zero não vazio na segunda metade
+        self.assertIsNone(subconjunto_com_soma([7, 3], 1, tolerancia=1))
+
+        rng = np.random.default_rng(3)
+        valores = rng.integers(1, 100_000, 36)
+        escolhidas = rng.choice(36, 11, replace=False)
+        encontradas = subconjunto_com_soma(valores, int(valores[escolhidas].sum()))
+        self.assertEqual(valores[encontradas].sum(), valores[escolhidas].sum())
+
+        # As mesmas tabelas servem para alvos diferentes
+        tabelas = tabelas_de_somas(valores)
+        for alvo in (int(valores[escolhidas].sum()), int(valores[:5].sum()), int(valores.sum()) + 1):
+            esperado = subconjunto_com_soma(valores, alvo)
+            encontradas = subconjunto_com_soma(valores, alvo, tabelas=tabelas)
+            self.assertEqual(None if esperado is None else esperado.tolist(), None if encontradas is None else encontradas.tolist())
+
+    def test_tabelas_do_grupo_reaproveitadas(self):
+        """As somas das vendas de um grupo são montadas uma vez e só refeitas depois de um acerto."""
+        rng = np.random.default_rng(4)
+        valores = rng.integers(1000, 50000, 36)
+        partes = np.array_split(rng.permutation(36), 3)
+        total = int(valores.sum())
+        # Três depósitos sem combinação (maiores, tentados primeiro) e três que dividem o grupo
+        depositos = [total + 1, total + 2, total + 3] + [int(valores[parte].sum()) for parte in partes]
+        vendas = TransactionBatch(["06/10/2025"] * 36, ["CRÉDITO"] * 36, valores / 100)
+        lote_depositos = TransactionBatch(["06/10/2025"] * 6, ["CRÉDITO"] * 6, np.array(depositos) / 100)
+
+        with patch('conciliador.services.conciliacao.tabelas_de_somas', wraps=conciliacao.tabelas_de_somas) as tabelas:
+            resultado = conciliar_agrupado(vendas, lote_depositos, orcamento_grupo_s=10)
+        # Uma vez no início e uma depois de cada acerto que ainda deixa vendas
+        self.assertEqual(tabelas.call_count, 3)
+        self.assertEqual(sorted(resultado["composicao"]["linha_venda"]), list(range(36)))
+        self.assertEqual(resultado["sem_par_depositos"].tolist(), [0, 1, 2])
+        self.assertTrue(resultado["pendentes"].empty)
+
+    def test_escala(self):
+        """300k vendas: a agregação resolve quase tudo e a busca só roda nos grupos que sobraram."""
+        rng = np.random.default_rng(0)
+        n = 300_000
+        datas = pd.date_range("2025-01-01", periods=366).strftime("%d/%m/%Y").to_numpy(dtype=object)
+        vendas = TransactionBatch(rng.choice(datas[:365], n), rng.choice(np.array(["CRÉDITO", "DÉBITO"], dtype=object), n),
+                                  np.round(rng.uniform(1, 500, n), 2))
+        somas = pd.DataFrame({"data": vendas.data, "tipo": vendas.tipo_pagamento, "valor": vendas.valor}) \
+            .groupby(["data", "tipo"], as_index=False)["valor"].sum()
+        depositos = TransactionBatch(somas["data"], somas["tipo"], somas["valor"].round(2))
+
+        inicio = time.perf_counter()
+        resultado = conciliar_agrupado(vendas, depositos)
+        self.assertLess(time.perf_counter() - inicio, 10)
+        self.assertEqual(len(resultado["composicao"]), n)
+        self.assertEqual(len(resultado["sem_par_depositos"]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
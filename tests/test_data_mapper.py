@@ -5,13 +5,18 @@ Autor: Paulo Ygor - Estagiário | Grupo Doma
 
 import sys
 import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
 
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.conciliador.services.file_handler import read_file
 from src.conciliador.services.sheet_processor import clean_sheet
-from src.conciliador.services.data_mapper import column_identifier, extract_transactions
+from src.conciliador.services import data_mapper
+from src.conciliador.services.data_mapper import column_identifier, extract_transactions, rank_columns
 
 
 def test_data_mapper_completo():
@@ -81,6 +86,120 @@ def test_data_mapper_completo():
         return None, None
 
 
+def test_extract_transactions_colunar_igual_linha():
+    """
+    O modo colunar deve gerar os mesmos sucessos e a mesma lista de erros do modo linha.
+    """
+    df = pd.DataFrame({
+        "Data Lançamento": ["06/10/2025", "6/10/2025", None, datetime(2025, 1, 2), "aa/bb/cccc", "07/10/2025"],
+        "Forma Pagamento": ["pix", " Débito ", "xx", 3, "cash", "boleto"],
+        "Valor Total": [150.5, 2, -1, np.nan, 0.123, 10.0],
+        "Cliente": ["João", None, "Maria", "Pedro", "Ana", "Rui"],
+    }, index=[5, 6, 7, 8, 9, 10])
+
+    sucessos_linha, erros_linha = extract_transactions(df, modo="linha")
+    sucessos_colunar, erros_colunar = extract_transactions(df, modo="colunar")
+
+    assert erros_colunar == erros_linha
+    assert len(erros_colunar) == 5
+    assert erros_colunar[0] == "Linha 6: A data deve estar no formato 'DD/MM/AAAA'."
+    campos = lambda t: (t.data, t.tipo_pagamento, t.valor, t.extras)
+    assert [campos(t) for t in sucessos_colunar] == [campos(t) for t in sucessos_linha]
+    assert sucessos_colunar[0].extras == {"Cliente": "João"}
+
+
+def test_extract_transactions_colunar_datetime():
+    """
+    Colunas datetime64 são formatadas como 'DD/MM/AAAA' e NaT gera o mesmo erro do modo linha.
+    """
+    df = pd.DataFrame({
+        "Data": pd.to_datetime(["2025-10-06", None]),
+        "Tipo": ["pix", "pix"],
+        "Valor": [1, 2],
+    })
+
+    sucessos, erros = extract_transactions(df)
+    _, erros_linha = extract_transactions(df, modo="linha")
+
+    assert sucessos[0].data == "06/10/2025"
+    assert isinstance(sucessos[0].valor, int)
+    assert erros == erros_linha
+
+
+def test_extract_transactions_modo_invalido():
+    df = pd.DataFrame({"Data": ["06/10/2025"], "Tipo": ["pix"], "Valor": [1.0]})
+    try:
+        extract_transactions(df, modo="outro")
+        assert False, "Deveria ter levantado ValueError"
+    except ValueError:
+        pass
+
+
+def test_rank_columns_confianca():
+    """
+    Nome igual ao sinônimo vale 1.0; palavra inteira vale mais que trecho de outra palavra.
+    """
+    ranking = rank_columns(["Data", "Valor Total", "Subtotal", "Forma de Pagamento", "Cliente"])
+
+    assert ranking["data"] == (("Data", 1.0),)
+    assert [coluna for coluna, _ in ranking["valor"]] == ["Valor Total", "Subtotal"]
+    assert ranking["valor"][0][1] > 0.5 > ranking["valor"][1][1]
+    assert ranking["tipo"] == (("Forma de Pagamento", 1.0),)
+
+
+def test_column_identifier_melhor_coluna_vence():
+    """
+    Antes a última coluna compatível vencia; agora vence a de maior confiança.
+    """
+    df = pd.DataFrame(columns=["Data", "Tipo", "Valor", "Valor da transação", "Valor Tarifa"])
+    assert column_identifier(df) == {"data": "Data", "tipo": "Tipo", "valor": "Valor"}
+
+    # Sinônimo composto não é quebrado em "data" + "transação"
+    df = pd.DataFrame(columns=["Data da transação", "Meio de Pagamento", "Montante"])
+    assert column_identifier(df) == {"data": "Data da transação", "tipo": "Meio de Pagamento", "valor": "Montante"}
+
+
+def test_column_identifier_atribuicao_completa():
+    """
+    A coluna de maior confiança de um campo não pode deixar outro campo sem coluna.
+    """
+    df = pd.DataFrame(columns=["Data de Pagamento", "Descrição do lançamento", "Valor"])
+    assert column_identifier(df) == {"data": "Data de Pagamento", "tipo": "Descrição do lançamento", "valor": "Valor"}
+
+
+def test_column_identifier_empate_pelo_sinonimo():
+    """
+    Empate de confiança: vence o sinônimo mais representativo, não a coluna mais à esquerda.
+    """
+    df = pd.DataFrame(columns=["Data", "Categoria", "Total", "Valor"])
+    assert column_identifier(df) == {"data": "Data", "tipo": "Categoria", "valor": "Valor"}
+    assert [coluna for coluna, _ in rank_columns(df.columns)["valor"]] == ["Valor", "Total"]
+
+
+def test_column_identifier_coluna_ausente():
+    df = pd.DataFrame(columns=["Data", "Tipo", "Cliente"])
+    try:
+        column_identifier(df)
+        assert False, "Deveria ter levantado ValueError"
+    except ValueError as e:
+        assert "Coluna de valor não encontrada." in str(e)
+
+
+def test_rank_columns_memorizado():
+    """
+    O mesmo layout não é recalculado; mudar a lista de sinônimos invalida a memória.
+    """
+    colunas = ["Dt Mov", "Natureza", "Quantia"]
+    assert rank_columns(colunas) is rank_columns(tuple(colunas))
+
+    data_mapper.valor_keywords.append("líquido")
+    try:
+        assert rank_columns(["Data", "Tipo", "Líquido"])["valor"] == (("Líquido", 1.0),)
+    finally:
+        data_mapper.valor_keywords.remove("líquido")
+    assert rank_columns(["Data", "Tipo", "Líquido"])["valor"] == ()
+
+
 if __name__ == "__main__":
     print("\nINICIANDO TESTES DO DATA_MAPPER\n")
 
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador import database
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.patcher = patch('conciliador.database.DB_PATH', os.path.join(self.pasta, "conciliador.db"))
+        self.patcher.start()
+
+    def tearDown(self):
+        database.fechar()
+        self.patcher.stop()
+        shutil.rmtree(self.pasta)
+
+    def test_modo_wal_e_indices(self):
+        conexao = database.conectar()
+        self.assertEqual(conexao.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        indices = {linha["name"] for linha in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"idx_templates_nome", "idx_importacoes_data", "idx_importacoes_template", "idx_importacoes_hash"} <= indices)
+
+        # A listagem do painel usa o índice por data (sem ordenar a tabela inteira)
+        plano = " ".join(linha["detail"] for linha in conexao.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM importacoes ORDER BY iniciado_em DESC, id DESC LIMIT 10"))
+        self.assertIn("idx_importacoes_data", plano)
+
+    def test_templates(self):
+        database.salvar_template("/templates", "banco_inter.json", {"nome": "Banco Inter", "mapping": {"data": "Data"}}, 1)
+        database.salvar_template("/templates", "banco_inter.json", {"nome": "Banco Inter", "mapping": {"data": "Data Lançamento"}}, 2)
+        database.salvar_template("/templates", "nubank.json", {"nome": "Nubank", "mapping": {"Data": "data"}}, 3)
+        database.salvar_template("/outra", "nubank.json", {"nome": "Nubank", "mapping": {"Data": "data"}}, 4)
+
+        copias = database.templates_da_pasta("/templates")
+        self.assertEqual(list(copias), ["banco_inter.json", "nubank.json"])
+        self.assertEqual(copias["banco_inter.json"], {"mtime": 2, "dados": {"nome": "Banco Inter", "mapping": {"data": "Data Lançamento"}}})
+        self.assertTrue(database.deletar_template("/templates", "nubank.json"))
+        self.assertFalse(database.deletar_template("/templates", "nubank.json"))
+        self.assertEqual(list(database.templates_da_pasta("/templates")), ["banco_inter.json"])
+        self.assertEqual(list(database.templates_da_pasta("/outra")), ["nubank.json"])
+        with self.assertRaises(ValueError):
+            database.salvar_template("/templates", "lista.json", ["não", "é", "um", "template"], 5)
+
+    def test_historico_paginado(self):
+        for i in range(25):
+            database.registrar_importacao(
+                f"extrato_{i}.xlsx", "ok", template="Banco Inter" if i % 2 else "Automático",
+                hash_entrada=f"hash{i % 5}", caminho_saida=f"saida_{i}.xlsx",
+                linhas_lidas=100, transacoes=98, erros=["Linha 3: erro", "Linha 7: erro"],
+                iniciado_em=f"2025-10-{i + 1:02d} 10:00:00",
+            )
+
+        primeira = database.listar_importacoes(1, por_pagina=10)
+        self.assertEqual((primeira["total"], primeira["total_paginas"]), (25, 3))
+        self.assertEqual(primeira["registros"][0]["caminho_entrada"], "extrato_24.xlsx")
+        self.assertEqual(len(database.listar_importacoes(3, por_pagina=10)["registros"]), 5)
+
+        inter = database.listar_importacoes(1, por_pagina=50, template="Banco Inter")
+        self.assertEqual(inter["total"], 12)
+
+        self.assertEqual(len(database.buscar_por_hash("hash0")), 5)
+        registro = primeira["registros"][0]
+        self.assertEqual(registro["n_erros"], 2)
+        self.assertEqual(database.erros_da_importacao(registro["id"]), ["Linha 3: erro", "Linha 7: erro"])
+
+        with self.assertRaises(ValueError):
+            database.listar_importacoes(0)
+
+    def test_banco_vazio(self):
+        self.assertEqual(database.listar_importacoes(), {"registros": [], "pagina": 1, "total_paginas": 1, "total": 0})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -9,7 +9,7 @@ import os
 # Adiciona o diretório raiz ao path para importar módulos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.conciliador.services.file_handler import read_file, write_file
+from src.conciliador.services.file_handler import read_file, read_file_chunks, write_file, write_file_chunks, write_sheets_chunks, fill_sheet_chunks
 
 
 def test_read_planilha_real():
@@ -89,6 +89,231 @@ def test_write_planilha():
         print(f"Erro: {e}")
 
 
+def test_read_file_chunks(tmp_path):
+    """
+    Teste 3: Leitura em blocos deve reproduzir read_file (colunas, índice e valores)
+    """
+    import pandas as pd
+
+    df_teste = pd.DataFrame({
+        'Coluna1': [None, None, 'ID', '001', '002', '003', '004'],
+        'Data': [None, None, 'Data', '01/10/2025', '02/10/2025', '03/10/2025', '04/10/2025'],
+        'Valor': [None, 1.5, 'Valor', 150.50, 200.00, 75.25, 10.0],
+    })
+    caminho = str(tmp_path / "blocos.xlsx")
+    df_teste.to_excel(caminho, index=False)
+
+    df_inteiro = read_file(caminho)
+    blocos = list(read_file_chunks(caminho, chunk_size=3))
+
+    assert [len(bloco) for bloco in blocos] == [3, 3, 1]
+    assert list(blocos[1].index) == [3, 4, 5]
+    df_blocos = pd.concat(blocos)
+    assert list(df_blocos.columns) == list(df_inteiro.columns)
+    pd.testing.assert_frame_equal(df_blocos, df_inteiro, check_dtype=False)
+
+
+def test_read_file_chunks_linhas_mais_largas(tmp_path):
+    """
+    Planilha sem dimensão gravada e linhas mais largas que o cabeçalho:
+    as células extras viram colunas "Unnamed: i", como no read_file
+    """
+    import re
+    import zipfile
+    import openpyxl
+    import pandas as pd
+    from src.conciliador.services.sheet_processor import clean_sheet_chunks
+
+    workbook = openpyxl.Workbook()
+    planilha = workbook.active
+    planilha.append(["Data", "Tipo", "Valor"])
+    for i in range(6):
+        planilha.append([f"0{i + 1}/10/2025", "pix", float(i)] + ([i * 10, i] if i >= 4 else []))
+    original = str(tmp_path / "original.xlsx")
+    workbook.save(original)
+
+    # Remove a <dimension> da aba: o openpyxl read_only passa a entregar cada linha com a própria largura
+    caminho = str(tmp_path / "sem_dimensao.xlsx")
+    with zipfile.ZipFile(original) as origem, zipfile.ZipFile(caminho, "w") as destino:
+        for item in origem.infolist():
+            dados = origem.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                dados = re.sub(rb"<dimension[^>]*/>", b"", dados)
+            destino.writestr(item, dados)
+
+    blocos = list(read_file_chunks(caminho, chunk_size=3))
+    assert [bloco.shape[1] for bloco in blocos] == [3, 5]
+    df_inteiro = read_file(caminho)
+    pd.testing.assert_frame_equal(pd.concat(blocos), df_inteiro, check_dtype=False)
+
+    # A limpeza em blocos mantém as colunas novas (sem perder as linhas anteriores)
+    limpo = pd.concat(clean_sheet_chunks(read_file_chunks(caminho, chunk_size=3)))
+    assert limpo.shape == (6, 5)
+    assert list(limpo["Unnamed: 3"].iloc[4:]) == [40, 50]
+
+
+def test_read_file_chunks_tamanho_invalido(tmp_path):
+    import pandas as pd
+
+    caminho = str(tmp_path / "pequeno.xlsx")
+    pd.DataFrame({'A': [1]}).to_excel(caminho, index=False)
+    try:
+        next(read_file_chunks(caminho, chunk_size=0))
+        assert False, "Deveria ter levantado ValueError"
+    except ValueError:
+        pass
+
+
+def test_write_file_chunks_tipos_e_formatos(tmp_path):
+    import datetime
+    import openpyxl
+    import pandas as pd
+
+    caminho = str(tmp_path / "saida.xlsx")
+    blocos = [
+        pd.DataFrame({
+            "Data": ["06/10/2025", "07/10/2025"],
+            "Valor": [150.5, float("nan")],
+            "NSU": [1, 2],
+            "Conferido": [True, False],
+            "Lançado em": pd.to_datetime(["2025-10-06 10:30", "2025-10-07 00:00"]),
+            "Cliente": ["  João & <Cia>", None],
+        }),
+        pd.DataFrame({
+            "Data": ["08/10/2025"],
+            "Valor": [75.0],
+            "NSU": [3],
+            "Conferido": [True],
+            "Lançado em": pd.to_datetime(["2025-10-08"]),
+            "Cliente": ["Maria"],
+        }),
+    ]
+    total = write_file_chunks(iter(blocos), caminho, indice=False,
+                              formatos={"Valor": "#,##0.00", "Lançado em": "DD/MM/YYYY", "cor_cabecalho": "#4472C4"})
+    assert total == 3
+
+    # Sem índice: a primeira coluna já é a do DataFrame
+    df = pd.read_excel(caminho)
+    esperado = pd.concat(blocos, ignore_index=True)
+    pd.testing.assert_frame_equal(df, esperado, check_dtype=False)
+
+    planilha = openpyxl.load_workbook(caminho).active
+    assert planilha["A1"].font.b
+    assert planilha["B2"].number_format == "#,##0.00"
+    assert planilha["E2"].number_format == "DD/MM/YYYY"
+    assert planilha["E2"].value == datetime.datetime(2025, 10, 6, 10, 30)
+    assert planilha["C2"].number_format == "General"
+
+    # A leitura em blocos lê o arquivo gerado normalmente
+    assert len(pd.concat(read_file_chunks(caminho, chunk_size=2))) == 3
+
+
+def test_write_file_chunks_com_indice(tmp_path):
+    import pandas as pd
+
+    caminho = str(tmp_path / "indice.xlsx")
+    df = pd.DataFrame({"A": [1, 2]}, index=[10, 11])
+    write_file_chunks([df], caminho)
+    pd.testing.assert_frame_equal(pd.read_excel(caminho, index_col=0), df, check_names=False)
+
+
+def test_write_file_chunks_sem_arquivo_parcial(tmp_path):
+    import pandas as pd
+
+    caminho = str(tmp_path / "parcial.xlsx")
+
+    def blocos():
+        yield pd.DataFrame({"A": [1]})
+        raise RuntimeError("falha no meio")
+
+    for chunks, erro in ((blocos(), RuntimeError), ([], ValueError)):
+        try:
+            write_file_chunks(chunks, caminho)
+            assert False, "Deveria ter levantado erro"
+        except erro:
+            pass
+    assert os.listdir(tmp_path) == []
+
+
+
+def test_write_sheets_chunks_varias_abas(tmp_path):
+    import openpyxl
+    import pandas as pd
+
+    caminho = str(tmp_path / "abas.xlsx")
+    vazia = pd.DataFrame({"Nº": pd.Series([], dtype="int64"), "Cliente": pd.Series([], dtype=object)})
+    totais = write_sheets_chunks([
+        ("Conciliados", iter([pd.DataFrame({"Valor": [1.5]}), pd.DataFrame({"Valor": [2.0]})])),
+        ("Sem par", iter([vazia])),
+        ("Resumo & Total", iter([pd.DataFrame({"Tipo": ["PIX", None, "PIX"]})])),
+    ], caminho, formatos={"Valor": "#,##0.00"})
+    assert totais == [2, 0, 3]
+
+    livro = openpyxl.load_workbook(caminho)
+    assert livro.sheetnames == ["Conciliados", "Sem par", "Resumo & Total"]
+    assert livro["Conciliados"]["A3"].number_format == "#,##0.00"
+    # Aba sem linhas fica só com o cabeçalho
+    assert [celula.value for celula in livro["Sem par"][1]] == ["Nº", "Cliente"]
+    assert livro["Sem par"].max_row == 1
+    assert [linha[0].value for linha in livro["Resumo & Total"].iter_rows(min_row=2)] == ["PIX", None, "PIX"]
+
+    for nomes in (["A", "a"], ["x" * 32], ["Jan/Fev"]):
+        try:
+            write_sheets_chunks([(nome, iter([vazia])) for nome in nomes], str(tmp_path / "invalido.xlsx"))
+            assert False, "Deveria ter levantado ValueError"
+        except ValueError:
+            pass
+    assert not os.path.exists(tmp_path / "invalido.xlsx")
+
+
+def test_fill_sheet_chunks(tmp_path, monkeypatch):
+    import datetime
+    import openpyxl
+    import pandas as pd
+    from src.conciliador.services import file_handler
+
+    # Pedaços pequenos: as linhas existentes atravessam várias leituras do XML
+    monkeypatch.setattr(file_handler, "_PEDACO_XML", 64)
+
+    base = str(tmp_path / "base.xlsx")
+    livro = openpyxl.Workbook()
+    aba = livro.active
+    aba.title = "Dados"
+    aba.append(["Título"])
+    aba.append(["Valor", "Nome", "Data"])
+    for i in range(20):
+        aba.append([i, f"linha {i}"])
+    aba.cell(40, 1).number_format = "0.00" # Linha só formatada depois dos dados
+    livro.create_sheet("Outra")["A1"] = "mantida"
+    livro.save(base)
+
+    blocos = [pd.DataFrame({"Data": [datetime.datetime(2025, 10, 6)], "Valor": [1.5]}),
+              pd.DataFrame({"Data": [None], "Valor": [2.5]})]
+    saida = str(tmp_path / "saida.xlsx")
+    assert fill_sheet_chunks(base, iter(blocos), saida, primeira_linha=3, posicoes=[2, 0]) == 2
+
+    livro = openpyxl.load_workbook(saida)
+    linhas = list(livro["Dados"].iter_rows(values_only=True))
+    assert len(linhas) == 24
+    assert linhas[21][:2] == (19, "linha 19")
+    assert linhas[22] == (1.5, None, datetime.datetime(2025, 10, 6))
+    assert linhas[23] == (2.5, None, None)
+    assert livro["Dados"]["C23"].is_date
+    assert livro["Outra"]["A1"].value == "mantida"
+
+    # substituir apaga as linhas de dados e mantém as de cima
+    fill_sheet_chunks(base, iter(blocos), saida, aba="Dados", primeira_linha=3, substituir=True, posicoes=[2, 0])
+    linhas = list(openpyxl.load_workbook(saida)["Dados"].iter_rows(values_only=True))
+    assert [linha[0] for linha in linhas] == ["Título", "Valor", 1.5, 2.5]
+
+    for argumentos in ({"aba": "Nenhuma"}, {"posicoes": [0, 0]}):
+        try:
+            fill_sheet_chunks(base, iter(blocos), str(tmp_path / "invalido.xlsx"), **argumentos)
+            assert False, "Deveria ter levantado ValueError"
+        except ValueError:
+            pass
+    assert not os.path.exists(tmp_path / "invalido.xlsx")
+
 if __name__ == "__main__":
     print("\nINICIANDO TESTES DO FILE_HANDLER\n")
 
@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.template import Template
+from conciliador.models.transaction import tabela_de_tipos
+from conciliador.services.importacao_lote import importar_arquivos, listar_planilhas
+
+
+class TestImportacaoLote(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.saida = os.path.join(self.pasta, "saida")
+        self.template = Template(
+            nome="Teste",
+            colunas=["Data", "Valor", "Tipo", "Cliente"],
+            mapeamento={"Data": "data", "Valor": "valor", "Tipo": "tipo_pagamento", "Cliente": "Cliente"}
+        )
+        self.caminhos = []
+        for i, clientes in enumerate([["Ana", "Rui"], ["Bia"], ["Caio", "Duda", "Eva"]]):
+            caminho = os.path.join(self.pasta, f"filial_{i}.xlsx")
+            pd.DataFrame({
+                "Data": ["06/10/2025"] * len(clientes),
+                "Tipo": ["pix"] * len(clientes),
+                "Valor": [10.0 * (i + 1)] * len(clientes),
+                "Cliente": clientes,
+            }).to_excel(caminho, index=False)
+            self.caminhos.append(caminho)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta)
+
+    def test_listar_planilhas(self):
+        open(os.path.join(self.pasta, "~$filial_0.xlsx"), "w").close()
+        open(os.path.join(self.pasta, "notas.txt"), "w").close()
+        self.assertEqual(listar_planilhas(self.pasta), self.caminhos)
+
+    def test_um_arquivo_por_entrada(self):
+        status = []
+        resultado = importar_arquivos(self.caminhos, self.template, self.saida, max_workers=2, status=status.append)
+
+        self.assertEqual(len(status), 3)
+        self.assertEqual([resumo["transacoes"] for resumo in resultado["arquivos"]], [2, 1, 3])
+        for resumo in resultado["arquivos"]:
+            self.assertEqual(resumo["status"], "ok")
+            self.assertTrue(os.path.exists(resumo["caminho_saida"]))
+        self.assertIsNone(resultado["caminho_consolidado"])
+        self.assertGreater(resultado["tempo_sequencial"], 0)
+
+    def test_consolidado(self):
+        resultado = importar_arquivos(self.caminhos, self.template, self.saida, consolidar=True, max_workers=2)
+
+        df = pd.read_excel(resultado["caminho_consolidado"])
+        # Ordem da lista de entrada, independente da ordem de conclusão dos processos
+        self.assertEqual(list(df["Cliente"]), ["Ana", "Rui", "Bia", "Caio", "Duda", "Eva"])
+        self.assertEqual(list(df["Valor"]), [10.0, 10.0, 20.0, 30.0, 30.0, 30.0])
+
+    def test_tabela_de_tipos_da_importacao(self):
+        """Os processos do pool usam a tabela de tipos passada para a importação."""
+        outro = os.path.join(self.pasta, "cartoes.xlsx")
+        pd.DataFrame({"Data": ["06/10/2025"], "Tipo": ["Cartão de Crédito"], "Valor": [5.0],
+                      "Cliente": ["Gil"]}).to_excel(outro, index=False)
+        tipos = tabela_de_tipos({"Cartão de Crédito": "CRÉDITO"})
+
+        sem_tabela = importar_arquivos([outro], self.template, self.saida, max_workers=1)
+        com_tabela = importar_arquivos([outro], self.template, self.saida, max_workers=1, tipos=tipos)
+        self.assertEqual(sem_tabela["arquivos"][0]["transacoes"], 0)
+        self.assertEqual(com_tabela["arquivos"][0]["transacoes"], 1)
+
+    def test_arquivo_com_erro_nao_interrompe_lote(self):
+        invalido = os.path.join(self.pasta, "invalido.xlsx")
+        with open(invalido, "w") as arquivo:
+            arquivo.write("não é uma planilha")
+
+        resultado = importar_arquivos(self.caminhos + [invalido], self.template, self.saida, max_workers=2)
+        self.assertEqual([resumo["status"] for resumo in resultado["arquivos"]], ["ok", "ok", "ok", "erro"])
+        self.assertIn("Erro ao ler o arquivo", resultado["arquivos"][-1]["mensagem"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -76,8 +76,8 @@ try:
 except ValueError as e:
     print(f"✅ Erro capturado: {e}")
 
-# Teste 4: Validação - caminho inválido (sem .xlsx)
-print("\n=== Teste 4: Caminho sem .xlsx (deve dar erro) ===")
+# Teste 4: Validação - extensão não suportada
+print("\n=== Teste 4: Extensão não suportada (deve dar erro) ===")
 try:
     transactions = [Transaction(data="06/10/2025", valor=150.50, tipo_pagamento="PIX")]
     template = Template(
@@ -85,7 +85,7 @@ try:
         colunas=["Data"],
         mapeamento={"Data": "data"}
     )
-    gerar_planilha(transactions, template, "saida.csv")
+    gerar_planilha(transactions, template, "saida.txt")
     print("❌ Não deveria ter funcionado!")
 except ValueError as e:
     print(f"✅ Erro capturado: {e}")
@@ -0,0 +1,179 @@
+import unittest
+import importlib.util
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador import database
+from conciliador.models.template import Template
+from conciliador.services.file_handler import read_file, write_file
+from conciliador.services.sheet_processor import clean_sheet, clean_sheet_chunks
+from conciliador.services.data_mapper import extract_transactions
+from conciliador.services.output_generator import gerar_planilha
+from conciliador.services import template_manager
+from conciliador.services.pipeline import processar_planilha, ImportacaoCancelada
+
+
+def planilha_baguncada(n_linhas, seed=1):
+    '''
+    Planilha com linhas antes do cabeçalho, células vazias (mescladas) e linhas inválidas.
+    '''
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Coluna1": [None, None, "ID"] + [f"{i:04d}" for i in range(n_linhas)],
+        "Data Lançamento": [None, None, "Data do Pagamento"] + [f"{i % 28 + 1:02d}/10/2025" for i in range(n_linhas)],
+        "Forma Pagamento": [None, None, "Tipo"] + [rng.choice(["pix", "débito", None, "boleto"]) for _ in range(n_linhas)],
+        "Valor Total": [None, None, "Quantia"] + list(rng.uniform(0, 100, n_linhas).round(2)),
+        "Cliente": [None, None, "Nome"] + [None if rng.random() < 0.3 else f"Cliente {i}" for i in range(n_linhas)],
+        "Unnamed: 1": [None] * (n_linhas + 3),
+    })
+    df.iloc[40:60] = None  # bloco de linhas vazias no meio do arquivo
+    return df
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.entrada = os.path.join(self.pasta, "entrada.xlsx")
+        write_file(planilha_baguncada(300), self.entrada)
+        self.template = Template(
+            nome="Teste",
+            colunas=["Data", "Valor", "Tipo", "Cliente"],
+            mapeamento={"Data": "data", "Valor": "valor", "Tipo": "tipo_pagamento", "Cliente": "Nome"}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta)
+
+    def test_clean_sheet_chunks_igual_clean_sheet(self):
+        """Cabeçalho, linhas vazias e ffill entre blocos devem bater com clean_sheet."""
+        df = planilha_baguncada(120)
+        referencia = clean_sheet(df.copy())
+        for tamanho in (5, 11, 50):
+            blocos = [df.iloc[i:i + tamanho].copy() for i in range(0, len(df), tamanho)]
+            resultado = pd.concat(list(clean_sheet_chunks(blocos)))
+            pd.testing.assert_frame_equal(
+                resultado.astype(object).where(resultado.notna(), None),
+                referencia.astype(object).where(referencia.notna(), None),
+            )
+
+    def test_processar_planilha_igual_fluxo_em_memoria(self):
+        """O pipeline em blocos gera a mesma planilha e os mesmos erros do fluxo em memória."""
+        transactions, erros = extract_transactions(clean_sheet(read_file(self.entrada)))
+        caminho_memoria = os.path.join(self.pasta, "memoria.xlsx")
+        gerar_planilha(transactions, self.template, caminho_memoria)
+
+        caminho_blocos = os.path.join(self.pasta, "blocos.xlsx")
+        resumo = processar_planilha(self.entrada, self.template, caminho_blocos, chunk_size=37)
+
+        self.assertEqual(resumo["transacoes"], len(transactions))
+        self.assertEqual(resumo["erros"], erros)
+        self.assertEqual(resumo["linhas_lidas"], 303)
+        pd.testing.assert_frame_equal(
+            pd.read_excel(caminho_blocos),
+            pd.read_excel(caminho_memoria),
+            check_dtype=False,
+        )
+
+    def test_progresso_e_cancelamento(self):
+        """O progresso é publicado a cada bloco e o cancelamento para entre blocos sem gravar saída."""
+        eventos = []
+        caminho = os.path.join(self.pasta, "progresso.xlsx")
+        resumo = processar_planilha(self.entrada, self.template, caminho, chunk_size=100, progresso=eventos.append)
+        self.assertEqual(len(eventos), 4)
+        self.assertEqual(eventos[-1]["transacoes"], resumo["transacoes"])
+        self.assertEqual(eventos[-1]["erros"], len(resumo["erros"]))
+
+        caminho_cancelado = os.path.join(self.pasta, "cancelado.xlsx")
+        eventos = []
+        with self.assertRaises(ImportacaoCancelada):
+            processar_planilha(self.entrada, self.template, caminho_cancelado, chunk_size=100,
+                               progresso=eventos.append, cancelar=lambda: len(eventos) >= 2)
+        self.assertEqual(len(eventos), 2)
+        self.assertFalse(os.path.exists(caminho_cancelado))
+
+    def test_processar_planilha_saida_invalida(self):
+        with self.assertRaises(ValueError):
+            processar_planilha(self.entrada, self.template, os.path.join(self.pasta, "saida.txt"))
+        with self.assertRaises(ValueError):
+            processar_planilha(self.entrada, "não é template", os.path.join(self.pasta, "saida.xlsx"))
+
+    def test_previa_por_bloco(self):
+        """previa recebe cada bloco de saída, na ordem; juntos são a tabela gravada no arquivo."""
+        caminho = os.path.join(self.pasta, "saida.xlsx")
+        blocos = []
+        resumo = processar_planilha(self.entrada, self.template, caminho, chunk_size=37, previa=blocos.append)
+        self.assertGreater(len(blocos), 1)
+        resultado = pd.concat(blocos, ignore_index=True)
+        self.assertEqual(list(resultado.columns), self.template.colunas)
+        self.assertEqual(len(resultado), resumo["transacoes"])
+        pd.testing.assert_frame_equal(resultado, pd.read_excel(caminho), check_dtype=False)
+
+    def test_formatos_de_saida(self):
+        """CSV e JSON Lines em blocos têm o mesmo conteúdo da saída xlsx."""
+        caminho_xlsx = os.path.join(self.pasta, "saida.xlsx")
+        processar_planilha(self.entrada, self.template, caminho_xlsx, chunk_size=37)
+        esperado = pd.read_excel(caminho_xlsx)
+
+        caminho_csv = os.path.join(self.pasta, "saida.csv")
+        resumo = processar_planilha(self.entrada, self.template, caminho_csv, chunk_size=37)
+        self.assertEqual(resumo["transacoes"], len(esperado))
+        df_csv = pd.read_csv(caminho_csv, sep=";", decimal=",", encoding="utf-8-sig", dtype={"Data": str})
+        pd.testing.assert_frame_equal(df_csv, esperado, check_dtype=False)
+
+        # Separador e decimal configuráveis; formato explícito vale mais que a extensão
+        caminho_txt = os.path.join(self.pasta, "saida.txt")
+        processar_planilha(self.entrada, self.template, caminho_txt, chunk_size=37, formato="csv",
+                           separador=",", decimal=".")
+        pd.testing.assert_frame_equal(pd.read_csv(caminho_txt, encoding="utf-8-sig"), esperado, check_dtype=False)
+
+        caminho_jsonl = os.path.join(self.pasta, "saida.jsonl")
+        processar_planilha(self.entrada, self.template, caminho_jsonl, chunk_size=37)
+        df_jsonl = pd.read_json(caminho_jsonl, lines=True, dtype={"Data": str})
+        pd.testing.assert_frame_equal(df_jsonl, esperado, check_dtype=False)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow não instalado")
+    def test_formatos_arrow(self):
+        caminho_xlsx = os.path.join(self.pasta, "saida.xlsx")
+        processar_planilha(self.entrada, self.template, caminho_xlsx, chunk_size=37)
+        esperado = pd.read_excel(caminho_xlsx)
+        for extensao, ler in ((".parquet", pd.read_parquet), (".feather", pd.read_feather)):
+            caminho = os.path.join(self.pasta, "saida" + extensao)
+            processar_planilha(self.entrada, self.template, caminho, chunk_size=37)
+            pd.testing.assert_frame_equal(ler(caminho), esperado, check_dtype=False)
+
+    def test_template_identificado_pelo_cabecalho(self):
+        """Colunas que os sinônimos não reconhecem são lidas pelo template salvo com esse cabeçalho."""
+        entrada = os.path.join(self.pasta, "layout_proprio.xlsx")
+        pd.DataFrame({
+            "Quando": ["06/10/2025", "07/10/2025"],
+            "Como": ["pix", "débito"],
+            "Quanto": [10.0, 20.0],
+        }).to_excel(entrada, index=False)
+        saida = os.path.join(self.pasta, "saida.xlsx")
+
+        with patch('conciliador.services.template_manager.TEMPLATE_DIR', os.path.join(self.pasta, "templates")), \
+                patch('conciliador.database.DB_PATH', os.path.join(self.pasta, "conciliador.db")):
+            with self.assertRaises(ValueError):
+                processar_planilha(entrada, self.template, saida, identificar_template=True)
+
+            template_manager.save_template("Layout Próprio", {"data": "Quando", "tipo": "Como", "valor": "Quanto"})
+            resumo = processar_planilha(entrada, self.template, saida, identificar_template=True)
+            database.fechar()
+
+        self.assertEqual(resumo["template_identificado"], "Layout Próprio")
+        self.assertEqual(resumo["transacoes"], 2)
+        self.assertEqual(list(pd.read_excel(saida)["Valor"]), [10.0, 20.0])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
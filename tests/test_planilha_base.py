@@ -0,0 +1,119 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Font
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.template import Template
+from conciliador.models.transaction import Transaction
+from conciliador.models.transaction_batch import TransactionBatch
+from conciliador.services import planilha_base
+from conciliador.services.planilha_base import (
+    ler_planilha_base, preencher_planilha_base, caminho_planilha_preenchida, MODO_SUBSTITUIR,
+)
+
+
+class TestPlanilhaBase(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.base = os.path.join(self.pasta, "omie.xlsx")
+
+        # Modelo de importação: título, cabeçalho, duas contas já lançadas e uma aba de instruções
+        livro = openpyxl.Workbook()
+        aba = livro.active
+        aba.title = "Contas a Receber"
+        aba["A1"] = "Importação de Contas a Receber"
+        aba.append(["Código", "Data de Emissão", "Valor da Conta", "Categoria", " observação "])
+        aba["A2"].font = Font(bold=True)
+        aba.append(["C1", "01/10/2025", 5.0, "Vendas", "antiga"])
+        aba.append(["C2", "02/10/2025", 6.0, "Vendas", None])
+        livro.create_sheet("Instruções")["A1"] = "Preencha a partir da linha 3"
+        livro.save(self.base)
+
+        self.template = Template(
+            "Omie",
+            ["Valor da Conta", "Data de Emissão", "Observação"],
+            {"Valor da Conta": "valor", "Data de Emissão": "data", "Observação": "Cliente"},
+        )
+        self.lote = TransactionBatch(["06/10/2025", "07/10/2025"], ["PIX", "CRÉDITO"], [10.0, 20.5],
+                                     {"Cliente": ["Ana", "João"]})
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta)
+
+    def _linhas(self, caminho, aba="Contas a Receber"):
+        return list(openpyxl.load_workbook(caminho)[aba].iter_rows(values_only=True))
+
+    def test_ler_planilha_base(self):
+        base = ler_planilha_base(self.base)
+        self.assertEqual((base["aba"], base["linha_cabecalho"]), ("Contas a Receber", 2))
+        self.assertEqual(base["colunas"][:2], ["Código", "Data de Emissão"])
+        self.assertEqual(base["indice"]["observação"], 4)
+
+    def test_acrescentar(self):
+        saida = os.path.join(self.pasta, "saida.xlsx")
+        resumo = preencher_planilha_base(self.base, self.lote, self.template, caminho_saida=saida)
+        self.assertEqual(resumo["linhas_escritas"], 2)
+        self.assertEqual(resumo["colunas"], {"Valor da Conta": 2, "Data de Emissão": 1, "Observação": 4})
+
+        linhas = self._linhas(saida)
+        self.assertEqual(linhas[2], ("C1", "01/10/2025", 5, "Vendas", "antiga"))
+        self.assertEqual(linhas[4:], [(None, "06/10/2025", 10.0, None, "Ana"), (None, "07/10/2025", 20.5, None, "João")])
+
+        # O resto da planilha base é preservado
+        livro = openpyxl.load_workbook(saida)
+        self.assertEqual(livro.sheetnames, ["Contas a Receber", "Instruções"])
+        self.assertTrue(livro["Contas a Receber"]["A2"].font.b)
+        self.assertEqual(livro["Instruções"]["A1"].value, "Preencha a partir da linha 3")
+        self.assertEqual(len(self._linhas(self.base)), 4)
+
+    def test_substituir_em_blocos(self):
+        # Blocos do pipeline: lotes, lista de Transactions e DataFrame já nas colunas do template
+        blocos = iter([
+            self.lote,
+            [Transaction("08/10/2025", "pix", 1.0, Cliente="Maria")],
+            pd.DataFrame({"Data de Emissão": ["09/10/2025"], "Valor da Conta": [2.0], "Observação": ["Pedro"],
+                          "Tipo": ["PIX"]}),
+        ])
+        saida = os.path.join(self.pasta, "saida.xlsx")
+        resumo = preencher_planilha_base(self.base, blocos, self.template, modo=MODO_SUBSTITUIR, caminho_saida=saida)
+        self.assertEqual(resumo["linhas_escritas"], 4)
+        linhas = self._linhas(saida)
+        self.assertEqual(linhas[1][0], "Código")
+        self.assertEqual([linha[4] for linha in linhas[2:]], ["Ana", "João", "Maria", "Pedro"])
+
+    def test_colunas_ausentes_e_modo_invalido(self):
+        template = Template("Outro", ["Valor da Conta", "Vencimento"], {"Valor da Conta": "valor", "Vencimento": "data"})
+        with self.assertRaises(ValueError):
+            preencher_planilha_base(self.base, self.lote, template, caminho_saida=os.path.join(self.pasta, "x.xlsx"))
+        with self.assertRaises(ValueError):
+            preencher_planilha_base(self.base, self.lote, self.template, modo="inserir")
+        self.assertFalse(os.path.exists(os.path.join(self.pasta, "x.xlsx")))
+
+    def test_caminho_padrao(self):
+        dia = datetime(2025, 10, 6)
+        primeiro = caminho_planilha_preenchida(self.pasta, dia)
+        self.assertEqual(os.path.basename(primeiro), "omie_preenchida_20251006.xlsx")
+        open(primeiro, "w").close()
+        self.assertEqual(os.path.basename(caminho_planilha_preenchida(self.pasta, dia)), "omie_preenchida_20251006_2.xlsx")
+
+        pasta_saida = planilha_base.PASTA_SAIDA
+        planilha_base.PASTA_SAIDA = self.pasta
+        try:
+            resumo = preencher_planilha_base(self.base, self.lote, self.template)
+        finally:
+            planilha_base.PASTA_SAIDA = pasta_saida
+        self.assertTrue(os.path.basename(resumo["caminho_saida"]).startswith("omie_preenchida_"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
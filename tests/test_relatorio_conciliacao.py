@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+import openpyxl
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.transaction_batch import TransactionBatch
+from conciliador.services.conciliacao import conciliar, conciliar_com_tolerancia
+from conciliador.services.relatorio_conciliacao import gerar_relatorio, resumo_por_dia_e_tipo
+
+
+class TestRelatorioConciliacao(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.caminho = os.path.join(self.pasta, "relatorio.xlsx")
+        self.erp = TransactionBatch(
+            ["06/10/2025", "06/10/2025", "07/10/2025", "07/10/2025"],
+            ["PIX", "crédito", "CRÉDITO", "DÉBITO"],
+            [10.0, 100.0, 50.0, 30.0],
+            {"Cliente": ["Ana", "João", "Maria", "Pedro"]},
+        )
+        self.extrato = TransactionBatch(
+            ["06/10/2025", "07/10/2025", "07/10/2025", "09/10/2025"],
+            ["PIX", "CRÉDITO", "CRÉDITO", "PIX"],
+            [10.0, 99.98, 50.0, 5.0],
+        )
+        self.resultado = conciliar_com_tolerancia(self.erp, self.extrato, dias_tolerancia=1, valor=0.05)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta)
+
+    def test_abas(self):
+        resumo = gerar_relatorio(self.resultado, self.erp, self.extrato, self.caminho, nomes=("ERP", "Extrato"),
+                                 linhas_por_bloco=2)
+        self.assertEqual((resumo["conciliados"], resumo["sem_par_esquerda"], resumo["sem_par_direita"],
+                          resumo["divergencias"]), (3, 1, 1, 1))
+
+        livro = openpyxl.load_workbook(self.caminho, read_only=True)
+        self.assertEqual(livro.sheetnames, ["Conciliados", "Sem par - ERP", "Sem par - Extrato", "Divergências", "Resumo"])
+
+        conciliados = pd.read_excel(self.caminho, sheet_name="Conciliados")
+        self.assertEqual(conciliados["Nº ERP"].tolist(), [1, 2, 3])
+        self.assertEqual(conciliados["Critério"].tolist(), ["exata", "tolerancia", "exata"])
+
+        # Campos extras acompanham as transações sem par
+        sem_par = pd.read_excel(self.caminho, sheet_name="Sem par - ERP")
+        self.assertEqual(sem_par[["Nº ERP", "Tipo", "Cliente"]].values.tolist(), [[4, "DÉBITO", "Pedro"]])
+
+        divergencia = pd.read_excel(self.caminho, sheet_name="Divergências").iloc[0]
+        self.assertEqual((divergencia["Data ERP"], divergencia["Data Extrato"], divergencia["Dias"]),
+                         ("06/10/2025", "07/10/2025", 1))
+        self.assertAlmostEqual(divergencia["Diferença"], -0.02)
+
+    def test_resumo_por_dia_e_tipo(self):
+        tabela = resumo_por_dia_e_tipo(self.resultado, self.erp, self.extrato, nomes=("ERP", "Extrato"))
+        linhas = {(linha["Data"], linha["Tipo"]): linha for _, linha in tabela.iterrows()}
+
+        # Pares entram pelo dia e tipo (canônico) do ERP
+        credito = linhas[("06/10/2025", "CRÉDITO")]
+        self.assertEqual(credito["Conciliados"], 1)
+        self.assertAlmostEqual(credito["Diferença"], -0.02)
+        self.assertEqual(linhas[("07/10/2025", "DÉBITO")]["Sem par ERP"], 1)
+        self.assertAlmostEqual(linhas[("09/10/2025", "PIX")]["Valor sem par Extrato"], 5.0)
+
+        self.assertEqual(linhas[("Total", "CRÉDITO")]["Conciliados"], 2)
+        geral = tabela.iloc[-1]
+        self.assertEqual((geral["Data"], geral["Conciliados"], geral["Sem par ERP"], geral["Sem par Extrato"]),
+                         ("Total geral", 3, 1, 1))
+        self.assertAlmostEqual(geral["Valor conciliado"], 160.0)
+
+    def test_resultado_sem_pares(self):
+        resultado = conciliar(self.erp, TransactionBatch([], [], []))
+        resumo = gerar_relatorio(resultado, self.erp, TransactionBatch([], [], []), self.caminho)
+        self.assertEqual(resumo["conciliados"], 0)
+        self.assertEqual(list(pd.read_excel(self.caminho, sheet_name="Conciliados").columns)[:2], ["Nº Extrato", "Nº ERP"])
+        with self.assertRaises(ValueError):
+            gerar_relatorio({"pares": None}, self.erp, self.extrato, self.caminho)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
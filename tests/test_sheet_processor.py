@@ -5,12 +5,16 @@ Autor: Paulo Ygor - Estagiário | Grupo Doma
 
 import sys
 import os
+import unittest
+
+import numpy as np
+import pandas as pd
 
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.conciliador.services.file_handler import read_file
-from src.conciliador.services.sheet_processor import clean_sheet, header_finder, remove_empty, unmerge_cells
+from src.conciliador.services.sheet_processor import LIMITE_FFILL, clean_sheet, header_finder, remove_empty, unmerge_cells
 
 
 def test_sheet_processor_completo():
@@ -112,6 +116,87 @@ def test_funcoes_individuais():
         traceback.print_exc()
 
 
+class TestHeaderFinder(unittest.TestCase):
+
+    def planilha(self, linhas, n_colunas=4):
+        colunas = [f"Unnamed: {i}" for i in range(n_colunas)]
+        return pd.DataFrame([linha + [np.nan] * (n_colunas - len(linha)) for linha in linhas], columns=colunas)
+
+    def test_sem_colunas_sem_nome(self):
+        df = pd.DataFrame({"Data": ["06/10/2025"], "Valor": [1.0]})
+        self.assertEqual(header_finder(df), -1)
+
+    def test_cabecalho_abaixo_do_titulo(self):
+        df = self.planilha([
+            ["Extrato Banco X"],
+            [],
+            ["Data", "Tipo", "Valor", "Cliente"],
+            ["06/10/2025", "pix", 10.0, "Ana"],
+        ])
+        self.assertEqual(header_finder(df), 2)
+
+    def test_pontuacao_prefere_linha_com_sinonimos(self):
+        # A primeira linha cheia é um bloco de informações da conta, não o cabeçalho
+        df = self.planilha([
+            ["Conta 123", "Agência 1", "Titular", "Período"],
+            ["Data Lançamento", "Forma de Pagamento", "Valor Total", "Cliente"],
+            ["06/10/2025", "pix", 10.0, "Ana"],
+        ])
+        self.assertEqual(header_finder(df), 1)
+
+    def test_prefere_texto_a_linha_de_dados(self):
+        df = self.planilha([
+            [45936, 1, 10.0, 2],
+            ["Coluna A", "Coluna B", "Coluna C", "Coluna D"],
+        ])
+        self.assertEqual(header_finder(df), 1)
+
+    def test_janela_limita_a_busca(self):
+        df = self.planilha([["Título"]] * 5 + [["Data", "Tipo", "Valor", "Cliente"]])
+        self.assertEqual(header_finder(df), 5)
+        self.assertEqual(header_finder(df, janela=5), 0)
+
+    def test_sem_candidata_retorna_zero(self):
+        df = self.planilha([["a"], ["b", "c"]])
+        self.assertEqual(header_finder(df), 0)
+
+
+class TestCleanSheet(unittest.TestCase):
+
+    def clean_sheet_encadeado(self, df):
+        # Sequência original de etapas, usada como referência
+        header_index = header_finder(df)
+        if header_index >= 0:
+            df.columns = df.iloc[header_index]
+            df.columns = df.columns.astype(str)
+            df = df[header_index + 1:]
+        return unmerge_cells(remove_empty(df)).reset_index(drop=True)
+
+    def test_equivalente_as_etapas_encadeadas(self):
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            n_linhas = int(rng.integers(1, 40))
+            colunas = {}
+            for j in range(int(rng.integers(1, 6))):
+                valores = pd.Series(rng.choice([1.5, "pix", "06/10/2025", pd.Timestamp("2025-10-06")], n_linhas), dtype=object)
+                valores[rng.random(n_linhas) < rng.uniform(0, 1)] = None
+                colunas[f"Unnamed: {j}"] = valores
+            df = pd.DataFrame(colunas)
+            if n_linhas > 2:
+                df.iloc[1] = ["Data", "Tipo", "Valor", "Cliente", "NSU"][:df.shape[1]]
+
+            pd.testing.assert_frame_equal(clean_sheet(df.copy()), self.clean_sheet_encadeado(df.copy()))
+
+    def test_ffill_respeita_limite(self):
+        valores = ["Data", "x"] + [None] * (LIMITE_FFILL + 2) + ["y"]
+        df = pd.DataFrame({"Unnamed: 0": valores, "Unnamed: 1": ["Valor"] + list(range(len(valores) - 1))})
+        limpo = clean_sheet(df)
+
+        self.assertEqual(list(limpo["Data"][:LIMITE_FFILL + 1]), ["x"] * (LIMITE_FFILL + 1))
+        self.assertTrue(pd.isna(limpo["Data"].iloc[LIMITE_FFILL + 1]))
+        self.assertEqual(limpo["Data"].iloc[-1], "y")
+
+
 if __name__ == "__main__":
     print("\n INICIANDO TESTES DO SHEET_PROCESSOR\n")
 
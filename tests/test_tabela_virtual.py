@@ -0,0 +1,135 @@
+import unittest
+import os
+import sys
+import time
+import tkinter as tk
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.ui.components.tabela_virtual import (
+    ModeloTabela, TabelaVirtual, formatar_coluna, limitar_primeira_linha, cortar_texto,
+)
+
+
+def resultado_grande(n_linhas):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Data": rng.choice(["06/10/2025", "07/10/2025"], n_linhas),
+        "Tipo": rng.choice(["PIX", "DÉBITO"], n_linhas),
+        "Valor": np.round(rng.uniform(0, 10000, n_linhas), 2),
+        "NSU": np.arange(n_linhas),
+    })
+
+
+class TestModeloTabela(unittest.TestCase):
+
+    def test_formatacao(self):
+        self.assertEqual(formatar_coluna(pd.Series([1234.5, np.nan, -2.0])), ["1.234,50", "", "-2,00"])
+        self.assertEqual(formatar_coluna(pd.Series([1, 20])), ["1", "20"])
+        self.assertEqual(formatar_coluna(pd.Series(pd.to_datetime(["2025-10-06", None]))), ["06/10/2025", ""])
+        self.assertEqual(formatar_coluna(pd.Series(["pix", None, 3.5], dtype=object)), ["pix", "", "3,50"])
+
+    def test_janelas_entre_blocos(self):
+        """Uma janela que atravessa blocos devolve exatamente as linhas pedidas."""
+        df = resultado_grande(1000)
+        modelo = ModeloTabela(df)
+        linhas = modelo.linhas(250, 270)
+        self.assertEqual(len(linhas), 20)
+        self.assertEqual(linhas[0][3], "250")
+        self.assertEqual(linhas[-1][3], "269")
+        self.assertEqual(modelo.linhas(990, 2000)[-1][3], "999")
+        self.assertEqual(modelo.alinhamentos, ["w", "w", "e", "e"])
+
+    def test_so_formata_a_janela(self):
+        """Pedir uma janela no fim de 1M linhas não formata o DataFrame inteiro, e o cache é limitado."""
+        modelo = ModeloTabela(resultado_grande(1_000_000))
+        inicio = time.perf_counter()
+        for primeira in range(0, 1_000_000, 7919):
+            modelo.linhas(primeira, primeira + 40)
+        self.assertLess(time.perf_counter() - inicio, 5)
+        self.assertLessEqual(len(modelo._blocos), ModeloTabela.BLOCOS_EM_CACHE)
+
+    def test_acrescentar_blocos(self):
+        """Linhas acrescentadas aparecem no fim, inclusive no bloco que estava incompleto no cache."""
+        df = resultado_grande(300)
+        modelo = ModeloTabela(df.iloc[:100])
+        self.assertEqual(modelo.linhas(90, 200)[-1][3], "99")
+
+        modelo.acrescentar(df.iloc[100:250])
+        modelo.acrescentar(df.iloc[250:250]) # Bloco vazio não muda nada
+        modelo.acrescentar(df.iloc[250:])
+        self.assertEqual(len(modelo), 300)
+        self.assertEqual([linha[3] for linha in modelo.linhas(95, 300)], [str(i) for i in range(95, 300)])
+        self.assertEqual(modelo.linhas(0, 300), ModeloTabela(df).linhas(0, 300))
+
+        with self.assertRaises(ValueError):
+            modelo.acrescentar(df[["Valor"]])
+
+    def test_larguras_e_limites(self):
+        modelo = ModeloTabela(pd.DataFrame({"A": ["x" * 100], "Valor Total": [1.0]}))
+        self.assertEqual(modelo.larguras(), [40, 11])
+        self.assertEqual(ModeloTabela(resultado_grande(10)).larguras(5, 10), [10, 6, 8, 4])
+        self.assertEqual(limitar_primeira_linha(990, 30, 1000), 970)
+        self.assertEqual(limitar_primeira_linha(-5, 30, 10), 0)
+        self.assertEqual(cortar_texto("Maria Santos", 6), "Maria…")
+
+
+class TestTabelaVirtual(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.raiz = tk.Tk()
+        except tk.TclError:
+            raise unittest.SkipTest("Sem display para o Tk")
+        cls.raiz.geometry("800x400")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.raiz.destroy()
+
+    def test_pool_nao_cresce_com_as_linhas(self):
+        tabela = TabelaVirtual(self.raiz)
+        tabela.pack(fill="both", expand=True)
+        tabela.definir_dados(resultado_grande(100_000))
+        self.raiz.update()
+
+        itens = len(tabela.corpo.find_all())
+        self.assertLess(itens, 100 * 5)
+
+        tabela.rolar_para(50_000)
+        self.raiz.update()
+        self.assertEqual(len(tabela.corpo.find_all()), itens)
+        _, textos = tabela._itens[0]
+        self.assertEqual(tabela.corpo.itemcget(textos[3], "text"), "50000")
+        tabela.destroy()
+
+    def test_previa_incremental(self):
+        """Blocos acrescentados não mudam a rolagem; as larguras se ajustam nas fatias ociosas."""
+        tabela = TabelaVirtual(self.raiz)
+        tabela.pack(fill="both", expand=True)
+        df = resultado_grande(5000)
+        df.loc[4000, "Tipo"] = "TRANSFERÊNCIA BANCÁRIA"
+        tabela.acrescentar_dados(df.iloc[:1000])
+        self.raiz.update()
+        tabela.rolar_para(500)
+        tabela.acrescentar_dados(df.iloc[1000:])
+        self.raiz.update()
+
+        self.assertEqual(len(tabela.modelo), 5000)
+        self.assertEqual(tabela.primeira, 500)
+        self.assertEqual(tabela._medidas, 5000)
+        self.assertEqual(tabela._larguras[1], len("TRANSFERÊNCIA BANCÁRIA"))
+
+        tabela.limpar()
+        self.raiz.update()
+        self.assertEqual(len(tabela.modelo), 0)
+        tabela.destroy()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -2,12 +2,14 @@ import unittest
 import os
 import json
 import shutil
+import tempfile
 from unittest.mock import patch
 
 # Adiciona o caminho para encontrar os módulos da aplicação
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from conciliador import database
 from conciliador.services import template_manager
 
 class TestTemplateManager(unittest.TestCase):
@@ -21,10 +23,15 @@ class TestTemplateManager(unittest.TestCase):
         # Usamos 'patch' para redirecionar o TEMPLATE_DIR do módulo para nosso diretório de teste
         self.patcher = patch('conciliador.services.template_manager.TEMPLATE_DIR', self.test_dir)
         self.patcher.start()
+        # Banco temporário para a cópia dos templates no SQLite
+        self.pasta_banco = tempfile.mkdtemp()
+        self.patcher_db = patch('conciliador.database.DB_PATH', os.path.join(self.pasta_banco, "conciliador.db"))
+        self.patcher_db.start()
         # Garante que o diretório de teste não exista antes de começar
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
         os.makedirs(self.test_dir)
+        template_manager.refresh_templates()
         print(f"\n[SETUP] Test directory '{self.test_dir}' created for {self._testMethodName}")
 
     def tearDown(self):
@@ -34,6 +41,9 @@ class TestTemplateManager(unittest.TestCase):
         """
         shutil.rmtree(self.test_dir)
         self.patcher.stop()
+        database.fechar()
+        self.patcher_db.stop()
+        shutil.rmtree(self.pasta_banco)
         print(f"[TEARDOWN] Test directory '{self.test_dir}' removed.")
 
     def test_save_template_success(self):
@@ -126,5 +136,139 @@ class TestTemplateManager(unittest.TestCase):
         self.assertTrue(file_path.endswith(expected_filename))
 
 
+    def test_header_signature_normalizada(self):
+        """A assinatura ignora ordem, maiúsculas, espaços extras e colunas sem nome."""
+        assinatura = template_manager.header_signature(["Data Lançamento", "Valor Total"])
+        self.assertEqual(assinatura, template_manager.header_signature(["valor  total", "Unnamed: 3", "DATA LANÇAMENTO"]))
+        self.assertNotEqual(assinatura, template_manager.header_signature(["Data Lançamento", "Valor"]))
+
+    def test_resolve_template_pela_assinatura(self):
+        """Cabeçalho igual às colunas do mapping: encontrado direto no índice."""
+        template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+        template_manager.save_template("Só Saída", {"Data": "data", "Valor": "valor"})
+
+        encontrado = template_manager.resolve_template(["VALOR TOTAL", "Forma Pagamento", "Data Lançamento"])
+        self.assertEqual(encontrado["nome"], "Banco Inter")
+        self.assertEqual(encontrado["confianca"], 1.0)
+        # Nomes reais das colunas da planilha, não os do template
+        self.assertEqual(encontrado["colunas"], {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "VALOR TOTAL"})
+
+    def test_resolve_template_pelo_cabecalho_completo(self):
+        """O cabeçalho completo salvo também entra no índice."""
+        cabecalho = ["Data", "Descrição", "Forma", "Bruto", "NSU"]
+        template_manager.save_template("Adquirente", {"data": "Data", "tipo": "Forma", "valor": "Bruto"}, cabecalho)
+        self.assertEqual(template_manager.resolve_template(cabecalho)["confianca"], 1.0)
+
+    def test_resolve_template_busca_aproximada(self):
+        """Sem acerto direto, vence o template mais parecido que tenha todas as colunas do mapping."""
+        cabecalho = ["Data", "Descrição", "Forma", "Bruto", "NSU"]
+        template_manager.save_template("Adquirente", {"data": "Data", "tipo": "Forma", "valor": "Bruto"}, cabecalho)
+
+        encontrado = template_manager.resolve_template(cabecalho + ["Coluna Nova"])
+        self.assertEqual(encontrado["nome"], "Adquirente")
+        self.assertEqual(encontrado["confianca"], round(5 / 6, 3))
+
+        # Falta uma coluna do mapping
+        self.assertIsNone(template_manager.resolve_template(["Data", "Descrição", "Forma", "NSU"]))
+        # Parecido demais pouco: abaixo de SIMILARIDADE_MINIMA
+        self.assertIsNone(template_manager.resolve_template(["Data", "Forma", "Bruto"] + [f"Extra {i}" for i in range(10)]))
+
+    def test_indice_atualizado_ao_salvar_e_deletar(self):
+        colunas = ["Dt", "Meio", "Quantia"]
+        self.assertIsNone(template_manager.resolve_template(colunas))
+
+        template_manager.save_template("Novo", {"data": "Dt", "tipo": "Meio", "valor": "Quantia"})
+        self.assertEqual(template_manager.resolve_template(colunas)["nome"], "Novo")
+
+        template_manager.delete_template("Novo")
+        self.assertIsNone(template_manager.resolve_template(colunas))
+
+
+    def test_registro_nao_rele_arquivos_inalterados(self):
+        """list/load/get consultam o registro em memória; o JSON só é lido uma vez."""
+        template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+        template_manager.list_templates()
+
+        with patch('conciliador.services.template_manager.json.load', side_effect=AssertionError("releu o arquivo")):
+            self.assertEqual(template_manager.list_templates(), ["Banco Inter"])
+            self.assertEqual(template_manager.load_template("Banco Inter")["mapping"]["data"], "Data Lançamento")
+            self.assertIsNotNone(template_manager.get_template("Banco Inter"))
+
+    def test_registro_rele_arquivo_alterado_no_disco(self):
+        """Um arquivo editado fora da aplicação (mtime diferente) é relido na próxima consulta."""
+        file_path = template_manager.save_template("Saída", {"Data": "data"})
+        self.assertEqual(template_manager.get_template("Saída")["template"].colunas, ["Data"])
+
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"nome": "Saída", "mapping": {"Data": "data", "Valor": "valor"}}, f)
+        estado = os.stat(file_path)
+        os.utime(file_path, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+
+        self.assertEqual(template_manager.get_template("Saída")["template"].colunas, ["Data", "Valor"])
+
+    def test_banco_acompanha_save_e_delete(self):
+        """save/delete gravam também no banco, com a data de modificação do arquivo."""
+        pasta = os.path.abspath(self.test_dir)
+        file_path = template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+
+        copias = database.templates_da_pasta(pasta)
+        self.assertEqual(list(copias), ["banco_inter.json"])
+        self.assertEqual(copias["banco_inter.json"]["mtime"], os.stat(file_path).st_mtime_ns)
+        self.assertEqual(copias["banco_inter.json"]["dados"]["mapping"]["valor"], "Valor Total")
+
+        self.assertTrue(template_manager.delete_template("Banco Inter"))
+        self.assertEqual(database.templates_da_pasta(pasta), {})
+
+    def test_registro_le_do_banco(self):
+        """Depois de reiniciar o registro, os arquivos inalterados vêm do banco (o JSON não é reaberto)."""
+        template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+        template_manager.refresh_templates()
+
+        with patch('conciliador.services.template_manager.json.load', side_effect=AssertionError("releu o arquivo")):
+            self.assertEqual(template_manager.get_template("Banco Inter")["origem"]["data"], "Data Lançamento")
+            self.assertEqual(template_manager.resolve_template(["Data Lançamento", "Forma Pagamento", "Valor Total"])["nome"], "Banco Inter")
+
+    def test_banco_atualizado_por_mudancas_no_disco(self):
+        """Arquivos criados, editados ou removidos fora da aplicação atualizam a cópia no banco."""
+        pasta = os.path.abspath(self.test_dir)
+        file_path = os.path.join(self.test_dir, "saida.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"nome": "Saída", "mapping": {"Data": "data"}}, f)
+        template_manager.template_names()
+        self.assertEqual(database.templates_da_pasta(pasta)["saida.json"]["dados"]["mapping"], {"Data": "data"})
+
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump({"nome": "Saída", "mapping": {"Data": "data", "Valor": "valor"}}, f)
+        estado = os.stat(file_path)
+        os.utime(file_path, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+        template_manager.template_names()
+        self.assertEqual(database.templates_da_pasta(pasta)["saida.json"]["dados"]["mapping"], {"Data": "data", "Valor": "valor"})
+
+        os.remove(file_path)
+        self.assertEqual(template_manager.template_names(), [])
+        self.assertEqual(database.templates_da_pasta(pasta), {})
+
+    def test_template_names_so_validos(self):
+        """O menu só recebe templates que viram objetos Template válidos."""
+        template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+        template_manager.save_template("Saída Omie", {"Data": "data", "Valor": "valor"})
+        with open(os.path.join(self.test_dir, "quebrado.json"), "w", encoding="utf-8") as f:
+            f.write("{ não é json")
+        with open(os.path.join(self.test_dir, ".json"), "w", encoding="utf-8") as f:
+            json.dump({"nome": "", "mapping": {"data": "x"}}, f)
+
+        self.assertEqual(template_manager.template_names(), ["Banco Inter", "Saída Omie"])
+
+        # Template de origem: saída padrão + colunas de origem
+        inter = template_manager.get_template("Banco Inter")
+        self.assertEqual(inter["template"].mapeamento, template_manager.MAPEAMENTO_PADRAO)
+        self.assertEqual(inter["origem"]["valor"], "Valor Total")
+        # Template de saída: colunas = chaves do mapping
+        omie = template_manager.get_template("Saída Omie")
+        self.assertEqual(omie["template"].colunas, ["Data", "Valor"])
+        self.assertIsNone(omie["origem"])
+        self.assertIsNone(template_manager.get_template("Quebrado"))
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models import transaction as transaction_module
+from conciliador.models.transaction import Transaction, normalizar_tipo, normalize_tipos, registrar_tipos, tabela_de_tipos
+
+
+class TestTiposDePagamento(unittest.TestCase):
+
+    def setUp(self):
+        # Guarda a tabela original para desfazer os registros feitos nos testes
+        self.tabela_original = dict(transaction_module.TIPOS_NORMALIZADOS)
+
+    def tearDown(self):
+        transaction_module.TIPOS_NORMALIZADOS.clear()
+        transaction_module.TIPOS_NORMALIZADOS.update(self.tabela_original)
+
+    def test_normalizar_tipo_sem_acento_e_caixa(self):
+        """A busca ignora caixa, espaços nas pontas e acentos."""
+        self.assertEqual(normalizar_tipo("  Crédito "), "CRÉDITO")
+        self.assertEqual(normalizar_tipo("DEBITO"), "DÉBITO")
+        self.assertEqual(normalizar_tipo("Convênio"), "CONVENIADO")
+        self.assertEqual(normalizar_tipo("Cash"), "DINHEIRO")
+        self.assertIsNone(normalizar_tipo("boleto"))
+        self.assertIsNone(normalizar_tipo(3))
+
+    def test_transaction_tipo_valido_e_invalido(self):
+        transaction = Transaction(data="06/10/2025", tipo_pagamento="Pix", valor=10.0)
+        self.assertEqual(transaction.tipo_pagamento, "Pix")  # valor original é mantido
+        with self.assertRaises(ValueError) as contexto:
+            Transaction(data="06/10/2025", tipo_pagamento="Boleto", valor=10.0)
+        self.assertIn("'boleto' é inválido", str(contexto.exception))
+
+    def test_registrar_tipos(self):
+        """Sinônimos novos podem ser registrados em tempo de execução."""
+        self.assertIsNone(normalizar_tipo("cartão de crédito"))
+        registrar_tipos({"Cartão de Crédito": "CRÉDITO"})
+        self.assertEqual(normalizar_tipo("CARTAO DE CREDITO"), "CRÉDITO")
+        Transaction(data="06/10/2025", tipo_pagamento="cartão de crédito", valor=10.0)
+
+    def test_registrar_tipos_invalido(self):
+        with self.assertRaises(TypeError):
+            registrar_tipos({"ted": None})
+        with self.assertRaises(ValueError):
+            registrar_tipos([("", "PIX")])
+
+    def test_tabela_de_tipos_da_importacao(self):
+        """Sinônimos de um template ficam só na tabela da importação."""
+        tabela = tabela_de_tipos({"Cartão de Crédito": "CRÉDITO"})
+        self.assertEqual(normalizar_tipo("cartao de credito", tabela), "CRÉDITO")
+        self.assertIsNone(normalizar_tipo("cartao de credito"))
+        self.assertEqual(transaction_module.TIPOS_NORMALIZADOS, self.tabela_original)
+        normalizados, _ = normalize_tipos(["Cartão de Crédito", "pix"], tabela)
+        self.assertEqual(list(normalizados), ["CRÉDITO", "PIX"])
+        Transaction._com_tabela("06/10/2025", "cartão de crédito", 10.0, {}, tabela)
+        with self.assertRaises(ValueError):
+            Transaction(data="06/10/2025", tipo_pagamento="cartão de crédito", valor=10.0)
+
+    def test_normalize_tipos_em_lote(self):
+        normalizados, desconhecidos = normalize_tipos(["pix", "Débito", "boleto", "PIX", 3, "boleto"])
+        self.assertEqual(list(normalizados), ["PIX", "DÉBITO", None, "PIX", None, None])
+        self.assertEqual(desconhecidos, ["boleto", 3])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
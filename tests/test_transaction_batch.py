@@ -0,0 +1,139 @@
+import unittest
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.transaction import Transaction
+from conciliador.models.transaction_batch import TransactionBatch, TransactionView
+from conciliador.models.template import Template, ACESSO_ATRIBUTO, ACESSO_EXTRA, ACESSO_CONSTANTE
+from conciliador.services.data_mapper import extract_transactions, extract_transaction_batch
+from conciliador.services.output_generator import gerar_planilha, montar_dataframe
+
+
+class TestTransactionBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Data Lançamento": ["06/10/2025", "07/10/2025", "xx", "08/10/2025"],
+            "Forma Pagamento": ["pix", "débito", "pix", "dinheiro"],
+            "Valor Total": [150.5, 200.0, 10.0, 75.0],
+            "Cliente": ["João Silva", "Maria Santos", "Ana", "Pedro Costa"],
+        })
+        self.template = Template(
+            nome="Teste",
+            colunas=["Data", "Valor", "Tipo", "Cliente", "Vazio"],
+            mapeamento={"Data": "data", "Valor": "valor", "Tipo": "tipo_pagamento", "Cliente": "Cliente", "Vazio": "inexistente"}
+        )
+        self.caminho_saida = "test_batch_output.xlsx"
+
+    def tearDown(self):
+        if os.path.exists(self.caminho_saida):
+            os.remove(self.caminho_saida)
+
+    def test_extract_batch_igual_lista(self):
+        """O lote deve ter as mesmas linhas e erros que a lista de Transactions."""
+        lote, erros = extract_transaction_batch(self.df)
+        transactions, erros_lista = extract_transactions(self.df)
+
+        self.assertEqual(erros, erros_lista)
+        self.assertEqual(len(lote), len(transactions))
+        for view, transaction in zip(lote, transactions):
+            self.assertIsInstance(view, TransactionView)
+            self.assertEqual(view.data, transaction.data)
+            self.assertEqual(view.tipo_pagamento, transaction.tipo_pagamento)
+            self.assertEqual(view.valor, transaction.valor)
+            self.assertEqual(dict(view.extras), transaction.extras)
+
+    def test_get_valor_mapeado_com_view(self):
+        """Template.get_valor_mapeado aceita a visão de linha como se fosse Transaction."""
+        lote, _ = extract_transaction_batch(self.df)
+        view = lote[1]
+        self.assertEqual(self.template.get_valor_mapeado(view, "Data"), "07/10/2025")
+        self.assertEqual(self.template.get_valor_mapeado(view, "Cliente"), "Maria Santos")
+        self.assertEqual(self.template.get_valor_mapeado(view, "Vazio"), "")
+
+    def test_gerar_planilha_com_lote(self):
+        """gerar_planilha gera o mesmo conteúdo a partir do lote e da lista."""
+        lote, _ = extract_transaction_batch(self.df)
+        gerar_planilha(lote, self.template, self.caminho_saida)
+        df_lote = pd.read_excel(self.caminho_saida)
+
+        transactions, _ = extract_transactions(self.df)
+        gerar_planilha(transactions, self.template, self.caminho_saida)
+        df_lista = pd.read_excel(self.caminho_saida)
+
+        pd.testing.assert_frame_equal(df_lote, df_lista)
+        self.assertEqual(len(df_lote), 3)
+
+    def test_template_compilado(self):
+        """Cada coluna é resolvida uma vez para atributo, campo extra ou constante."""
+        template = Template(
+            nome="Compilado",
+            colunas=["Data", "Cliente", "Em branco"],
+            mapeamento={"Data": "data", "Cliente": "Cliente", "Em branco": ""}
+        )
+        self.assertEqual(template.compilar(), {
+            "Data": (ACESSO_ATRIBUTO, "data"),
+            "Cliente": (ACESSO_EXTRA, "Cliente"),
+            "Em branco": (ACESSO_CONSTANTE, ""),
+        })
+        self.assertIs(template.compilar(), template.compilar())
+
+        # Alterar o mapeamento refaz a compilação
+        template.mapeamento["Cliente"] = "valor"
+        self.assertEqual(template.compilar()["Cliente"], (ACESSO_ATRIBUTO, "valor"))
+
+    def test_montar_dataframe_igual_por_celula(self):
+        """As colunas montadas de uma vez são iguais às lidas célula a célula com get_valor_mapeado."""
+        transactions, _ = extract_transactions(self.df)
+        transactions[0].extras.pop("Cliente")
+        esperado = pd.DataFrame(
+            [{coluna: self.template.get_valor_mapeado(t, coluna) for coluna in self.template.colunas} for t in transactions],
+            columns=self.template.colunas,
+        )
+        df = montar_dataframe(transactions, self.template)
+        pd.testing.assert_frame_equal(df, esperado)
+        self.assertEqual(df.loc[0, "Cliente"], "")
+
+        df_lote = montar_dataframe(TransactionBatch.from_transactions(transactions), self.template)
+        pd.testing.assert_frame_equal(df_lote.astype(object), esperado.astype(object))
+
+    def test_from_transactions(self):
+        transactions = [
+            Transaction(data="06/10/2025", valor=150.50, tipo_pagamento="pix", cliente="João"),
+            Transaction(data="07/10/2025", valor=20, tipo_pagamento="PIX"),
+        ]
+        lote = TransactionBatch.from_transactions(transactions)
+        self.assertEqual(len(lote), 2)
+        self.assertEqual(list(lote.data), ["06/10/2025", "07/10/2025"])
+        self.assertEqual(lote.valor.dtype, np.float64)
+        self.assertEqual(lote[-1].extras["cliente"], "")
+
+    def test_concatenar(self):
+        """Lotes com campos extras diferentes são unidos; campos ausentes ficam vazios."""
+        lote_a = TransactionBatch(["06/10/2025"], ["pix"], [1.0], {"cliente": ["Ana"]})
+        lote_b = TransactionBatch(["07/10/2025", "08/10/2025"], ["débito", "pix"], [2.0, 3.0], {"nsu": [10, 11]})
+        lote = TransactionBatch.concatenar([lote_a, lote_b])
+
+        self.assertEqual(len(lote), 3)
+        self.assertEqual(list(lote.tipo_pagamento), ["pix", "débito", "pix"])
+        self.assertEqual(list(lote.extras["cliente"]), ["Ana", "", ""])
+        self.assertEqual(list(lote.extras["nsu"]), ["", 10, 11])
+
+    def test_tamanhos_diferentes(self):
+        with self.assertRaises(ValueError):
+            TransactionBatch(["06/10/2025"], ["pix", "pix"], [1.0])
+
+    def test_transaction_sem_dict(self):
+        """Transaction usa __slots__ e não carrega um __dict__ por objeto."""
+        transaction = Transaction(data="06/10/2025", valor=1.0, tipo_pagamento="pix")
+        self.assertFalse(hasattr(transaction, "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
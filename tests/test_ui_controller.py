@@ -0,0 +1,225 @@
+import unittest
+import json
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pandas as pd
+
+# Adiciona o diretório src ao path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from conciliador.models.template import Template
+from conciliador import database
+from conciliador.models import transaction as transaction_module
+from conciliador.services import template_manager, pipeline, cache_planilhas
+from conciliador.ui.ui_controller import UIController
+
+
+class ViewFalsa:
+    '''
+    Substitui a MainWindow: registra as chamadas feitas pelo controller.
+    '''
+
+    def __init__(self):
+        self.progresso = []
+        self.em_andamento = []
+        self.renderizados = []
+        self.previas = []
+        self.agendados = []
+        self.status_arquivos = {}
+        self.descartadas = 0
+
+    def after(self, ms, funcao):
+        self.agendados.append(funcao)
+
+    def atualizar_progresso(self, texto):
+        self.progresso.append(texto)
+
+    def definir_importacao_em_andamento(self, em_andamento):
+        self.em_andamento.append(em_andamento)
+
+    def renderizar_planilha_no_frame(self, df):
+        self.renderizados.append(df)
+
+    def acrescentar_previa(self, df):
+        self.previas.append(df)
+
+    def descartar_previa(self):
+        self.descartadas += 1
+
+    def atualizar_status_arquivo(self, nome, texto):
+        self.status_arquivos[nome] = texto
+
+    def definir_templates(self, nomes, selecionado):
+        self.templates = (nomes, selecionado)
+
+    def exibir_historico(self, resultado):
+        self.historico = resultado
+
+
+class TestUIControllerImportacao(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.entrada = os.path.join(self.pasta, "entrada.xlsx")
+        pd.DataFrame({
+            "Data": ["06/10/2025", "07/10/2025", "xx"],
+            "Tipo": ["pix", "débito", "pix"],
+            "Valor": [150.5, 20.0, 1.0],
+        }).to_excel(self.entrada, index=False)
+        self.template = Template("Automático", ["Data", "Tipo", "Valor"],
+                                 {"Data": "data", "Tipo": "tipo_pagamento", "Valor": "valor"})
+        self.view = ViewFalsa()
+        self.controller = UIController(self.view)
+        # O controller importa com cache: redireciona para a pasta temporária
+        self.patcher = patch('conciliador.services.cache_planilhas.CACHE_DIR', os.path.join(self.pasta, "cache"))
+        self.patcher.start()
+        # Histórico em um banco temporário
+        self.patcher_db = patch('conciliador.database.DB_PATH', os.path.join(self.pasta, "historico.db"))
+        self.patcher_db.start()
+
+    def tearDown(self):
+        database.fechar()
+        self.patcher_db.stop()
+        self.patcher.stop()
+        shutil.rmtree(self.pasta)
+
+    def test_resultado_volta_pela_fila(self):
+        """A thread de trabalho só publica na fila; a view é atualizada em _processar_fila."""
+        caminho_saida = os.path.join(self.pasta, "saida.xlsx")
+        # O resultado exibido vem da memória: a saída gravada não é relida
+        with patch('pandas.read_excel', side_effect=AssertionError("releu a saída")), \
+                patch('conciliador.services.cache_planilhas.hash_arquivo', wraps=cache_planilhas.hash_arquivo) as hash_arquivo:
+            self.controller._executar_importacao(self.entrada, self.template, caminho_saida)
+        self.assertEqual(self.view.renderizados, [])
+        # O histórico usa o hash do pipeline: o arquivo não é relido
+        self.assertEqual(hash_arquivo.call_count, 1)
+
+        self.controller._processar_fila()
+        # Um bloco só: ele substitui o resultado anterior e nada é acrescentado
+        self.assertEqual(len(self.view.renderizados), 1)
+        self.assertEqual(len(self.view.renderizados[0]), 2)
+        self.assertEqual(self.view.previas, [])
+        self.assertIn("Linhas lidas: 3", self.view.progresso[0])
+        self.assertTrue(self.view.progresso[-1].startswith("Concluído: 2 transações, 1 erros"))
+        self.assertEqual(self.view.em_andamento, [False])
+
+        # A importação entra no histórico e o painel é recarregado
+        registro, = self.view.historico["registros"]
+        self.assertEqual((registro["status"], registro["transacoes"], registro["n_erros"]), ("ok", 2, 1))
+        self.assertEqual(registro["caminho_saida"], caminho_saida)
+        self.assertEqual(registro["hash_entrada"], cache_planilhas.hash_arquivo(self.entrada))
+        self.assertEqual(len(database.erros_da_importacao(registro["id"])), 1)
+
+    def test_previa_chega_antes_da_conclusao(self):
+        """Com vários blocos, o primeiro substitui a tabela e os outros são acrescentados."""
+        processar_planilha = pipeline.processar_planilha
+
+        def em_dois_blocos(caminho, template, caminho_saida, **opcoes):
+            return processar_planilha(caminho, template, caminho_saida, chunk_size=1, **opcoes)
+
+        with patch('conciliador.services.pipeline.processar_planilha', side_effect=em_dois_blocos):
+            self.controller._executar_importacao(self.entrada, self.template, os.path.join(self.pasta, "saida.xlsx"))
+
+        tipos = [tipo for tipo, _ in list(self.controller._fila.queue) if tipo != "progresso"]
+        self.assertEqual(tipos, ["previa", "previa", "concluido"])
+        self.controller._processar_fila()
+        self.assertEqual([len(df) for df in self.view.renderizados], [1])
+        self.assertEqual([len(df) for df in self.view.previas], [1])
+
+    def test_cancelamento(self):
+        self.controller._cancelar.set()
+        caminho_saida = os.path.join(self.pasta, "cancelada.xlsx")
+        self.controller._executar_importacao(self.entrada, self.template, caminho_saida)
+        self.controller._processar_fila()
+        self.assertEqual(self.view.progresso, ["Importação cancelada."])
+        self.assertFalse(os.path.exists(caminho_saida))
+        self.assertEqual(self.view.historico["registros"][0]["status"], "cancelado")
+
+    def test_previa_descartada_no_erro(self):
+        """Blocos já exibidos de uma importação que falhou são retirados da tabela."""
+
+        def falha_na_gravacao(caminho, template, caminho_saida, **opcoes):
+            opcoes["previa"](pd.DataFrame({"Data": ["06/10/2025"]}))
+            raise IOError("disco cheio")
+
+        with patch('conciliador.services.pipeline.processar_planilha', side_effect=falha_na_gravacao):
+            self.controller._executar_importacao(self.entrada, self.template, os.path.join(self.pasta, "saida.xlsx"))
+        self.controller._processar_fila()
+        self.assertEqual(len(self.view.renderizados), 1)
+        self.assertEqual(self.view.descartadas, 1)
+        self.assertEqual(self.view.progresso, ["Erro: disco cheio"])
+
+        # Sem prévia exibida, o resultado anterior fica na tabela
+        self.controller._cancelar.set()
+        self.controller._executar_importacao(self.entrada, self.template, os.path.join(self.pasta, "cancelada.xlsx"))
+        self.controller._processar_fila()
+        self.assertEqual(self.view.descartadas, 1)
+
+    def test_importacao_em_lote_status_por_arquivo(self):
+        outra = os.path.join(self.pasta, "outra.xlsx")
+        shutil.copy(self.entrada, outra)
+        pasta_saida = os.path.join(self.pasta, "lote")
+
+        self.controller._executar_importacao_em_lote([self.entrada, outra], self.template, pasta_saida, True)
+        self.controller._processar_fila()
+
+        self.assertEqual(set(self.view.status_arquivos), {"entrada.xlsx", "outra.xlsx"})
+        self.assertTrue(self.view.status_arquivos["outra.xlsx"].startswith("OK - 2 transações, 1 erros"))
+        self.assertTrue(self.view.progresso[-1].startswith("2/2 planilhas em"))
+        self.assertTrue(os.path.exists(os.path.join(pasta_saida, "conciliacao_consolidada.xlsx")))
+        self.assertEqual(self.view.em_andamento, [False])
+        # Um registro por arquivo, os dois com o mesmo conteúdo (mesmo hash)
+        registros = self.view.historico["registros"]
+        self.assertEqual(len(registros), 2)
+        self.assertEqual(registros[0]["hash_entrada"], registros[1]["hash_entrada"])
+        self.assertEqual(registros[0]["hash_entrada"], cache_planilhas.hash_arquivo(self.entrada))
+        self.assertTrue(registros[0]["caminho_saida"].endswith("conciliacao_consolidada.xlsx"))
+
+    def test_lista_de_templates(self):
+        with patch('conciliador.services.template_manager.TEMPLATE_DIR', os.path.join(self.pasta, "templates")):
+            template_manager.save_template("Banco Inter", {"data": "Data Lançamento", "tipo": "Forma Pagamento", "valor": "Valor Total"})
+            self.controller.on_template_select("Banco Inter")
+            self.controller.atualizar_lista_templates()
+            self.assertEqual(self.view.templates, (["Automático", "Banco Inter"], "Banco Inter"))
+
+            # Template removido do disco: o menu volta para "Automático"
+            os.remove(os.path.join(self.pasta, "templates", "banco_inter.json"))
+            self.controller.atualizar_lista_templates()
+            self.assertEqual(self.view.templates, (["Automático"], "Automático"))
+
+    def test_tipos_do_template_so_na_importacao(self):
+        """Os sinônimos de tipo do template vão para a tabela da importação, não para a global."""
+        tabela_original = dict(transaction_module.TIPOS_NORMALIZADOS)
+        with patch('conciliador.services.template_manager.TEMPLATE_DIR', os.path.join(self.pasta, "templates")):
+            caminho = template_manager.save_template("Cartões", {"data": "Data", "tipo": "Tipo", "valor": "Valor"})
+            with open(caminho, encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+            dados["tipos_pagamento"] = {"Cartão de Crédito": "CRÉDITO"}
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(dados, arquivo)
+            self.controller.on_template_select("Cartões")
+            template, mapping, tipos = self.controller._preparar_template()
+
+        self.assertEqual(tipos["cartao de credito"], "CRÉDITO")
+        self.assertEqual(transaction_module.TIPOS_NORMALIZADOS, tabela_original)
+
+        pd.DataFrame({"Data": ["06/10/2025", "07/10/2025"], "Tipo": ["Cartão de Crédito", "pix"],
+                      "Valor": [10.0, 20.0]}).to_excel(self.entrada, index=False)
+        caminho_saida = os.path.join(self.pasta, "saida.xlsx")
+        self.controller._executar_importacao(self.entrada, self.template, caminho_saida, mapping, tipos)
+        self.controller._executar_importacao(self.entrada, self.template, caminho_saida, mapping)
+        resumos = [resumo for tipo, resumo in list(self.controller._fila.queue) if tipo == "concluido"]
+        self.assertEqual([resumo["transacoes"] for resumo in resumos], [2, 1])
+
+    def test_fila_vazia_reagenda(self):
+        """Sem mensagem final, a leitura da fila é reagendada com after()."""
+        self.controller._processar_fila()
+        self.assertEqual(self.view.agendados, [self.controller._processar_fila])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)